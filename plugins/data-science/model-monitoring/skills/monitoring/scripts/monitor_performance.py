@@ -20,10 +20,12 @@
 """
 
 import argparse
+import contextlib
 import json
 import os
 import sys
 import warnings
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
@@ -43,6 +45,8 @@ from sklearn.metrics import (
     recall_score,
 )
 
+from quantile_sketch import DEFAULT_K, KLLSketch, sketch_bin_counts, sketch_bin_edges
+
 warnings.filterwarnings('ignore')
 
 
@@ -122,44 +126,414 @@ def calculate_ks_statistic(reference, current):
     return ks_stat, p_value
 
 
-def detect_data_drift(X_ref, X_cur, output_dir, threshold=0.1):
-    """데이터 드리프트 탐지"""
-    print_section("데이터 드리프트 탐지")
-
-    drift_results = []
-
-    for col in X_ref.columns:
-        if col not in X_cur.columns:
+# 드리프트 엔진: 한 번에 처리하는 컬럼 수 (행 수 x 블록 크기만큼 float64 행렬 생성)
+DRIFT_BLOCK_COLUMNS = 64
+# scipy ks_2samp(method='auto')는 이 크기까지 exact p-value 사용
+KS_EXACT_MAX_N = 10000
+# 유효 표본 크기가 이보다 크면 Kolmogorov 극한분포로 p-value 계산 (상대오차 < 1%)
+KS_LIMIT_N = 10000
+# 이보다 작은 데이터는 프로세스 풀 없이 KS 계산
+KS_POOL_MIN_VALUES = 1_000_000
+
+
+def is_numeric_column(series):
+    """숫자형 컬럼 여부 (bool 제외, pandas 확장 dtype 포함)"""
+    return pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype)
+
+
+def sorted_block(df, columns):
+    """컬럼 블록을 열별로 정렬된 float 행렬로 변환 (NaN은 끝으로), 열별 유효 건수"""
+    values = np.sort(df[columns].to_numpy(dtype=np.float64), axis=0)
+    counts = np.count_nonzero(~np.isnan(values), axis=0)
+    return values, counts
+
+
+def block_searchsorted(sorted_values, counts, targets, side='left'):
+    """열마다 np.searchsorted(sorted_values[:count, j], targets[:, j], side)
+
+    블록 전체를 한 번의 벡터화 이진 탐색으로 처리합니다 (반복당 gather 1회).
+    """
+    lo = np.zeros(targets.shape, dtype=np.int64)
+    hi = np.broadcast_to(counts, targets.shape).astype(np.int64)
+    last = max(len(sorted_values) - 1, 0)
+    while True:
+        active = lo < hi
+        if not active.any():
+            return lo
+        mid = (lo + hi) // 2
+        v = np.take_along_axis(sorted_values, np.minimum(mid, last), axis=0)
+        right = active & ((v < targets) if side == 'left' else (v <= targets))
+        lo = np.where(right, mid + 1, lo)
+        hi = np.where(active & ~right, mid, hi)
+
+
+def quantile_edges(sorted_values, counts, bins=10):
+    """열별 퍼센타일 경계 (bins + 1, p) - np.percentile(linear)과 동일한 값"""
+    q = (np.linspace(0, 100, bins + 1) / 100)[:, None]
+    pos = q * (counts - 1)
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.minimum(lo + 1, counts - 1)
+    t = pos - lo
+    a = np.take_along_axis(sorted_values, lo, axis=0)
+    b = np.take_along_axis(sorted_values, hi, axis=0)
+    diff = b - a
+    return np.where(t >= 0.5, b - diff * (1 - t), a + diff * t)
+
+
+def bin_counts(sorted_values, counts, edges):
+    """경계 (bins + 1, p)별 도수 (bins, p)와 유효 bin 마스크
+
+    np.histogram(x, np.unique(edges))와 같은 규칙: 마지막 bin은 오른쪽 포함,
+    범위 밖 값은 제외, 중복 경계로 생긴 폭 0 bin은 마스크에서 제외.
+    """
+    left = block_searchsorted(sorted_values, counts, edges, 'left')
+    right_last = block_searchsorted(sorted_values, counts, edges[-1:], 'right')
+    upper = np.where(edges[1:] == edges[-1:], right_last, left[1:])
+    valid = edges[1:] > edges[:-1]
+    return np.where(valid, upper - left[:-1], 0), valid
+
+
+def psi_matrix(ref_counts, ref_n, cur_counts, cur_n, valid, bins=10):
+    """모든 특성의 PSI를 행렬 연산으로 계산 (calculate_psi와 같은 평활화)"""
+    ref_percents = (ref_counts + 1) / (ref_n + bins)
+    cur_percents = (cur_counts + 1) / (cur_n + bins)
+    terms = (cur_percents - ref_percents) * np.log(cur_percents / ref_percents)
+    return np.where(valid, terms, 0.0).sum(axis=0)
+
+
+def ks_pvalue(ks_stat, n1, n2):
+    """양측 KS p-value (stats.ks_2samp의 asymp 방식)
+
+    유효 표본 크기가 KS_LIMIT_N을 넘으면 kstwo 대신 kstwobign을 사용합니다
+    (꼬리 확률에서 kstwo는 특성당 수백 ms가 걸림).
+    """
+    m, n = sorted([float(n1), float(n2)], reverse=True)
+    en = np.round(m * n / (m + n))
+    if en > KS_LIMIT_N:
+        p_value = stats.kstwobign.sf(np.sqrt(en) * ks_stat)
+    else:
+        p_value = stats.kstwo.sf(ks_stat, en)
+    return float(np.clip(p_value, 0, 1))
+
+
+def ks_2samp_sorted(reference, current, reference_n=None):
+    """정렬된 두 표본의 KS 통계량과 p-value (stats.ks_2samp와 같은 값)
+
+    큰 표본은 두 정렬 run의 병합으로 통계량을 구하고 점근 분포로
+    p-value를 계산합니다. 작은 표본은 exact p-value를 위해 scipy를 사용합니다.
+    reference가 원본 reference_n건의 분위수 표본(reference profile)이면
+    통계량은 근사값이고 p-value는 원본 건수로 계산합니다.
+    """
+    n1, n2 = len(reference), len(current)
+    sampled = reference_n is not None and reference_n != n1
+    if not sampled and max(n1, n2) <= KS_EXACT_MAX_N:
+        ks_stat, p_value = stats.ks_2samp(reference, current)
+        return float(ks_stat), float(p_value)
+
+    # 정렬된 두 run의 stable 병합 (timsort: O(n)), ECDF 차이를 정수로 누적
+    merged = np.concatenate([reference, current])
+    order = np.argsort(merged, kind='stable')
+    values = merged[order]
+    diff = np.cumsum(np.where(order < n1, n2, -n1).astype(np.int64))
+    # 같은 값이 여러 개면 마지막 위치에서만 ECDF가 확정된다
+    last = np.append(values[1:] != values[:-1], True)
+    ks_stat = float(np.abs(diff[last]).max() / (n1 * n2))
+    return ks_stat, ks_pvalue(ks_stat, reference_n if sampled else n1, n2)
+
+
+def _ks_columns(pairs):
+    """프로세스 풀 작업 단위: (reference, current[, reference_n]) 정렬 표본 목록의 KS"""
+    return [ks_2samp_sorted(*pair) for pair in pairs]
+
+
+def ks_pool(jobs, n_columns, total_values):
+    """KS용 프로세스 풀 (단일 작업·작은 데이터면 None: 현재 프로세스에서 계산)"""
+    if jobs <= 1 or n_columns <= 1 or total_values < KS_POOL_MIN_VALUES:
+        return contextlib.nullcontext()
+    return ProcessPoolExecutor(max_workers=jobs)
+
+
+def ks_many(pairs, jobs=None, pool=None):
+    """여러 특성의 KS 계산 (pool이 있으면 특성 묶음 단위로 병렬)
+
+    컬럼 블록마다 호출해 블록의 정렬 배열만 작업자에게 보내므로, 최대
+    메모리가 데이터 전체 복사본이 아니라 블록 크기로 제한됩니다.
+    """
+    if pool is None or len(pairs) <= 1:
+        return _ks_columns(pairs)
+    jobs = jobs or os.cpu_count() or 1
+    chunk = -(-len(pairs) // (jobs * 4))
+    chunks = [pairs[i:i + chunk] for i in range(0, len(pairs), chunk)]
+    return [result for part in pool.map(_ks_columns, chunks) for result in part]
+
+
+def category_table(series):
+    """범주형 빈도표: (범주 문자열 배열, 건수 배열), 결측 제외"""
+    counts = series.dropna().astype(str).value_counts()
+    return counts.index.to_numpy(dtype=str), counts.to_numpy(dtype=np.int64)
+
+
+def categorical_psi(ref_values, ref_counts, cur_values, cur_counts):
+    """범주형 PSI: 참조 빈도표 기준, 참조에 없는 범주는 한 bin으로 합침"""
+    cur = pd.Series(cur_counts, index=cur_values).reindex(ref_values, fill_value=0).to_numpy()
+    ref_all = np.append(ref_counts, 0)
+    cur_all = np.append(cur, cur_counts.sum() - cur.sum())
+    bins = len(ref_all)
+    ref_percents = (ref_all + 1) / (ref_all.sum() + bins)
+    cur_percents = (cur_all + 1) / (cur_all.sum() + bins)
+    return float(np.sum((cur_percents - ref_percents) * np.log(cur_percents / ref_percents)))
+
+
+def common_columns(ref_columns, cur_columns):
+    """현재 데이터에 있는 참조 컬럼 (없는 컬럼은 경고)"""
+    columns = []
+    for col in ref_columns:
+        if col not in cur_columns:
             print(f"⚠️  '{col}' 컬럼이 현재 데이터에 없습니다.")
             continue
+        columns.append(col)
+    return columns
+
+
+def compute_drift(X_ref, X_cur, bins=10, jobs=None):
+    """공통 숫자형 컬럼의 PSI / KS 계산 (컬럼 블록 단위로 벡터화)
+
+    범주형 컬럼은 건너뜁니다 (범주형 PSI는 reference profile 경로에서만 계산).
+    """
+    columns = [col for col in common_columns(X_ref.columns, X_cur.columns)
+               if is_numeric_column(X_ref[col])]
+
+    jobs = jobs or os.cpu_count() or 1
+    features, psis, ks_results = [], [], []
+    with ks_pool(jobs, len(columns), (len(X_ref) + len(X_cur)) * len(columns)) as pool:
+        for start in range(0, len(columns), DRIFT_BLOCK_COLUMNS):
+            block = columns[start:start + DRIFT_BLOCK_COLUMNS]
+            ref_sorted, ref_n = sorted_block(X_ref, block)
+            cur_sorted, cur_n = sorted_block(X_cur, block)
+
+            empty = (ref_n == 0) | (cur_n == 0)
+            for col in np.array(block, dtype=object)[empty]:
+                print(f"⚠️  '{col}' 컬럼에 유효한 값이 없어 건너뜁니다.")
+            keep = ~empty
+            if not keep.any():
+                continue
+            ref_sorted, ref_n = ref_sorted[:, keep], ref_n[keep]
+            cur_sorted, cur_n = cur_sorted[:, keep], cur_n[keep]
+
+            # 참조 데이터 퍼센타일 경계 → 두 데이터의 bin 도수 → PSI (블록 전체 한 번에)
+            edges = quantile_edges(ref_sorted, ref_n, bins)
+            ref_counts, valid = bin_counts(ref_sorted, ref_n, edges)
+            cur_counts, _ = bin_counts(cur_sorted, cur_n, edges)
+            psis.extend(psi_matrix(ref_counts, ref_n, cur_counts, cur_n, valid, bins))
+
+            # KS도 블록 단위로 계산해 정렬 배열은 블록 하나만 유지
+            features.extend(np.array(block, dtype=object)[keep])
+            ks_results.extend(ks_many(
+                [(ref_sorted[:ref_n[j], j], cur_sorted[:cur_n[j], j]) for j in range(len(ref_n))],
+                jobs, pool))
+    return features, psis, ks_results
+
+
+# Reference profile: 참조 데이터 요약 (NPZ), 모니터링 때 참조 데이터를 다시 읽지 않음
+PROFILE_VERSION = 1
+# KS용 분위수 표본 크기 (ECDF 오차 약 1 / (2 * 표본 크기))
+PROFILE_KS_SAMPLE = 2048
+PREDICTION_HIST_BINS = 50
+
+
+def quantile_sample(sorted_values, counts, size=PROFILE_KS_SAMPLE):
+    """열별 분위수 표본 (size, p): 같은 건수의 구간 size개의 중앙값, 건수가
+    size 이하인 열은 전체 값 (나머지는 NaN)"""
+    sample = np.full((size, sorted_values.shape[1]), np.nan)
+    sample_n = np.minimum(counts, size)
+    for j, n in enumerate(counts):
+        if n <= size:
+            sample[:n, j] = sorted_values[:n, j]
+        else:
+            sample[:, j] = sorted_values[((np.arange(size) + 0.5) * n / size).astype(np.int64), j]
+    return sample, sample_n
+
 
-        # 숫자형 컬럼만 처리
-        if not np.issubdtype(X_ref[col].dtype, np.number):
+def prediction_scores(model, X):
+    """모델 예측 점수와 축 라벨 (양성 확률 또는 예측값)"""
+    if hasattr(model, 'predict_proba'):
+        return model.predict_proba(X)[:, 1], 'Predicted Probability'
+    return model.predict(X), 'Predicted Value'
+
+
+def build_reference_profile(X_ref, model=None, bins=10, sample_size=PROFILE_KS_SAMPLE):
+    """참조 데이터의 reference profile 생성
+
+    숫자형: 퍼센타일 bin 경계, bin 도수, KS용 분위수 표본.
+    범주형: 빈도표. 모델이 있으면 예측 점수 히스토그램과 분위수 표본.
+    """
+    numeric = [col for col in X_ref.columns if is_numeric_column(X_ref[col])]
+    categorical = [col for col in X_ref.columns if col not in numeric]
+
+    edges = np.empty((bins + 1, 0))
+    counts = np.empty((bins, 0), dtype=np.int64)
+    valid = np.empty((bins, 0), dtype=bool)
+    n = np.empty(0, dtype=np.int64)
+    sample = np.empty((sample_size, 0))
+    sample_n = np.empty(0, dtype=np.int64)
+    blocks = []
+    for start in range(0, len(numeric), DRIFT_BLOCK_COLUMNS):
+        ref_sorted, ref_n = sorted_block(X_ref, numeric[start:start + DRIFT_BLOCK_COLUMNS])
+        block_edges = np.full((bins + 1, len(ref_n)), np.nan)
+        block_counts = np.zeros((bins, len(ref_n)), dtype=np.int64)
+        block_valid = np.zeros((bins, len(ref_n)), dtype=bool)
+        has = ref_n > 0
+        if has.any():
+            block_edges[:, has] = quantile_edges(ref_sorted[:, has], ref_n[has], bins)
+            block_counts[:, has], block_valid[:, has] = bin_counts(
+                ref_sorted[:, has], ref_n[has], block_edges[:, has])
+        blocks.append((block_edges, block_counts, block_valid, ref_n,
+                       *quantile_sample(ref_sorted, ref_n, sample_size)))
+    if blocks:
+        edges, counts, valid, n, sample, sample_n = (
+            np.concatenate(parts, axis=parts[0].ndim - 1) for parts in zip(*blocks))
+
+    tables = [category_table(X_ref[col]) for col in categorical]
+    profile = {
+        'version': np.int32(PROFILE_VERSION),
+        'bins': np.int32(bins),
+        'rows': np.int64(len(X_ref)),
+        'num_features': np.array(numeric, dtype=str),
+        'num_edges': edges,
+        'num_counts': counts,
+        'num_valid': valid,
+        'num_n': n,
+        'num_sample': sample,
+        'num_sample_n': sample_n,
+        'cat_features': np.array(categorical, dtype=str),
+        'cat_values': np.concatenate([t[0] for t in tables]) if tables else np.array([], dtype=str),
+        'cat_counts': np.concatenate([t[1] for t in tables]) if tables else np.array([], dtype=np.int64),
+        'cat_offsets': np.cumsum([0] + [len(t[0]) for t in tables]),
+    }
+
+    if model is not None:
+        scores, label = prediction_scores(model, X_ref)
+        scores = np.sort(np.asarray(scores, dtype=np.float64))
+        hist_counts, hist_edges = np.histogram(scores, bins=PREDICTION_HIST_BINS)
+        pred_sample, pred_n = quantile_sample(scores[:, None], np.array([len(scores)]), sample_size)
+        profile.update({
+            'pred_label': np.str_(label),
+            'pred_hist_edges': hist_edges,
+            'pred_hist_counts': hist_counts,
+            'pred_sample': pred_sample[:pred_n[0], 0],
+            'pred_n': np.int64(len(scores)),
+        })
+    return profile
+
+
+def save_reference_profile(profile, path):
+    """reference profile을 압축 NPZ로 저장"""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(path, **profile)
+    size_kb = os.path.getsize(path) / 1024
+    print(f"✓ Reference profile 저장: {path} ({len(profile['num_features'])}개 숫자형, "
+          f"{len(profile['cat_features'])}개 범주형, {size_kb:.0f}KB)")
+
+
+def load_reference_profile(path):
+    """reference profile 로드 (NPZ → dict)"""
+    print(f"\n✓ Reference profile 로드 중: {path}")
+    with np.load(path, allow_pickle=False) as data:
+        profile = {key: data[key] for key in data.files}
+    if int(profile['version']) != PROFILE_VERSION:
+        raise ValueError(f"지원하지 않는 profile 버전: {int(profile['version'])}")
+    print(f"✓ Profile 로드 완료: 참조 {int(profile['rows']):,}건, "
+          f"{len(profile['num_features'])}개 숫자형, {len(profile['cat_features'])}개 범주형 특성")
+    return profile
+
+
+def compute_drift_profile(profile, X_cur, jobs=None):
+    """reference profile 기준 PSI / KS 계산 (현재 데이터만 읽음)
+
+    PSI는 참조 데이터로 계산한 값과 같고, KS는 분위수 표본 기준 근사값입니다.
+    """
+    bins = int(profile['bins'])
+    numeric = list(profile['num_features'])
+    categorical = list(profile['cat_features'])
+    present = set(common_columns(numeric + categorical, X_cur.columns))
+    index = [j for j, col in enumerate(numeric) if col in present]
+
+    jobs = jobs or os.cpu_count() or 1
+    features, psis, ks_results = [], [], []
+    with ks_pool(jobs, len(index), len(X_cur) * len(index)) as pool:
+        for start in range(0, len(index), DRIFT_BLOCK_COLUMNS):
+            idx = np.array(index[start:start + DRIFT_BLOCK_COLUMNS])
+            block = [numeric[j] for j in idx]
+            cur_sorted, cur_n = sorted_block(X_cur, block)
+            ref_n = profile['num_n'][idx]
+
+            empty = (ref_n == 0) | (cur_n == 0)
+            for col in np.array(block, dtype=object)[empty]:
+                print(f"⚠️  '{col}' 컬럼에 유효한 값이 없어 건너뜁니다.")
+            keep = ~empty
+            if not keep.any():
+                continue
+            idx, cur_sorted, cur_n, ref_n = idx[keep], cur_sorted[:, keep], cur_n[keep], ref_n[keep]
+
+            cur_counts, _ = bin_counts(cur_sorted, cur_n, profile['num_edges'][:, idx])
+            psis.extend(psi_matrix(profile['num_counts'][:, idx], ref_n, cur_counts, cur_n,
+                                   profile['num_valid'][:, idx], bins))
+
+            features.extend(numeric[ref_j] for ref_j in idx)
+            ks_results.extend(ks_many(
+                [(profile['num_sample'][:profile['num_sample_n'][ref_j], ref_j],
+                  cur_sorted[:cur_n[j], j], int(profile['num_n'][ref_j]))
+                 for j, ref_j in enumerate(idx)],
+                jobs, pool))
+
+    offsets = profile['cat_offsets']
+    for k, col in enumerate(categorical):
+        if col not in present:
             continue
+        lo, hi = offsets[k], offsets[k + 1]
+        features.append(col)
+        psis.append(categorical_psi(profile['cat_values'][lo:hi], profile['cat_counts'][lo:hi],
+                                    *category_table(X_cur[col])))
+        ks_results.append((np.nan, np.nan))
+    return features, psis, ks_results
+
+
+def detect_data_drift(X_ref, X_cur, output_dir, threshold=0.1, jobs=None, profile=None):
+    """데이터 드리프트 탐지 (profile이 있으면 X_ref 대신 사용)"""
+    print_section("데이터 드리프트 탐지")
 
-        ref_data = X_ref[col].dropna()
-        cur_data = X_cur[col].dropna()
+    if profile is not None:
+        features, psis, ks_results = compute_drift_profile(profile, X_cur, jobs=jobs)
+    else:
+        features, psis, ks_results = compute_drift(X_ref, X_cur, jobs=jobs)
 
-        # PSI 계산
-        psi = calculate_psi(ref_data.values, cur_data.values)
+    drift_df = drift_frame(features, psis, ks_results, threshold)
+    report_drift(drift_df, output_dir, threshold)
+    return drift_df
 
-        # KS 통계량 계산
-        ks_stat, p_value = calculate_ks_statistic(ref_data.values, cur_data.values)
 
+def drift_frame(features, psis, ks_results, threshold=0.1):
+    """특성별 PSI / KS 결과 → 드리프트 판정 DataFrame (PSI 내림차순)"""
+    drift_results = []
+    for col, psi, (ks_stat, p_value) in zip(features, psis, ks_results):
         # 드리프트 판정
         drift_detected = psi > threshold or p_value < 0.05
 
         drift_results.append({
             'feature': col,
-            'psi': psi,
+            'psi': float(psi),
             'ks_statistic': ks_stat,
             'ks_pvalue': p_value,
             'drift_detected': drift_detected
         })
 
-    drift_df = pd.DataFrame(drift_results)
-    drift_df = drift_df.sort_values('psi', ascending=False)
+    drift_df = pd.DataFrame(drift_results,
+                            columns=['feature', 'psi', 'ks_statistic', 'ks_pvalue', 'drift_detected'])
+    return drift_df.sort_values('psi', ascending=False)
 
+
+def report_drift(drift_df, output_dir, threshold=0.1):
+    """드리프트 요약 출력, 시각화, drift_report.csv 저장"""
     # 드리프트 발생 특성
     drifted_features = drift_df[drift_df['drift_detected']]
 
@@ -181,8 +555,6 @@ def detect_data_drift(X_ref, X_cur, output_dir, threshold=0.1):
     drift_df.to_csv(drift_path, index=False)
     print(f"\n✓ 드리프트 리포트 저장: {drift_path}")
 
-    return drift_df
-
 
 def plot_drift_summary(drift_df, output_dir, threshold):
     """드리프트 요약 시각화"""
@@ -267,24 +639,28 @@ def track_performance(model, X_cur, y_cur, output_dir, task_type='classification
     return metrics
 
 
-def plot_prediction_distribution(model, X_ref, X_cur, output_dir):
-    """예측 분포 비교"""
+def plot_prediction_distribution(model, X_ref, X_cur, output_dir, profile=None):
+    """예측 분포 비교 (profile이 있으면 저장된 참조 예측 히스토그램 사용)"""
     print_section("예측 분포 모니터링")
 
+    if profile is not None and 'pred_n' not in profile:
+        print("⚠️  Profile에 예측 점수 히스토그램이 없어 예측 분포 비교를 건너뜁니다.")
+        return
+
     # 예측 수행
-    if hasattr(model, 'predict_proba'):
-        y_ref_pred = model.predict_proba(X_ref)[:, 1]
-        y_cur_pred = model.predict_proba(X_cur)[:, 1]
-        ylabel = 'Predicted Probability'
-    else:
-        y_ref_pred = model.predict(X_ref)
-        y_cur_pred = model.predict(X_cur)
-        ylabel = 'Predicted Value'
+    y_cur_pred, ylabel = prediction_scores(model, X_cur)
+    if profile is None:
+        y_ref_pred, _ = prediction_scores(model, X_ref)
 
     # 시각화
     plt.figure(figsize=(10, 6))
-    plt.hist(y_ref_pred, bins=50, alpha=0.5, label='Reference', density=True)
-    plt.hist(y_cur_pred, bins=50, alpha=0.5, label='Current', density=True)
+    if profile is None:
+        plt.hist(y_ref_pred, bins=PREDICTION_HIST_BINS, alpha=0.5, label='Reference', density=True)
+    else:
+        edges = profile['pred_hist_edges']
+        density = profile['pred_hist_counts'] / (profile['pred_hist_counts'].sum() * np.diff(edges))
+        plt.stairs(density, edges, fill=True, alpha=0.5, label='Reference')
+    plt.hist(y_cur_pred, bins=PREDICTION_HIST_BINS, alpha=0.5, label='Current', density=True)
     plt.xlabel(ylabel)
     plt.ylabel('Density')
     plt.title('Prediction Distribution Comparison')
@@ -299,7 +675,11 @@ def plot_prediction_distribution(model, X_ref, X_cur, output_dir):
     print(f"✓ 예측 분포 시각화 저장: {output_path}")
 
     # KS 통계량 계산
-    ks_stat, p_value = calculate_ks_statistic(y_ref_pred, y_cur_pred)
+    if profile is None:
+        ks_stat, p_value = calculate_ks_statistic(y_ref_pred, y_cur_pred)
+    else:
+        ks_stat, p_value = ks_2samp_sorted(profile['pred_sample'], np.sort(y_cur_pred),
+                                           int(profile['pred_n']))
     print(f"  예측 분포 KS 통계량: {ks_stat:.4f} (p={p_value:.4f})")
 
     if p_value < 0.05:
@@ -401,13 +781,414 @@ def save_monitoring_report(drift_df, metrics, alerts, output_dir, model_name):
     print(f"\n✓ 모니터링 리포트 저장: {report_path}")
 
 
+# 스트리밍 모니터링: 현재 데이터를 batch 단위로 읽어 윈도우별 누적 통계만 유지
+STREAM_BATCH_ROWS = 65536
+WINDOW_FREQ = {'hour': 'h', 'day': 'D'}
+
+
+def iter_record_batches(data_path, batch_size=STREAM_BATCH_ROWS):
+    """현재 데이터를 batch 단위 DataFrame으로 읽기 (전체 테이블을 만들지 않음)
+
+    Parquet 파일/디렉토리는 Arrow record batch, CSV는 chunk 단위로 읽습니다.
+    """
+    path = Path(data_path)
+    file_ext = path.suffix.lower()
+    if file_ext == '.csv':
+        yield from pd.read_csv(data_path, chunksize=batch_size)
+    elif file_ext == '.parquet' or path.is_dir():
+        import pyarrow.dataset as ds
+
+        dataset = ds.dataset(data_path, format='parquet')
+        for batch in dataset.to_batches(batch_size=batch_size):
+            yield batch.to_pandas()
+    else:
+        raise ValueError(f"스트리밍을 지원하지 않는 파일 형식: {file_ext}")
+
+
+def histogram_counts(values, edges):
+    """np.histogram(values, np.unique(edges))와 같은 도수를 (len(edges) - 1) bin에 담아 반환
+
+    폭 0 bin(중복 경계)은 항상 0이고, 최댓값과 같은 값은 마지막 유효 bin에 들어갑니다.
+    """
+    bins = len(edges) - 1
+    idx = np.searchsorted(edges, values, 'right') - 1
+    idx[values == edges[-1]] = np.searchsorted(edges, edges[-1], 'left') - 1
+    idx = idx[(values >= edges[0]) & (values <= edges[-1])]
+    return np.bincount(idx, minlength=bins)[:bins]
+
+
+def ks_grid_statistic(sample, grid_counts):
+    """참조 분위수 표본 점에서의 KS 통계량
+
+    grid_counts[i]는 sample[i - 1] < x <= sample[i]인 현재 값의 수 (병합 가능한
+    누적 도수). 표본 점 사이는 보지 않으므로 오차는 약 1 / len(sample) 이하입니다.
+    """
+    k = len(sample)
+    ref_cdf = np.searchsorted(sample, sample, 'right') / k
+    cur_cdf = np.cumsum(grid_counts)[:k] / grid_counts.sum()
+    return float(np.abs(ref_cdf - cur_cdf).max())
+
+
+def classification_metrics(confusion):
+    """(실제, 예측) 건수표로 accuracy / weighted precision·recall·F1 계산 (sklearn과 같은 정의)"""
+    total = sum(confusion.values())
+    labels = {label for pair in confusion for label in pair}
+    support = {label: 0 for label in labels}
+    predicted = {label: 0 for label in labels}
+    for (actual, pred), count in confusion.items():
+        support[actual] += count
+        predicted[pred] += count
+
+    precision = recall = f1 = 0.0
+    for label in labels:
+        tp = confusion.get((label, label), 0)
+        p = tp / predicted[label] if predicted[label] else 0.0
+        r = tp / support[label] if support[label] else 0.0
+        weight = support[label] / total
+        precision += weight * p
+        recall += weight * r
+        f1 += weight * (2 * p * r / (p + r) if p + r else 0.0)
+    accuracy = sum(confusion.get((label, label), 0) for label in labels) / total
+    return {'accuracy': accuracy, 'precision': precision, 'recall': recall, 'f1': f1}
+
+
+def regression_metrics(sums):
+    """[n, Σ|e|, Σe², Σy, Σy²] 합계로 MAE / MSE / RMSE / R² 계산"""
+    n, abs_err, sq_err, y_sum, y_sq = sums
+    sst = y_sq - y_sum ** 2 / n
+    mse = sq_err / n
+    return {'mae': abs_err / n, 'mse': mse, 'rmse': float(np.sqrt(mse)),
+            'r2': 1 - sq_err / sst if sst > 0 else 0.0}
+
+
+class WindowStats:
+    """시간 윈도우 하나의 병합 가능한 누적 통계
+
+    reference profile의 PSI bin / KS 격자에 대한 도수, 범주 빈도표, 예측 점수
+    격자 도수, 성능 누적값(건수표 또는 오차 합계)만 가지므로 batch나 윈도우,
+    작업자 단위 결과를 merge()로 순서와 관계없이 합칠 수 있습니다.
+    """
+
+    def __init__(self, profile, task_type='classification'):
+        self.profile = profile
+        self.task_type = task_type
+        bins = int(profile['bins'])
+        p = len(profile['num_features'])
+        self.rows = 0
+        self.n = np.zeros(p, dtype=np.int64)
+        self.counts = np.zeros((bins, p), dtype=np.int64)
+        self.grid = np.zeros((profile['num_sample'].shape[0] + 1, p), dtype=np.int64)
+        self.categories = [{} for _ in profile['cat_features']]
+        self.pred_grid = np.zeros(len(profile.get('pred_sample', [])) + 1, dtype=np.int64)
+        self.confusion = {}
+        self.errors = np.zeros(5)
+
+    def update(self, X, scores=None, y_true=None, y_pred=None):
+        """batch 하나(같은 윈도우의 행)를 누적"""
+        profile = self.profile
+        self.rows += len(X)
+        for j, col in enumerate(profile['num_features']):
+            if col not in X.columns:
+                continue
+            values = X[col].to_numpy(dtype=np.float64)
+            values = values[~np.isnan(values)]
+            if not len(values):
+                continue
+            self.n[j] += len(values)
+            self.counts[:, j] += histogram_counts(values, profile['num_edges'][:, j])
+            sample = profile['num_sample'][:profile['num_sample_n'][j], j]
+            self.grid[:len(sample) + 1, j] += np.bincount(np.searchsorted(sample, values, 'left'),
+                                                          minlength=len(sample) + 1)
+        for k, col in enumerate(profile['cat_features']):
+            if col in X.columns:
+                for value, count in zip(*category_table(X[col])):
+                    self.categories[k][value] = self.categories[k].get(value, 0) + int(count)
+        if scores is not None and len(self.pred_grid) > 1:
+            self.pred_grid += np.bincount(np.searchsorted(profile['pred_sample'], scores, 'left'),
+                                          minlength=len(self.pred_grid))
+        if y_true is not None:
+            if self.task_type == 'classification':
+                pairs = pd.Series(list(zip(y_true, y_pred))).value_counts()
+                for pair, count in pairs.items():
+                    self.confusion[pair] = self.confusion.get(pair, 0) + int(count)
+            else:
+                y = np.asarray(y_true, dtype=np.float64)
+                err = y - np.asarray(y_pred, dtype=np.float64)
+                self.errors += [len(y), np.abs(err).sum(), np.square(err).sum(), y.sum(), np.square(y).sum()]
+
+    def merge(self, other):
+        """다른 WindowStats를 합침 (결합법칙·교환법칙 성립)"""
+        self.rows += other.rows
+        self.n += other.n
+        self.counts += other.counts
+        self.grid += other.grid
+        for mine, theirs in zip(self.categories, other.categories):
+            for value, count in theirs.items():
+                mine[value] = mine.get(value, 0) + count
+        self.pred_grid += other.pred_grid
+        for pair, count in other.confusion.items():
+            self.confusion[pair] = self.confusion.get(pair, 0) + count
+        self.errors += other.errors
+        return self
+
+    def drift(self):
+        """profile 기준 특성별 (features, psis, ks_results)"""
+        profile = self.profile
+        bins = int(profile['bins'])
+        has = (self.n > 0) & (profile['num_n'] > 0)
+        psis = psi_matrix(profile['num_counts'][:, has], profile['num_n'][has],
+                          self.counts[:, has], self.n[has], profile['num_valid'][:, has], bins)
+        features, ks_results = [], []
+        for j in np.flatnonzero(has):
+            k = profile['num_sample_n'][j]
+            ks_stat = ks_grid_statistic(profile['num_sample'][:k, j], self.grid[:k + 1, j])
+            features.append(profile['num_features'][j])
+            ks_results.append((ks_stat, ks_pvalue(ks_stat, int(profile['num_n'][j]), int(self.n[j]))))
+        psis = list(psis)
+
+        offsets = profile['cat_offsets']
+        for k, col in enumerate(profile['cat_features']):
+            if not self.categories[k]:
+                continue
+            lo, hi = offsets[k], offsets[k + 1]
+            cur_values = np.array(list(self.categories[k]), dtype=str)
+            cur_counts = np.array(list(self.categories[k].values()), dtype=np.int64)
+            features.append(col)
+            psis.append(categorical_psi(profile['cat_values'][lo:hi], profile['cat_counts'][lo:hi],
+                                        cur_values, cur_counts))
+            ks_results.append((np.nan, np.nan))
+        return features, psis, ks_results
+
+    def prediction_ks(self):
+        """예측 점수 분포 KS (profile에 예측 표본이 없거나 점수가 없으면 None)"""
+        if len(self.pred_grid) <= 1 or not self.pred_grid.sum():
+            return None
+        ks_stat = ks_grid_statistic(self.profile['pred_sample'], self.pred_grid)
+        return ks_stat, ks_pvalue(ks_stat, int(self.profile['pred_n']), int(self.pred_grid.sum()))
+
+    def metrics(self):
+        """누적 성능 메트릭 (타겟이 없었으면 빈 dict)"""
+        if self.confusion:
+            return classification_metrics(self.confusion)
+        if self.errors[0]:
+            return regression_metrics(self.errors)
+        return {}
+
+
+def window_keys(batch, time_column=None, window='day'):
+    """batch 행별 윈도우 시작 시각 문자열 (time_column이 없으면 전체가 한 윈도우)"""
+    if not time_column:
+        return pd.Series('all', index=batch.index)
+    start = pd.to_datetime(batch[time_column]).dt.floor(WINDOW_FREQ[window])
+    return start.dt.strftime('%Y-%m-%d %H:%M' if window == 'hour' else '%Y-%m-%d')
+
+
+def monitor_stream(data_path, model, profile, output_dir, task_type, target_column=None,
+                   time_column=None, window='day', batch_size=STREAM_BATCH_ROWS, threshold=0.1):
+    """현재 데이터를 batch 단위로 읽어 윈도우별 PSI / KS / 성능 메트릭 계산
+
+    테이블 전체를 만들지 않고 윈도우별 WindowStats만 유지합니다. 윈도우 결과는
+    window_drift.csv / window_summary.csv로 저장하고, 전체 윈도우를 병합한
+    (drift_df, metrics)를 반환합니다.
+    """
+    print_section(f"스트리밍 모니터링 (윈도우: {window if time_column else '전체'})")
+
+    windows = {}
+    rows = 0
+    for batch in iter_record_batches(data_path, batch_size):
+        y_true = None
+        if target_column and target_column in batch.columns:
+            y_true = batch[target_column].to_numpy()
+        keys = window_keys(batch, time_column, window)
+        X = batch.drop(columns=[col for col in (target_column, time_column) if col and col in batch.columns])
+
+        scores = prediction_scores(model, X)[0] if 'pred_sample' in profile else None
+        y_pred = model.predict(X) if y_true is not None else None
+        for key, idx in keys.groupby(keys, sort=False).indices.items():
+            stats_ = windows.setdefault(key, WindowStats(profile, task_type))
+            stats_.update(X.iloc[idx],
+                          None if scores is None else scores[idx],
+                          None if y_true is None else y_true[idx],
+                          None if y_pred is None else y_pred[idx])
+        rows += len(batch)
+        print(f"\r  {rows:,}건 처리, 윈도우 {len(windows)}개", end='', flush=True)
+    print()
+    if not windows:
+        raise ValueError(f"현재 데이터가 비어 있습니다: {data_path}")
+
+    summary, details = [], []
+    overall = WindowStats(profile, task_type)
+    for key in sorted(windows):
+        stats_ = windows[key]
+        overall.merge(stats_)
+        drift_df = drift_frame(*stats_.drift(), threshold)
+        pred = stats_.prediction_ks()
+        entry = {
+            'window': key,
+            'rows': stats_.rows,
+            'drifted_features': int(drift_df['drift_detected'].sum()),
+            'max_psi': float(drift_df['psi'].max()) if len(drift_df) else np.nan,
+            'prediction_ks': pred[0] if pred else np.nan,
+            'prediction_ks_pvalue': pred[1] if pred else np.nan,
+        }
+        entry.update(stats_.metrics())
+        summary.append(entry)
+        details.append(drift_df.assign(window=key))
+
+    summary_df = pd.DataFrame(summary)
+    print(f"\n{'윈도우':20s} {'건수':>10s} {'드리프트':>8s} {'max PSI':>8s}")
+    for _, row in summary_df.iterrows():
+        print(f"{row['window']:20s} {row['rows']:10,d} {row['drifted_features']:8d} {row['max_psi']:8.4f}")
+
+    summary_path = os.path.join(output_dir, 'window_summary.csv')
+    summary_df.to_csv(summary_path, index=False)
+    detail_path = os.path.join(output_dir, 'window_drift.csv')
+    pd.concat(details)[['window', 'feature', 'psi', 'ks_statistic', 'ks_pvalue', 'drift_detected']] \
+        .to_csv(detail_path, index=False)
+    print(f"\n✓ 윈도우 요약 저장: {summary_path}")
+    print(f"✓ 윈도우별 드리프트 저장: {detail_path}")
+    plot_window_summary(summary_df, output_dir, threshold)
+
+    pred = overall.prediction_ks()
+    if pred:
+        print(f"  전체 예측 분포 KS 통계량: {pred[0]:.4f} (p={pred[1]:.4f})")
+    return drift_frame(*overall.drift(), threshold), overall.metrics()
+
+
+def plot_window_summary(summary_df, output_dir, threshold):
+    """윈도우별 max PSI / 드리프트 특성 수 시각화"""
+    fig, axes = plt.subplots(2, 1, figsize=(12, 7), sharex=True)
+    x = range(len(summary_df))
+
+    ax1 = axes[0]
+    ax1.plot(x, summary_df['max_psi'], marker='o')
+    ax1.axhline(y=threshold, color='orange', linestyle='--', linewidth=2, label=f'Threshold ({threshold})')
+    ax1.set_ylabel('Max PSI')
+    ax1.set_title('Drift by Window')
+    ax1.legend()
+    ax1.grid(True, alpha=0.3)
+
+    ax2 = axes[1]
+    ax2.bar(x, summary_df['drifted_features'], color='red', alpha=0.7)
+    ax2.set_ylabel('Drifted Features')
+    ax2.set_xticks(list(x))
+    ax2.set_xticklabels(summary_df['window'], rotation=45, ha='right', fontsize=8)
+    ax2.grid(True, alpha=0.3)
+
+    plt.tight_layout()
+    output_path = os.path.join(output_dir, 'window_summary.png')
+    plt.savefig(output_path, dpi=150, bbox_inches='tight')
+    plt.close()
+
+    print(f"✓ 윈도우 요약 시각화 저장: {output_path}")
+
+
+def profile_from_sketches(num_sketches, categories=None, pred_sketch=None, pred_label='',
+                          bins=10, sample_size=PROFILE_KS_SAMPLE, rows=None):
+    """병합된 KLL 스케치로 reference profile 생성 (분산/파티션 단위 집계의 마지막 단계)
+
+    num_sketches: {컬럼: KLLSketch}, categories: {컬럼: {범주: 건수}},
+    pred_sketch: 예측 점수 KLLSketch. bin 경계·도수와 KS 분위수 표본은
+    스케치에서 근사합니다 (순위 오차는 스케치 k에 따름).
+    """
+    categories = categories or {}
+    numeric = list(num_sketches)
+    p = len(numeric)
+    edges = np.full((bins + 1, p), np.nan)
+    counts = np.zeros((bins, p), dtype=np.int64)
+    valid = np.zeros((bins, p), dtype=bool)
+    n = np.array([num_sketches[col].n for col in numeric], dtype=np.int64)
+    sample = np.full((sample_size, p), np.nan)
+    sample_n = np.minimum(n, sample_size)
+    for j, col in enumerate(numeric):
+        sketch = num_sketches[col]
+        if not sketch.n:
+            continue
+        edges[:, j] = sketch_bin_edges(sketch, bins)
+        counts[:, j], valid[:, j] = sketch_bin_counts(sketch, edges[:, j])
+        sample[:sample_n[j], j] = sketch.quantile((np.arange(sample_n[j]) + 0.5) / sample_n[j])
+
+    tables = [(np.array(list(table), dtype=str), np.array(list(table.values()), dtype=np.int64))
+              for table in categories.values()]
+    profile = {
+        'version': np.int32(PROFILE_VERSION),
+        'bins': np.int32(bins),
+        'rows': np.int64(rows if rows is not None else (n.max() if p else 0)),
+        'num_features': np.array(numeric, dtype=str),
+        'num_edges': edges,
+        'num_counts': counts,
+        'num_valid': valid,
+        'num_n': n,
+        'num_sample': sample,
+        'num_sample_n': sample_n,
+        'cat_features': np.array(list(categories), dtype=str),
+        'cat_values': np.concatenate([t[0] for t in tables]) if tables else np.array([], dtype=str),
+        'cat_counts': np.concatenate([t[1] for t in tables]) if tables else np.array([], dtype=np.int64),
+        'cat_offsets': np.cumsum([0] + [len(t[0]) for t in tables]),
+    }
+
+    if pred_sketch is not None and pred_sketch.n:
+        hist_edges = np.linspace(pred_sketch.min, pred_sketch.max, PREDICTION_HIST_BINS + 1)
+        if hist_edges[0] == hist_edges[-1]:
+            hist_edges = hist_edges + np.linspace(-0.5, 0.5, PREDICTION_HIST_BINS + 1)
+        pred_n = min(pred_sketch.n, sample_size)
+        profile.update({
+            'pred_label': np.str_(pred_label),
+            'pred_hist_edges': hist_edges,
+            'pred_hist_counts': sketch_bin_counts(pred_sketch, hist_edges)[0],
+            'pred_sample': pred_sketch.quantile((np.arange(pred_n) + 0.5) / pred_n),
+            'pred_n': np.int64(pred_sketch.n),
+        })
+    return profile
+
+
+def build_reference_profile_sketch(data_path, model=None, target_column=None, bins=10,
+                                   sample_size=PROFILE_KS_SAMPLE, batch_size=STREAM_BATCH_ROWS,
+                                   k=DEFAULT_K):
+    """참조 데이터를 batch 단위로 읽어 KLL 스케치로 reference profile 생성
+
+    batch(파티션)마다 특성별 스케치를 만들고 누적 스케치에 병합하므로 참조
+    데이터 전체를 메모리에 올리지 않습니다.
+    """
+    num_sketches, categories = {}, {}
+    pred_sketch, pred_label = None, ''
+    rows = 0
+    for batch in iter_record_batches(data_path, batch_size):
+        X = batch.drop(columns=[target_column]) if target_column in batch.columns else batch
+        if not rows:
+            for col in X.columns:
+                if is_numeric_column(X[col]):
+                    num_sketches[col] = KLLSketch(k)
+                else:
+                    categories[col] = {}
+        for col, sketch in num_sketches.items():
+            if col in X.columns:
+                sketch.merge(KLLSketch(k).update(X[col].to_numpy(dtype=np.float64)))
+        for col, table in categories.items():
+            if col in X.columns:
+                for value, count in zip(*category_table(X[col])):
+                    table[value] = table.get(value, 0) + int(count)
+        if model is not None:
+            scores, pred_label = prediction_scores(model, X)
+            pred_sketch = (pred_sketch or KLLSketch(k)).merge(KLLSketch(k).update(scores))
+        rows += len(batch)
+        print(f"\r  {rows:,}건 처리", end='', flush=True)
+    print()
+    return profile_from_sketches(num_sketches, categories, pred_sketch, pred_label,
+                                 bins=bins, sample_size=sample_size, rows=rows)
+
+
 def main():
     parser = argparse.ArgumentParser(description='모델 모니터링 스크립트')
     parser.add_argument('--model-path', type=str, required=True,
                         help='학습된 모델 파일 경로 (.pkl)')
-    parser.add_argument('--reference-data', type=str, required=True,
+    parser.add_argument('--reference-data', type=str, default=None,
                         help='참조 데이터 경로 (학습 데이터)')
-    parser.add_argument('--current-data', type=str, required=True,
+    parser.add_argument('--reference-profile', type=str, default=None,
+                        help='참조 데이터 대신 사용할 reference profile 경로 (.npz)')
+    parser.add_argument('--save-profile', type=str, default=None,
+                        help='참조 데이터로 reference profile을 만들어 저장할 경로 (.npz)')
+    parser.add_argument('--current-data', type=str, default=None,
                         help='현재 데이터 경로 (프로덕션 데이터)')
     parser.add_argument('--target-column', type=str, default=None,
                         help='타겟 컬럼명')
@@ -417,11 +1198,57 @@ def main():
                         help='드리프트 알림 임계값 (PSI, 기본값: 0.1)')
     parser.add_argument('--output-dir', type=str, default=None,
                         help='출력 디렉토리')
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='KS 검정 병렬 프로세스 수 (기본값: CPU 수)')
+    parser.add_argument('--stream', action='store_true',
+                        help='현재 데이터를 batch 단위로 읽어 윈도우별로 모니터링 (전체 로드 없음)')
+    parser.add_argument('--time-column', type=str, default=None,
+                        help='스트리밍 윈도우 기준 시각 컬럼 (없으면 전체가 한 윈도우)')
+    parser.add_argument('--window', type=str, choices=list(WINDOW_FREQ), default='day',
+                        help='스트리밍 윈도우 크기 (기본값: day)')
+    parser.add_argument('--batch-size', type=int, default=STREAM_BATCH_ROWS,
+                        help=f'스트리밍 batch 행 수 (기본값: {STREAM_BATCH_ROWS})')
+    parser.add_argument('--sketch', action='store_true',
+                        help='참조 데이터를 batch 단위 KLL 스케치로 요약해 profile 생성 (전체 로드 없음, 근사)')
+    parser.add_argument('--sketch-k', type=int, default=DEFAULT_K,
+                        help=f'KLL 스케치 크기 k (클수록 정확, 기본값: {DEFAULT_K})')
 
     args = parser.parse_args()
+    if not args.reference_data and not args.reference_profile:
+        parser.error('--reference-data 또는 --reference-profile이 필요합니다')
+    if args.save_profile and not args.reference_data:
+        parser.error('--save-profile에는 --reference-data가 필요합니다')
+    if args.sketch and not args.reference_data:
+        parser.error('--sketch에는 --reference-data가 필요합니다')
+    if not args.current_data and not args.save_profile:
+        parser.error('--current-data가 필요합니다')
 
     print_header("모델 모니터링 시작")
 
+    # 모델 로드
+    model = load_model(args.model_path)
+    model_name = Path(args.model_path).stem
+
+    # 참조 데이터 로드 (reference profile이 있으면 참조 데이터는 읽지 않음)
+    X_ref, profile = None, None
+    if args.reference_data and args.sketch:
+        print_section("Reference profile 생성 (KLL 스케치)")
+        profile = build_reference_profile_sketch(args.reference_data, model, args.target_column,
+                                                 batch_size=args.batch_size, k=args.sketch_k)
+        if args.save_profile:
+            save_reference_profile(profile, args.save_profile)
+        if not args.current_data:
+            return 0
+    elif args.reference_data:
+        X_ref, y_ref, _ = load_data(args.reference_data, args.target_column)
+        if args.save_profile:
+            print_section("Reference profile 생성")
+            save_reference_profile(build_reference_profile(X_ref, model), args.save_profile)
+            if not args.current_data:
+                return 0
+    else:
+        profile = load_reference_profile(args.reference_profile)
+
     # 출력 디렉토리 설정
     if args.output_dir:
         output_dir = args.output_dir
@@ -437,14 +1264,6 @@ def main():
     os.makedirs(output_dir, exist_ok=True)
     print(f"✓ 출력 디렉토리: {output_dir}")
 
-    # 데이터 로드
-    X_ref, y_ref, _ = load_data(args.reference_data, args.target_column)
-    X_cur, y_cur, _ = load_data(args.current_data, args.target_column)
-
-    # 모델 로드
-    model = load_model(args.model_path)
-    model_name = Path(args.model_path).stem
-
     # 태스크 타입 추정
     if args.task_type == 'auto':
         if hasattr(model, 'predict_proba'):
@@ -455,18 +1274,37 @@ def main():
     else:
         task_type = args.task_type
 
-    # 드리프트 탐지
-    drift_df = detect_data_drift(X_ref, X_cur, output_dir, threshold=args.alert_threshold)
+    if args.stream:
+        # 스트리밍: 현재 데이터는 batch 단위로만 읽음
+        if profile is None:
+            print_section("Reference profile 생성")
+            profile = build_reference_profile(X_ref, model)
+        drift_df, metrics = monitor_stream(
+            args.current_data, model, profile, output_dir, task_type,
+            target_column=args.target_column, time_column=args.time_column, window=args.window,
+            batch_size=args.batch_size, threshold=args.alert_threshold,
+        )
+        print_section("데이터 드리프트 탐지 (전체 윈도우)")
+        report_drift(drift_df, output_dir, args.alert_threshold)
+        if not metrics:
+            print("\n⚠️  타겟 컬럼이 없어 성능 추적을 건너뜁니다.")
+    else:
+        # 현재 데이터 로드
+        X_cur, y_cur, _ = load_data(args.current_data, args.target_column)
 
-    # 예측 분포 비교
-    plot_prediction_distribution(model, X_ref, X_cur, output_dir)
+        # 드리프트 탐지
+        drift_df = detect_data_drift(X_ref, X_cur, output_dir, threshold=args.alert_threshold,
+                                     jobs=args.jobs, profile=profile)
 
-    # 성능 추적 (타겟이 있는 경우)
-    if y_cur is not None:
-        metrics = track_performance(model, X_cur, y_cur, output_dir, task_type)
-    else:
-        print("\n⚠️  타겟 컬럼이 없어 성능 추적을 건너뜁니다.")
-        metrics = {}
+        # 예측 분포 비교
+        plot_prediction_distribution(model, X_ref, X_cur, output_dir, profile=profile)
+
+        # 성능 추적 (타겟이 있는 경우)
+        if y_cur is not None:
+            metrics = track_performance(model, X_cur, y_cur, output_dir, task_type)
+        else:
+            print("\n⚠️  타겟 컬럼이 없어 성능 추적을 건너뜁니다.")
+            metrics = {}
 
     # 알림 생성
     alerts = generate_alerts(drift_df, metrics, output_dir, threshold=args.alert_threshold)
@@ -480,6 +1318,8 @@ def main():
     print(f"   - 리포트: {model_name}_monitoring_report.md")
     print(f"   - 드리프트: drift_report.csv")
     print(f"   - 알림: alerts.json")
+    if args.stream:
+        print(f"   - 윈도우: window_summary.csv, window_drift.csv")
 
     return 0
 
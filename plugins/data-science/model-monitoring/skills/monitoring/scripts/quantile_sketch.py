@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+병합 가능한 분위수 스케치 (KLL)
+
+파티션/작업자별로 만든 스케치를 순서와 관계없이 병합하고, 병합된 스케치에서
+PSI bin 경계와 근사 KS 통계량을 계산합니다. 순위 오차는 k에 반비례합니다
+(기본값 k=512에서 약 0.5% 이하).
+
+사용법:
+    from quantile_sketch import KLLSketch, sketch_psi, sketch_ks
+
+    parts = [KLLSketch().update(chunk) for chunk in partitions]
+    reference = KLLSketch.merge_all(parts)
+    psi = sketch_psi(reference, KLLSketch().update(current))
+
+필요 패키지:
+    - numpy
+"""
+
+import numpy as np
+
+DEFAULT_K = 512
+# 레벨이 하나 내려갈 때마다 용량 감소 비율
+CAPACITY_DECAY = 2 / 3
+
+
+class KLLSketch:
+    """KLL 분위수 스케치
+
+    레벨 h의 항목은 가중치 2^h를 가집니다. 레벨이 용량을 넘으면 정렬 후
+    홀수/짝수 위치 중 하나를 무작위로 골라 다음 레벨로 올립니다 (compaction).
+    가중치 합은 항상 입력 건수 n과 같고, min/max는 정확히 유지합니다.
+    """
+
+    def __init__(self, k=DEFAULT_K, seed=None):
+        self.k = k
+        self.n = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+        self._sorted = None
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(int(np.ceil(self.k * CAPACITY_DECAY ** depth)), 2)
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # 홀수 개면 가장 큰 값 하나는 현재 레벨에 남김
+                keep = items[len(items) - len(items) % 2:]
+                pairs = items[:len(items) - len(keep)]
+                promoted = pairs[self._rng.integers(2)::2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+        self._sorted = None
+
+    def update(self, values):
+        """값 배열 추가 (NaN 제외)"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return self
+        self.n += len(values)
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """다른 스케치를 병합 (결합법칙·교환법칙: 병합 순서와 관계없이 같은 오차 한계)"""
+        if other.k != self.k:
+            raise ValueError(f"k가 다른 스케치는 병합할 수 없습니다: {self.k} != {other.k}")
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    @classmethod
+    def merge_all(cls, sketches, k=DEFAULT_K, seed=None):
+        """여러 스케치를 하나로 병합 (입력 스케치는 변경하지 않음)"""
+        sketches = list(sketches)
+        merged = cls(sketches[0].k if sketches else k, seed=seed)
+        for sketch in sketches:
+            merged.merge(sketch)
+        return merged
+
+    def _weighted(self):
+        """(정렬된 항목, 누적 가중치)"""
+        if self._sorted is None:
+            items = np.concatenate(self.levels)
+            weights = np.concatenate([np.full(len(lv), 2 ** h, dtype=np.int64)
+                                      for h, lv in enumerate(self.levels)])
+            order = np.argsort(items, kind='stable')
+            self._sorted = (items[order], np.cumsum(weights[order]))
+        return self._sorted
+
+    def rank(self, x, inclusive=True):
+        """x 이하(inclusive=False면 미만) 값의 근사 건수"""
+        items, cumulative = self._weighted()
+        idx = np.searchsorted(items, x, 'right' if inclusive else 'left')
+        return np.where(idx > 0, cumulative[np.maximum(idx - 1, 0)], 0)
+
+    def cdf(self, x):
+        """근사 누적분포 F(x) = P(X <= x)"""
+        return self.rank(x) / self.n
+
+    def quantile(self, q):
+        """근사 분위수 (inverted CDF: 누적 비율이 q 이상인 가장 작은 값)"""
+        q = np.asarray(q, dtype=np.float64)
+        items, cumulative = self._weighted()
+        idx = np.searchsorted(cumulative, q * self.n, 'left')
+        values = items[np.minimum(idx, len(items) - 1)]
+        values = np.where(q <= 0, self.min, values)
+        return np.where(q >= 1, self.max, values)
+
+    def __len__(self):
+        return sum(len(items) for items in self.levels)
+
+    def to_state(self):
+        """직렬화용 상태 (NPZ/pickle로 작업자 간 전달)"""
+        return {
+            'k': np.int64(self.k),
+            'n': np.int64(self.n),
+            'min': np.float64(self.min),
+            'max': np.float64(self.max),
+            'items': np.concatenate(self.levels),
+            'sizes': np.array([len(items) for items in self.levels], dtype=np.int64),
+        }
+
+    @classmethod
+    def from_state(cls, state, seed=None):
+        """to_state() 결과로 스케치 복원"""
+        sketch = cls(int(state['k']), seed=seed)
+        sketch.n = int(state['n'])
+        sketch.min = float(state['min'])
+        sketch.max = float(state['max'])
+        bounds = np.cumsum(np.concatenate([[0], state['sizes']]))
+        sketch.levels = [np.asarray(state['items'][a:b], dtype=np.float64)
+                         for a, b in zip(bounds[:-1], bounds[1:])]
+        return sketch
+
+
+def sketch_bin_edges(sketch, bins=10):
+    """PSI bin 경계 (bins + 1): 병합된 스케치의 등분위수"""
+    return sketch.quantile(np.linspace(0, 1, bins + 1))
+
+
+def sketch_bin_counts(sketch, edges):
+    """경계별 근사 도수와 유효 bin 마스크
+
+    np.histogram(x, np.unique(edges))와 같은 규칙: 마지막 유효 bin은 오른쪽
+    포함, 범위 밖 값은 제외, 중복 경계로 생긴 폭 0 bin은 도수 0.
+    """
+    edges = np.asarray(edges, dtype=np.float64)
+    below = sketch.rank(edges, inclusive=False)
+    upper = np.where(edges[1:] == edges[-1], sketch.rank(edges[-1]), below[1:])
+    valid = edges[1:] > edges[:-1]
+    return np.where(valid, upper - below[:-1], 0), valid
+
+
+def sketch_psi(reference, current, bins=10):
+    """두 스케치의 근사 PSI (calculate_psi와 같은 경계 규칙과 평활화)"""
+    edges = sketch_bin_edges(reference, bins)
+    ref_counts, valid = sketch_bin_counts(reference, edges)
+    cur_counts, _ = sketch_bin_counts(current, edges)
+    ref_percents = (ref_counts + 1) / (reference.n + bins)
+    cur_percents = (cur_counts + 1) / (current.n + bins)
+    terms = (cur_percents - ref_percents) * np.log(cur_percents / ref_percents)
+    return float(np.where(valid, terms, 0.0).sum())
+
+
+def sketch_ks(reference, current):
+    """두 스케치의 근사 KS 통계량 (두 스케치 항목 전체에서 CDF 차이의 최댓값)"""
+    points = np.concatenate([reference._weighted()[0], current._weighted()[0]])
+    return float(np.abs(reference.cdf(points) - current.cdf(points)).max())
@@ -0,0 +1,173 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from quantile_sketch import KLLSketch, sketch_bin_counts, sketch_bin_edges, sketch_ks, sketch_psi
+from monitor_performance import (
+    build_reference_profile,
+    calculate_ks_statistic,
+    calculate_psi,
+    profile_from_sketches,
+)
+
+
+def partition_sketch(values, partitions=16, k=512):
+    """Build one sketch per partition and merge them, as distributed workers would"""
+    parts = [KLLSketch(k, seed=i).update(chunk)
+             for i, chunk in enumerate(np.array_split(values, partitions))]
+    return KLLSketch.merge_all(parts, seed=0)
+
+
+# Accuracy checks against the exact implementation; run manually from this directory.
+class TestKLLSketch(unittest.TestCase):
+
+    def max_rank_error(self, sketch, values):
+        values = np.sort(values)
+        q = np.linspace(0.001, 0.999, 999)
+        estimates = sketch.quantile(q)
+        ranks = np.searchsorted(values, estimates, 'right') / len(values)
+        return np.abs(ranks - q).max()
+
+    def test_small_input_is_exact(self):
+        """Below capacity the sketch keeps every value"""
+        values = np.random.default_rng(0).normal(size=300)
+        sketch = KLLSketch(512).update(values)
+        q = np.linspace(0, 1, 21)
+        np.testing.assert_array_equal(sketch.quantile(q),
+                                      np.quantile(values, q, method='inverted_cdf'))
+        self.assertEqual(len(sketch), 300)
+
+    def test_merged_rank_error(self):
+        """Merged partition sketches stay within 1% rank error and bounded size"""
+        values = np.random.default_rng(1).lognormal(size=200_000)
+        sketch = partition_sketch(values)
+        self.assertEqual(sketch.n, len(values))
+        self.assertEqual(sketch.min, values.min())
+        self.assertEqual(sketch.max, values.max())
+        self.assertLess(self.max_rank_error(sketch, values), 0.01)
+        self.assertLess(len(sketch), 3 * 512)
+
+    def test_merge_order_independent(self):
+        """Any merge order gives the same totals and quantiles within the error bound"""
+        values = np.random.default_rng(2).normal(size=100_000)
+        parts = [KLLSketch(256, seed=i).update(chunk)
+                 for i, chunk in enumerate(np.array_split(values, 8))]
+        forward = KLLSketch.merge_all(parts, seed=0)
+        backward = KLLSketch.merge_all(parts[::-1], seed=0)
+        tree = KLLSketch.merge_all([KLLSketch.merge_all(parts[:4], seed=1),
+                                    KLLSketch.merge_all(parts[4:], seed=2)], seed=3)
+        q = np.linspace(0.01, 0.99, 99)
+        for other in (backward, tree):
+            self.assertEqual(other.n, forward.n)
+            self.assertEqual(other.min, forward.min)
+            self.assertEqual(other.max, forward.max)
+            points = forward.quantile(q)
+            self.assertLess(np.abs(other.cdf(points) - forward.cdf(points)).max(), 0.02)
+
+    def test_merge_all_keeps_inputs(self):
+        values = np.arange(10_000, dtype=float)
+        parts = [KLLSketch(64, seed=i).update(chunk) for i, chunk in enumerate(np.array_split(values, 4))]
+        before = [(p.n, len(p)) for p in parts]
+        KLLSketch.merge_all(parts)
+        self.assertEqual([(p.n, len(p)) for p in parts], before)
+
+    def test_merge_rejects_different_k(self):
+        with self.assertRaises(ValueError):
+            KLLSketch(128).merge(KLLSketch(256))
+
+    def test_state_roundtrip(self):
+        sketch = KLLSketch(128, seed=0).update(np.random.default_rng(3).normal(size=50_000))
+        restored = KLLSketch.from_state(sketch.to_state())
+        q = np.linspace(0, 1, 11)
+        np.testing.assert_array_equal(restored.quantile(q), sketch.quantile(q))
+        self.assertEqual(restored.n, sketch.n)
+
+    def test_nan_ignored(self):
+        sketch = KLLSketch().update([1.0, np.nan, 3.0, 2.0])
+        self.assertEqual(sketch.n, 3)
+        np.testing.assert_array_equal(sketch.quantile([0, 0.5, 1]), [1.0, 2.0, 3.0])
+
+
+class TestSketchDrift(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(4)
+        self.reference = rng.normal(size=400_000)
+        self.current = rng.normal(0.1, 1.05, size=100_000)
+        self.ref_sketch = partition_sketch(self.reference)
+        self.cur_sketch = partition_sketch(self.current, partitions=4)
+
+    def test_bin_counts_sum_to_n(self):
+        edges = sketch_bin_edges(self.ref_sketch, 10)
+        counts, valid = sketch_bin_counts(self.ref_sketch, edges)
+        self.assertTrue(valid.all())
+        self.assertEqual(counts.sum(), self.ref_sketch.n)
+        # Each decile holds about 10% of the reference rows
+        self.assertLess(np.abs(counts / self.ref_sketch.n - 0.1).max(), 0.01)
+
+    def test_psi_matches_exact(self):
+        exact = calculate_psi(self.reference, self.current)
+        approx = sketch_psi(self.ref_sketch, self.cur_sketch)
+        self.assertAlmostEqual(approx, exact, delta=0.01)
+
+    def test_psi_same_decision_on_strong_shift(self):
+        shifted = self.current + 0.8
+        exact = calculate_psi(self.reference, shifted)
+        approx = sketch_psi(self.ref_sketch, KLLSketch(512, seed=0).update(shifted))
+        self.assertGreater(exact, 0.2)
+        self.assertGreater(approx, 0.2)
+        self.assertAlmostEqual(approx, exact, delta=0.05 * exact)
+
+    def test_ks_matches_exact(self):
+        exact, _ = calculate_ks_statistic(self.reference, self.current)
+        approx = sketch_ks(self.ref_sketch, self.cur_sketch)
+        self.assertAlmostEqual(approx, exact, delta=0.01)
+
+    def test_discrete_values_duplicate_edges(self):
+        """Repeated quantiles collapse into zero-width bins like np.unique edges"""
+        rng = np.random.default_rng(5)
+        reference = rng.integers(0, 4, size=50_000).astype(float)
+        current = rng.integers(0, 5, size=20_000).astype(float)
+        sketch = KLLSketch(512, seed=0).update(reference)
+        edges = sketch_bin_edges(sketch, 10)
+        counts, valid = sketch_bin_counts(sketch, edges)
+        self.assertLess(valid.sum(), 10)
+        self.assertEqual(counts[~valid].sum(), 0)
+        exact_counts, _ = np.histogram(reference, np.unique(edges))
+        np.testing.assert_allclose(counts[valid], exact_counts, atol=0.01 * len(reference))
+        self.assertAlmostEqual(sketch_psi(sketch, KLLSketch(512, seed=1).update(current)),
+                               calculate_psi(reference, current), delta=0.02)
+
+
+class TestSketchProfile(unittest.TestCase):
+
+    def test_profile_matches_exact_profile(self):
+        """A profile built from merged sketches has the same layout as the exact one"""
+        rng = np.random.default_rng(6)
+        X = pd.DataFrame({'a': rng.normal(size=100_000),
+                          'b': rng.exponential(size=100_000),
+                          'c': rng.choice(['x', 'y', 'z'], size=100_000)})
+        exact = build_reference_profile(X)
+        sketches = {col: KLLSketch(512, seed=0) for col in ('a', 'b')}
+        for chunk in np.array_split(np.arange(len(X)), 8):
+            for col, sketch in sketches.items():
+                sketch.merge(KLLSketch(512).update(X[col].to_numpy()[chunk]))
+        categories = {'c': X['c'].value_counts().to_dict()}
+        approx = profile_from_sketches(sketches, categories, rows=len(X))
+
+        for key in ('num_edges', 'num_counts', 'num_valid', 'num_n', 'num_sample', 'num_sample_n'):
+            self.assertEqual(approx[key].shape, exact[key].shape, key)
+        np.testing.assert_array_equal(approx['num_n'], exact['num_n'])
+        np.testing.assert_array_equal(approx['num_counts'].sum(axis=0), exact['num_counts'].sum(axis=0))
+        np.testing.assert_allclose(approx['num_counts'], exact['num_counts'], atol=0.01 * len(X))
+        for j in range(2):
+            ks = stats.ks_2samp(approx['num_sample'][:, j], exact['num_sample'][:, j]).statistic
+            self.assertLess(ks, 0.02)
+        np.testing.assert_array_equal(approx['cat_features'], exact['cat_features'])
+        self.assertEqual(approx['cat_counts'].sum(), exact['cat_counts'].sum())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,11 +10,17 @@ Subcommands:
   analyze       - Transcribe and analyze video for edit opportunities
   execute       - Execute an edit plan to produce edited video
   tts-prepare   - Prepare TTS segments from whisper data and edit plan
+  subtitles     - Write SRT/VTT subtitles for the edited video
   tts-generate  - Generate TTS audio and create video with new narration
   trim-silence  - Trim silence with dynamic or fixed caps
+  batch         - Analyze and execute many recordings
+  trace-summary - Aggregate stage timings from --trace files
+  benchmark     - Micro-benchmark hot paths on synthetic data
 """
 
 import argparse
+import contextlib
+import functools
 import json
 import os
 import subprocess
@@ -25,6 +31,156 @@ import wave
 from pathlib import Path
 
 
+# ──────────────────────────────────────────────
+# Stage Profiler
+# ──────────────────────────────────────────────
+
+class StageProfiler:
+    """Per-stage wall time, CPU time, block I/O and subprocess launches.
+
+    Each stage becomes a Chrome trace-event "X" (complete) event whose args
+    hold the deltas: cpu_s (this process, all threads), child_cpu_s (reaped
+    ffmpeg/worker processes), read_bytes/write_bytes (block I/O of this
+    process and its children; page-cache hits are not counted) and
+    subprocesses (Popen calls, counted through an audit hook).
+    """
+
+    def __init__(self):
+        import threading
+
+        self.events = []
+        self.subprocesses = 0
+        self.lock = threading.Lock()
+        self.origin_wall = time.time()
+        self.origin = time.perf_counter()
+        sys.addaudithook(self._audit)
+
+    def _audit(self, event, _args):
+        if event == "subprocess.Popen":
+            with self.lock:
+                self.subprocesses += 1
+
+    def snapshot(self):
+        snap = {
+            "wall": time.perf_counter(),
+            "cpu_s": time.process_time(),
+            "subprocesses": self.subprocesses,
+        }
+        try:
+            import resource
+        except ImportError:  # Windows
+            return snap
+        own = resource.getrusage(resource.RUSAGE_SELF)
+        kids = resource.getrusage(resource.RUSAGE_CHILDREN)
+        snap["child_cpu_s"] = kids.ru_utime + kids.ru_stime
+        snap["read_bytes"] = (own.ru_inblock + kids.ru_inblock) * 512
+        snap["write_bytes"] = (own.ru_oublock + kids.ru_oublock) * 512
+        return snap
+
+    @contextlib.contextmanager
+    def stage(self, name, cat="stage"):
+        import threading
+
+        start = self.snapshot()
+        try:
+            yield
+        finally:
+            end = self.snapshot()
+            args = {}
+            for k in start:
+                if k != "wall":
+                    delta = end[k] - start[k]
+                    args[k] = round(delta, 4) if isinstance(delta, float) else delta
+            event = {
+                "name": name, "cat": cat, "ph": "X",
+                "ts": round((self.origin_wall + start["wall"] - self.origin) * 1e6),
+                "dur": round((end["wall"] - start["wall"]) * 1e6),
+                "pid": os.getpid(), "tid": threading.get_native_id(),
+                "args": args,
+            }
+            with self.lock:
+                self.events.append(event)
+
+    def write(self, path, label=None):
+        """Write a Chrome trace (chrome://tracing, Perfetto)."""
+        meta = [{
+            "name": "process_name", "ph": "M", "pid": os.getpid(),
+            "args": {"name": label or " ".join(sys.argv[1:3])},
+        }]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": meta + self.events, "displayTimeUnit": "ms"}, f, indent=1)
+
+
+_PROFILER = None
+
+
+def enable_profiler(trace_path, label=None):
+    """Start recording stages; the trace is written when the process exits."""
+    global _PROFILER
+    import atexit
+
+    _PROFILER = StageProfiler()
+    atexit.register(lambda: _PROFILER.write(trace_path, label))
+    return _PROFILER
+
+
+def stage(name, cat="stage"):
+    """Context manager timing one pipeline stage (no-op unless profiling)."""
+    if _PROFILER is None:
+        return contextlib.nullcontext()
+    return _PROFILER.stage(name, cat)
+
+
+def profiled(name):
+    """Decorator form of stage()."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+TRACE_FIELDS = ("cpu_s", "child_cpu_s", "read_bytes", "write_bytes", "subprocesses")
+
+
+def summarize_traces(paths):
+    """Aggregate stage events from trace files: totals per stage name.
+
+    Returns (stages, total_wall_s) where total is the sum of the per-run
+    command events, and stages maps name → count/wall_s/TRACE_FIELDS sums.
+    """
+    stages = {}
+    total = 0.0
+    for path in paths:
+        with open(path) as f:
+            events = json.load(f).get("traceEvents", [])
+        for e in events:
+            if e.get("ph") != "X":
+                continue
+            if e.get("cat") == "command":
+                total += e["dur"] / 1e6
+            row = stages.setdefault(e["name"], dict({"count": 0, "wall_s": 0.0},
+                                                    **{k: 0 for k in TRACE_FIELDS}))
+            row["count"] += 1
+            row["wall_s"] += e["dur"] / 1e6
+            for k in TRACE_FIELDS:
+                row[k] += e.get("args", {}).get(k, 0)
+    return stages, total
+
+
+def print_trace_summary(stages, total):
+    print(f"  {'Stage':<18s} {'N':>4s} {'Wall':>9s} {'%':>6s} {'CPU':>8s} {'Child':>8s} "
+          f"{'Read':>8s} {'Write':>8s} {'Procs':>6s}")
+    for name, row in sorted(stages.items(), key=lambda kv: -kv[1]["wall_s"]):
+        pct = row["wall_s"] / total * 100 if total else 0.0
+        print(f"  {name:<18s} {row['count']:4d} {row['wall_s']:8.1f}s {pct:5.1f}% "
+              f"{row['cpu_s']:7.1f}s {row['child_cpu_s']:7.1f}s "
+              f"{row['read_bytes'] / 1e6:6.0f}MB {row['write_bytes'] / 1e6:6.0f}MB "
+              f"{row['subprocesses']:6d}")
+
+
 # ──────────────────────────────────────────────
 # Utilities
 # ──────────────────────────────────────────────
@@ -35,8 +191,48 @@ def fmt_time(seconds):
     return f"{int(m)}:{s:05.2f}"
 
 
+# Probe results keyed by kind|path|mtime|size; optionally persisted as JSON
+_PROBE_CACHE = {}
+_PROBE_CACHE_PATH = None
+
+
+def _probe_key(filepath, kind):
+    st = os.stat(filepath)
+    return f"{kind}|{os.path.abspath(filepath)}|{st.st_mtime_ns}|{st.st_size}"
+
+
+def enable_probe_cache(cache_path):
+    """Load a persisted probe cache and save it back when the process exits."""
+    global _PROBE_CACHE_PATH
+    import atexit
+
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path) as f:
+                _PROBE_CACHE.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+    if _PROBE_CACHE_PATH is None:
+        atexit.register(save_probe_cache)
+    _PROBE_CACHE_PATH = cache_path
+
+
+def save_probe_cache():
+    """Write the probe cache to its persisted location, if enabled."""
+    if not _PROBE_CACHE_PATH:
+        return
+    try:
+        with open(_PROBE_CACHE_PATH, "w") as f:
+            json.dump(_PROBE_CACHE, f)
+    except OSError:
+        pass
+
+
 def get_duration(filepath):
-    """Get media duration in seconds via ffprobe."""
+    """Get media duration in seconds via ffprobe (cached)."""
+    key = _probe_key(filepath, "duration")
+    if key in _PROBE_CACHE:
+        return _PROBE_CACHE[key]
     cmd = [
         "ffprobe", "-v", "quiet",
         "-show_format", "-print_format", "json",
@@ -45,11 +241,67 @@ def get_duration(filepath):
     result = subprocess.run(cmd, capture_output=True, text=True)
     if result.returncode != 0:
         raise RuntimeError(f"ffprobe failed: {result.stderr}")
-    return float(json.loads(result.stdout)["format"]["duration"])
+    duration = float(json.loads(result.stdout)["format"]["duration"])
+    _PROBE_CACHE[key] = duration
+    return duration
+
+
+@profiled("probe")
+def probe_durations(paths, batch=200):
+    """Durations for many files, probing cache misses in batched ffmpeg calls.
+
+    One `ffmpeg -i a -i b ...` run reports the container duration of every
+    input, so N files cost N/batch processes instead of N ffprobe calls.
+    Files the batch cannot report fall back to get_duration.
+    ffmpeg prints durations to 10ms, so they are cached as "duration_approx"
+    and never replace exact ffprobe durations; get_duration re-probes them.
+    Returns a list of durations in input order.
+    """
+    import re
+
+    durations = {}
+    misses = []
+    for p in paths:
+        for kind in ("duration", "duration_approx"):
+            key = _probe_key(p, kind)
+            if key in _PROBE_CACHE:
+                durations[p] = _PROBE_CACHE[key]
+                break
+        else:
+            misses.append(p)
+
+    input_re = re.compile(r"^Input #(\d+),")
+    duration_re = re.compile(r"^\s+Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
+    for start in range(0, len(misses), batch):
+        chunk = misses[start:start + batch]
+        cmd = ["ffmpeg", "-hide_banner"]
+        for p in chunk:
+            cmd += ["-i", p]
+        # No output file: ffmpeg exits non-zero after printing input info
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        current = None
+        for line in result.stderr.splitlines():
+            m = input_re.match(line)
+            if m:
+                current = int(m.group(1))
+                continue
+            m = duration_re.match(line)
+            if m and current is not None and current < len(chunk):
+                h, mnt, sec = m.groups()
+                p = chunk[current]
+                durations[p] = int(h) * 3600 + int(mnt) * 60 + float(sec)
+                _PROBE_CACHE[_probe_key(p, "duration_approx")] = durations[p]
+                current = None
+
+    return [durations[p] if p in durations else get_duration(p) for p in paths]
 
 
 def get_media_info(filepath):
-    """Get video/audio stream info."""
+    """Get video/audio stream info (cached)."""
+    key = _probe_key(filepath, "info")
+    # Entries persisted before sample_rate/channels were recorded are re-probed
+    if key in _PROBE_CACHE and "channels" in _PROBE_CACHE[key]:
+        return dict(_PROBE_CACHE[key])
     cmd = [
         "ffprobe", "-v", "quiet",
         "-show_format", "-show_streams", "-print_format", "json",
@@ -62,18 +314,31 @@ def get_media_info(filepath):
     info = {
         "duration": float(data["format"]["duration"]),
         "size_mb": int(data["format"]["size"]) / 1024 / 1024,
+        "sample_rate": None,
+        "channels": None,
     }
     for s in data["streams"]:
         if s["codec_type"] == "video":
             info["video"] = f"{s['codec_name']} {s['width']}x{s['height']}"
+            info["video_codec"] = s["codec_name"]
+            info["pix_fmt"] = s.get("pix_fmt")
             info["has_video"] = True
         elif s["codec_type"] == "audio":
             info["audio"] = f"{s['codec_name']} {s.get('sample_rate', '?')}Hz"
+            info["has_audio"] = True
+            if info["channels"] is None:
+                info["sample_rate"] = int(s["sample_rate"]) if s.get("sample_rate") else None
+                info["channels"] = s.get("channels")
     if "has_video" not in info:
         info["has_video"] = False
-    return info
+    if "has_audio" not in info:
+        info["has_audio"] = False
+    _PROBE_CACHE[key] = info
+    _PROBE_CACHE[_probe_key(filepath, "duration")] = info["duration"]
+    return dict(info)
 
 
+@profiled("extract_audio")
 def extract_audio(input_path, output_path):
     """Extract audio from video as WAV for Whisper."""
     cmd = [
@@ -88,6 +353,105 @@ def extract_audio(input_path, output_path):
         raise RuntimeError(f"Audio extraction failed: {result.stderr[-300:]}")
 
 
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "video-editor")
+
+
+@profiled("pcm_digest")
+def pcm_digest(wav_path, chunk_frames=1 << 20):
+    """SHA-256 of a WAV file's PCM frames (header and metadata excluded)."""
+    import hashlib
+
+    h = hashlib.sha256()
+    with wave.open(wav_path, "rb") as wf:
+        h.update(f"{wf.getframerate()}:{wf.getnchannels()}:{wf.getsampwidth()}".encode())
+        while True:
+            data = wf.readframes(chunk_frames)
+            if not data:
+                break
+            h.update(data)
+    return h.hexdigest()
+
+
+def file_fingerprint(path, sample=1 << 20):
+    """SHA-256 over the file size and mtime plus its first and last `sample` bytes.
+
+    A cheap content id for multi-GB media: it survives renames, and any
+    re-encode, trim or in-place edit (which bumps the mtime) changes it.
+    """
+    import hashlib
+
+    st = os.stat(path)
+    size = st.st_size
+    h = hashlib.sha256(f"{size}:{st.st_mtime_ns}".encode())
+    with open(path, "rb") as f:
+        h.update(f.read(sample))
+        if size > sample:
+            f.seek(max(sample, size - sample))
+            h.update(f.read(sample))
+    return h.hexdigest()
+
+
+DEFAULT_SEGMENT_CACHE_GB = 20.0
+
+
+class SegmentCache:
+    """Content-addressed store of rendered segments under <cache_dir>/segments.
+
+    Keys hash the source fingerprint together with the segment range and
+    every setting that affects the rendered bytes, so editing one range of
+    the plan only misses for the pieces that range produces. Entries are
+    touched on use and prune() evicts the least recently used ones once
+    the directory grows past max_bytes.
+    """
+
+    def __init__(self, cache_dir, source_path, max_bytes=None):
+        self.dir = os.path.join(cache_dir, "segments")
+        os.makedirs(self.dir, exist_ok=True)
+        self.source = file_fingerprint(source_path)
+        self.max_bytes = max_bytes
+        self.used = set()
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, params, ext):
+        import hashlib
+
+        key = hashlib.sha256(json.dumps([self.source, params]).encode()).hexdigest()
+        return os.path.join(self.dir, key + ext)
+
+    def touch(self, path):
+        """Mark an entry as used by this run (and most recently used)."""
+        os.utime(path)
+        self.used.add(path)
+
+    def prune(self):
+        """Delete least recently used entries until the cache fits max_bytes.
+
+        Entries used by this run and in-progress .partial files are kept.
+        Returns (files removed, bytes freed).
+        """
+        if self.max_bytes is None:
+            return 0, 0
+        entries = []
+        for entry in os.scandir(self.dir):
+            if entry.is_file() and ".partial" not in entry.name:
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        removed = freed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path in self.used:
+                continue
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+            total -= size
+            removed += 1
+            freed += size
+        return removed, freed
+
+
 # ──────────────────────────────────────────────
 # Korean Text Analysis (for dynamic silence caps)
 # ──────────────────────────────────────────────
@@ -113,9 +477,49 @@ CONTINUE_PARTICLES = (
 )
 
 
-def classify_ending(text, cap_sentence=0.5, cap_comma=0.3, cap_continue=0.15):
+# Category precedence when several suffixes match (comma > sentence > continuing)
+ENDING_CATEGORIES = ("comma", "ending", "continuing")
+
+
+def build_ending_trie(sentence=SENTENCE_ENDINGS, comma=COMMA_CONNECTORS, continuing=CONTINUE_PARTICLES):
+    """Reversed-suffix trie: nested dicts keyed by characters from the end.
+
+    A node's None key holds the best (lowest) category rank ending there.
+    """
+    trie = {}
+    for rank, suffixes in enumerate((comma, sentence, continuing)):
+        for suffix in suffixes:
+            node = trie
+            for ch in reversed(suffix):
+                node = node.setdefault(ch, {})
+            node[None] = min(node.get(None, rank), rank)
+    return trie
+
+
+def load_ending_trie(path):
+    """Build a trie from the built-in lists plus a user dictionary JSON.
+
+    The JSON may contain "sentence", "comma" and "continue" arrays; their
+    entries are added to the built-in suffixes.
+    """
+    with open(path, encoding="utf-8") as f:
+        extra = json.load(f)
+    return build_ending_trie(
+        sentence=SENTENCE_ENDINGS + tuple(extra.get("sentence", [])),
+        comma=COMMA_CONNECTORS + tuple(extra.get("comma", [])),
+        continuing=CONTINUE_PARTICLES + tuple(extra.get("continue", [])),
+    )
+
+
+ENDING_TRIE = build_ending_trie()
+
+
+def classify_ending(text, cap_sentence=0.5, cap_comma=0.3, cap_continue=0.15, trie=None):
     """Classify Korean text ending to determine appropriate silence cap.
 
+    One walk of the reversed-suffix trie (ENDING_TRIE unless a trie from
+    load_ending_trie is given) replaces per-suffix endswith checks.
+
     Returns (cap_seconds, reason_string).
     """
     text = text.strip()
@@ -125,19 +529,26 @@ def classify_ending(text, cap_sentence=0.5, cap_comma=0.3, cap_continue=0.15):
     if text[-1] in '.!?':
         return cap_sentence, "punctuation"
 
-    for conn in COMMA_CONNECTORS:
-        if text.endswith(conn):
-            return cap_comma, "comma"
-
-    for suffix in SENTENCE_ENDINGS:
-        if text.endswith(suffix):
-            return cap_sentence, "ending"
-
-    for particle in CONTINUE_PARTICLES:
-        if text.endswith(particle):
-            return cap_continue, "continuing"
+    node = ENDING_TRIE if trie is None else trie
+    best = None
+    for ch in reversed(text):
+        node = node.get(ch)
+        if node is None:
+            break
+        rank = node.get(None)
+        if rank is not None and (best is None or rank < best):
+            best = rank
+            if best == 0:
+                break
 
-    return cap_continue, "other"
+    if best is None:
+        return cap_continue, "other"
+    reason = ENDING_CATEGORIES[best]
+    if reason == "comma":
+        return cap_comma, reason
+    if reason == "ending":
+        return cap_sentence, reason
+    return cap_continue, reason
 
 
 def original_to_edited(original_time, edit_plan):
@@ -159,6 +570,104 @@ def original_to_edited(original_time, edit_plan):
     return round(original_time - removed, 2)
 
 
+class EditPlan:
+    """Edit plan with precomputed cumulative removed time for fast remapping.
+
+    original_to_edited walks the whole plan per query; EditPlan answers the
+    same question by binary search over the REMOVE ranges (O(log n)), and
+    maps whole arrays of timestamps at once with NumPy. A time exactly on a
+    cut belongs to the KEEP range that ends there, as in original_to_edited.
+    """
+
+    EPS = 1e-9  # tolerance when matching edited times against cut points
+
+    def __init__(self, edit_plan):
+        import itertools
+
+        entries = sorted(edit_plan, key=lambda e: e["start"])
+        self.entries = entries
+        self.keep_ends = {e["end"] for e in entries if e["action"] == "KEEP"}
+        self.starts = []
+        self.ends = []
+        self.cum_removed = [0.0]  # removed time before REMOVE range k
+        for e in entries:
+            if e["action"] == "REMOVE":
+                self.starts.append(e["start"])
+                self.ends.append(e["end"])
+                self.cum_removed.append(self.cum_removed[-1] + e["end"] - e["start"])
+        # Edited-timeline position of each cut (running max absorbs float
+        # drift so back-to-back REMOVE ranges share one cut point)
+        self.cuts = list(itertools.accumulate(
+            (s - c for s, c in zip(self.starts, self.cum_removed)), max))
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls(json.load(f))
+
+    @property
+    def removed_total(self):
+        return self.cum_removed[-1]
+
+    def to_edited(self, original_time, ndigits=2):
+        """Original → edited timestamp, or None inside a REMOVE range."""
+        import bisect
+
+        k = bisect.bisect_right(self.starts, original_time)
+        if k and original_time < self.ends[k - 1]:
+            if original_time != self.starts[k - 1] or original_time not in self.keep_ends:
+                return None
+            k -= 1
+        edited = original_time - self.cum_removed[k]
+        return round(edited, ndigits) if ndigits is not None else edited
+
+    def to_original(self, edited_time, ndigits=2):
+        """Edited → original timestamp (a cut maps to the end of the KEEP before it)."""
+        import bisect
+
+        k = bisect.bisect_left(self.cuts, edited_time - self.EPS)
+        if (k < len(self.cuts) and self.cuts[k] <= edited_time + self.EPS
+                and self.starts[k] not in self.keep_ends):
+            k = bisect.bisect_right(self.cuts, edited_time + self.EPS)  # no KEEP before the cut
+        original = edited_time + self.cum_removed[k]
+        return round(original, ndigits) if ndigits is not None else original
+
+    def to_edited_array(self, original_times, ndigits=2):
+        """Vectorized to_edited: float array with NaN for removed timestamps."""
+        import numpy as np
+
+        t = np.asarray(original_times, dtype=np.float64)
+        starts = np.asarray(self.starts, dtype=np.float64)
+        ends = np.asarray(self.ends, dtype=np.float64)
+        cum = np.asarray(self.cum_removed, dtype=np.float64)
+        if not len(starts):
+            edited = t.copy()
+        else:
+            k = np.searchsorted(starts, t, side="right")
+            prev = np.maximum(k - 1, 0)
+            inside = (k > 0) & (t < ends[prev])
+            on_keep_end = inside & (t == starts[prev]) & np.isin(t, list(self.keep_ends))
+            k = k - on_keep_end
+            edited = t - cum[k]
+            edited[inside & ~on_keep_end] = np.nan
+        return np.round(edited, ndigits) if ndigits is not None else edited
+
+    def to_original_array(self, edited_times, ndigits=2):
+        """Vectorized to_original."""
+        import numpy as np
+
+        e = np.asarray(edited_times, dtype=np.float64)
+        cuts = np.asarray(self.cuts, dtype=np.float64)
+        k = np.searchsorted(cuts, e - self.EPS, side="left")
+        if len(cuts):
+            at = np.minimum(k, len(cuts) - 1)
+            no_keep = ((k < len(cuts)) & (cuts[at] <= e + self.EPS)
+                       & ~np.isin(np.asarray(self.starts)[at], list(self.keep_ends)))
+            k = np.where(no_keep, np.searchsorted(cuts, e + self.EPS, side="right"), k)
+        original = e + np.asarray(self.cum_removed, dtype=np.float64)[k]
+        return np.round(original, ndigits) if ndigits is not None else original
+
+
 # ──────────────────────────────────────────────
 # Analyze Command
 # ──────────────────────────────────────────────
@@ -181,25 +690,157 @@ def find_silence_gaps(segments, min_gap=2.0):
     return gaps
 
 
-def find_duplicates(segments, min_chars=15):
-    """Find duplicate/retake segments by text similarity."""
+def merge_vad_gaps(gaps, silences, segments, min_gap=2.0):
+    """Add energy-VAD silences to the Whisper segment gaps.
+
+    Whisper often stretches segment ends over pauses, so a silence inside
+    a segment's span is missed by find_silence_gaps. Each VAD silence is
+    cut around the words it overlaps; the word-free pieces of at least
+    min_gap seconds either widen an overlapping gap or become new gaps.
+    Gaps that VAD found or widened carry "vad": True.
+    """
+    import bisect
+    import itertools
+
+    spans = sorted(
+        (w["start"], w["end"])
+        for seg in segments
+        for w in (seg.get("words") or [seg])
+    )
+    span_starts = [a for a, _ in spans]
+    # Running max of span ends: the first span that can reach a silence
+    reach = list(itertools.accumulate((b for _, b in spans), max))
+    seg_starts = [seg["start"] for seg in segments]
+
+    pieces = []
+    for start, end in silences:
+        # Spans that can overlap [start, end): reach past start, start before end
+        pos = start
+        lo = bisect.bisect_right(reach, start)
+        for a, b in spans[lo:bisect.bisect_left(span_starts, end)]:
+            if b <= pos:
+                continue
+            if a - pos >= min_gap:
+                pieces.append((pos, a))
+            pos = max(pos, b)
+            if pos >= end:
+                break
+        if end - pos >= min_gap:
+            pieces.append((pos, end))
+
+    merged = [dict(g) for g in gaps]
+    for start, end in pieces:
+        overlap = [g for g in merged if g["start"] < end and start < g["end"]]
+        if overlap:
+            g = overlap[0]
+            if start < g["start"] or end > g["end"]:
+                g["start"] = round(min(g["start"], start), 2)
+                g["end"] = round(max(g["end"], end), 2)
+                g["duration"] = round(g["end"] - g["start"], 2)
+                g["vad"] = True
+            continue
+        after = bisect.bisect_right(seg_starts, start)
+        before = after - 1
+        merged.append({
+            "start": round(start, 2),
+            "end": round(end, 2),
+            "duration": round(end - start, 2),
+            "before_seg": before,
+            "after_seg": after,
+            "before_text": segments[before]["text"].strip()[:50] if before >= 0 else "",
+            "after_text": segments[after]["text"].strip()[:50] if after < len(segments) else "",
+            "vad": True,
+        })
+    merged.sort(key=lambda g: g["start"])
+    return merged
+
+
+def _normalize_take(text):
+    """Drop whitespace and punctuation so retakes compare on content only."""
+    return "".join(ch for ch in text if ch.isalnum())
+
+
+@profiled("retakes")
+def find_duplicates(segments, min_chars=15, similarity=0.8, window=600.0, ngram=3):
+    """Find duplicate/retake segments by fuzzy opening-text similarity.
+
+    Candidate pairs come from a character n-gram index over the opening
+    2*min_chars characters of each segment, limited to segments that end
+    within `window` seconds before the current one starts (0 = no limit),
+    so the search stays near-linear on long transcripts. A pair is a
+    retake when the first min_chars characters match exactly or the
+    openings have a SequenceMatcher ratio >= similarity.
+
+    Each pair carries a "group" id (first segment of its retake cluster)
+    that generate_edit_plan uses to keep only the last take.
+    """
+    from collections import defaultdict, deque
+    from difflib import SequenceMatcher
+
+    span = min_chars * 2
+    texts = [s["text"].strip() for s in segments]
+    heads = [_normalize_take(t)[:span] for t in texts]
+    grams = [
+        {h[k:k + ngram] for k in range(max(1, len(h) - ngram + 1))}
+        for h in heads
+    ]
+
+    postings = defaultdict(deque)
+    oldest = 0
     dupes = []
-    for i in range(len(segments)):
-        for j in range(i + 1, len(segments)):
-            t1 = segments[i]["text"].strip()
-            t2 = segments[j]["text"].strip()
-            if len(t1) > min_chars and len(t2) > min_chars:
-                if t1[:min_chars] == t2[:min_chars]:
-                    dupes.append({
-                        "first_seg": i,
-                        "first_start": segments[i]["start"],
-                        "first_end": segments[i]["end"],
-                        "first_text": t1[:60],
-                        "second_seg": j,
-                        "second_start": segments[j]["start"],
-                        "second_end": segments[j]["end"],
-                        "second_text": t2[:60],
-                    })
+    parent = {}
+
+    def find(x):
+        while parent.get(x, x) != x:
+            parent[x] = parent.get(parent[x], parent[x])
+            x = parent[x]
+        return x
+
+    for j, seg in enumerate(segments):
+        if len(texts[j]) <= min_chars:
+            continue
+        if window > 0:
+            while oldest < j and seg["start"] - segments[oldest]["end"] > window:
+                oldest += 1
+
+        shared = defaultdict(int)
+        for g in grams[j]:
+            posting = postings[g]
+            while posting and posting[0] < oldest:
+                posting.popleft()
+            for i in posting:
+                shared[i] += 1
+
+        for i in sorted(shared):
+            if texts[i][:min_chars] == texts[j][:min_chars]:
+                ratio = 1.0
+            elif 2 * shared[i] / (len(grams[i]) + len(grams[j])) < 0.4:
+                # Dice overlap prefilter before the exact similarity check
+                continue
+            else:
+                ratio = SequenceMatcher(None, heads[i], heads[j]).ratio()
+                if ratio < similarity:
+                    continue
+            ri, rj = find(i), find(j)
+            if ri != rj:
+                parent[max(ri, rj)] = min(ri, rj)
+            dupes.append({
+                "first_seg": i,
+                "first_start": segments[i]["start"],
+                "first_end": segments[i]["end"],
+                "first_text": texts[i][:60],
+                "second_seg": j,
+                "second_start": seg["start"],
+                "second_end": seg["end"],
+                "second_text": texts[j][:60],
+                "similarity": round(ratio, 3),
+            })
+
+        for g in grams[j]:
+            postings[g].append(j)
+
+    for d in dupes:
+        d["group"] = find(d["first_seg"])
     return dupes
 
 
@@ -236,6 +877,7 @@ def find_garbage_segments(segments):
     return garbage
 
 
+@profiled("plan")
 def generate_edit_plan(segments, gaps, dupes, garbage, long_silence_threshold=10.0):
     """
     Generate a KEEP/REMOVE edit plan.
@@ -261,10 +903,10 @@ def generate_edit_plan(segments, gaps, dupes, garbage, long_silence_threshold=10
             })
 
     # 2. First takes of duplicates (keep the last occurrence)
-    # Group duplicates by their first 15 chars to find retake groups
+    # Group duplicates by retake cluster (older analyses: by first 15 chars)
     retake_groups = {}
     for d in dupes:
-        key = d["first_text"][:15]
+        key = d.get("group", d["first_text"][:15])
         if key not in retake_groups:
             retake_groups[key] = []
         retake_groups[key].append(d)
@@ -346,32 +988,48 @@ def generate_edit_plan(segments, gaps, dupes, garbage, long_silence_threshold=10
     return plan
 
 
-def cmd_analyze(args):
-    """Transcribe and analyze video/audio for edit opportunities."""
-    input_path = args.input
-    if not os.path.exists(input_path):
-        print(f"Error: File not found: {input_path}", file=sys.stderr)
-        sys.exit(1)
+def transcription_mode(args):
+    """Cache key part for how the audio is segmented before Whisper.
 
-    info = get_media_info(input_path)
-    print(f"Input: {input_path}")
-    print(f"  Duration: {info['duration']:.1f}s ({info['duration']/60:.1f}min)")
-    print(f"  Size: {info['size_mb']:.0f}MB")
-    if info["has_video"]:
-        print(f"  Video: {info.get('video', 'N/A')}")
-    print(f"  Audio: {info.get('audio', 'N/A')}")
-    print()
+    Chunked runs (--workers > 1) stitch per-chunk results, so their
+    segmentation depends on the chunk settings and differs from a
+    whole-file run.
+    """
+    if args.workers > 1:
+        return f"chunked{args.chunk_minutes:g}m{args.split_silence:g}s"
+    return "full"
+
+
+def transcript_cache_path(cache_dir, digest, model_name, language, mode="full"):
+    """Cache file for a transcription of the given PCM digest."""
+    return os.path.join(cache_dir, "transcripts",
+                        f"{digest[:32]}_{model_name}_{language}_{mode}.json")
+
+
+def load_transcript_cache(cache_path):
+    """Cached transcription, or None on a miss or an unreadable file."""
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        with open(cache_path) as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Warning: ignoring unreadable transcription cache {cache_path}: {e}")
+        return None
+
+
+def save_transcript_cache(cache_path, result):
+    """Write the cache atomically so an interrupted run leaves no truncated file."""
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    partial = f"{cache_path}.{os.getpid()}.partial"
+    with open(partial, "w") as f:
+        json.dump(result, f, ensure_ascii=False)
+    os.replace(partial, cache_path)
 
-    # Extract audio if video
-    audio_path = input_path
-    tmp_audio = None
-    if info["has_video"]:
-        tmp_audio = tempfile.mktemp(suffix=".wav")
-        print("Extracting audio from video...")
-        extract_audio(input_path, tmp_audio)
-        audio_path = tmp_audio
 
-    # Run Whisper
+@profiled("transcribe")
+def transcribe(audio_path, args, info):
+    """Run Whisper on a 16kHz WAV and return the transcription result."""
     try:
         import whisper
     except ImportError:
@@ -393,6 +1051,206 @@ def cmd_analyze(args):
         verbose=False,
     )
     print(f"Transcription done in {time.time()-t1:.1f}s")
+    return result
+
+
+@profiled("vad")
+def find_vad_silences(wav_path, min_silence=1.0, frame_ms=30, margin_db=6.0):
+    """Energy-based VAD: silent stretches of at least min_silence seconds.
+
+    A frame is silent when its RMS is within margin_db of the noise floor
+    (10th percentile of frame levels). The WAV is read in blocks.
+    Returns a list of (start, end) tuples in seconds.
+    """
+    import numpy as np
+
+    with wave.open(wav_path, "rb") as wf:
+        sr = wf.getframerate()
+        frame_len = int(sr * frame_ms / 1000)
+        block = frame_len * 2000
+        levels = []
+        while True:
+            data = wf.readframes(block)
+            if not data:
+                break
+            pcm = np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768
+            levels.append(frame_rms(pcm, frame_len))
+
+    rms = np.concatenate(levels) if levels else np.zeros(0)
+    if not len(rms):
+        return []
+    db = 20 * np.log10(np.maximum(rms, 1e-6))
+    silent = db < np.percentile(db, 10) + margin_db
+
+    # Runs of silent frames
+    edges = np.diff(np.concatenate(([0], silent.astype(np.int8), [0])))
+    starts = np.nonzero(edges == 1)[0]
+    ends = np.nonzero(edges == -1)[0]
+    frame_sec = frame_len / sr
+    return [
+        (round(float(s * frame_sec), 2), round(float(e * frame_sec), 2))
+        for s, e in zip(starts, ends)
+        if (e - s) * frame_sec >= min_silence
+    ]
+
+
+def plan_chunks(duration, silences, target):
+    """Split [0, duration] at silence midpoints into chunks of ~target seconds."""
+    cuts = []
+    last = 0.0
+    for start, end in silences:
+        mid = (start + end) / 2
+        if mid - last >= target and duration - mid >= target / 4:
+            cuts.append(round(float(mid), 2))
+            last = mid
+    bounds = [0.0] + cuts + [duration]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+_WHISPER_MODEL = None
+
+
+def _init_whisper_worker(model_name):
+    """Process pool initializer: load one Whisper model per worker."""
+    global _WHISPER_MODEL
+    import torch
+    import whisper
+    # The workers already run in parallel; one torch thread each avoids oversubscription
+    torch.set_num_threads(1)
+    _WHISPER_MODEL = whisper.load_model(model_name)
+
+
+def _transcribe_chunk(chunk_path, offset, language):
+    """Transcribe one chunk and shift its timestamps onto the full timeline."""
+    result = _WHISPER_MODEL.transcribe(
+        chunk_path,
+        language=language,
+        word_timestamps=True,
+        verbose=False,
+    )
+    for seg in result["segments"]:
+        seg["start"] = round(seg["start"] + offset, 2)
+        seg["end"] = round(seg["end"] + offset, 2)
+        for w in seg.get("words", []):
+            w["start"] = round(w["start"] + offset, 2)
+            w["end"] = round(w["end"] + offset, 2)
+    return result
+
+
+@profiled("transcribe")
+def transcribe_chunked(audio_path, args, silences):
+    """Transcribe VAD-split chunks across a process pool and stitch them."""
+    try:
+        import whisper  # noqa: F401
+    except ImportError:
+        print("Error: Whisper not installed. Run: pip install openai-whisper", file=sys.stderr)
+        sys.exit(1)
+    from concurrent.futures import ProcessPoolExecutor
+
+    with wave.open(audio_path, "rb") as wf:
+        sr = wf.getframerate()
+        duration = wf.getnframes() / sr
+        chunks = plan_chunks(duration, silences, args.chunk_minutes * 60)
+
+        tmp_dir = tempfile.mkdtemp(prefix="whisper_chunks_")
+        chunk_files = []
+        for i, (start, end) in enumerate(chunks):
+            path = os.path.join(tmp_dir, f"chunk_{i:03d}.wav")
+            wf.setpos(int(start * sr))
+            with wave.open(path, "wb") as out:
+                out.setparams(wf.getparams())
+                out.writeframes(wf.readframes(int((end - start) * sr)))
+            chunk_files.append(path)
+
+    workers = min(args.workers, len(chunks))
+    print(f"Transcribing {len(chunks)} chunks with {workers} workers "
+          f"({duration/60:.1f} min, Whisper {args.whisper_model})...")
+    t0 = time.time()
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_whisper_worker,
+            initargs=(args.whisper_model,),
+        ) as pool:
+            results = list(pool.map(
+                _transcribe_chunk,
+                chunk_files,
+                [start for start, _ in chunks],
+                [args.language] * len(chunks),
+            ))
+    finally:
+        import shutil
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    print(f"Transcription done in {time.time()-t0:.1f}s")
+
+    segments = []
+    for r in results:
+        for seg in r["segments"]:
+            seg["id"] = len(segments)
+            segments.append(seg)
+    return {
+        "text": "".join(r["text"] for r in results),
+        "segments": segments,
+        "language": results[0].get("language", args.language) if results else args.language,
+    }
+
+
+def cmd_analyze(args):
+    """Transcribe and analyze video/audio for edit opportunities."""
+    input_path = args.input
+    if not os.path.exists(input_path):
+        print(f"Error: File not found: {input_path}", file=sys.stderr)
+        sys.exit(1)
+
+    info = get_media_info(input_path)
+    print(f"Input: {input_path}")
+    print(f"  Duration: {info['duration']:.1f}s ({info['duration']/60:.1f}min)")
+    print(f"  Size: {info['size_mb']:.0f}MB")
+    if info["has_video"]:
+        print(f"  Video: {info.get('video', 'N/A')}")
+    print(f"  Audio: {info.get('audio', 'N/A')}")
+    print()
+
+    # Extract 16kHz mono PCM: Whisper input and transcription cache key
+    tmp_audio = tempfile.mktemp(suffix=".wav")
+    print("Extracting audio...")
+    extract_audio(input_path, tmp_audio)
+
+    try:
+        result = None
+        cache_path = None
+        if not args.no_cache:
+            cache_path = transcript_cache_path(
+                args.cache_dir, pcm_digest(tmp_audio), args.whisper_model, args.language,
+                transcription_mode(args),
+            )
+            result = load_transcript_cache(cache_path)
+            if result is not None:
+                print(f"Transcription cache hit: {cache_path}")
+
+        # Cheap energy VAD: silences are known before Whisper runs; they
+        # split chunks for --workers and are merged into the silence gaps
+        silences = []
+        try:
+            min_silence = min(args.split_silence, args.min_gap)
+            silences = find_vad_silences(tmp_audio, min_silence=min_silence)
+            print(f"VAD: {len(silences)} silences >= {min_silence}s")
+        except ImportError:
+            print("Warning: numpy not installed, skipping VAD (gaps from Whisper timestamps only)")
+
+        if result is None:
+            if args.workers > 1:
+                result = transcribe_chunked(
+                    tmp_audio, args, [(s, e) for s, e in silences if e - s >= args.split_silence])
+            else:
+                result = transcribe(tmp_audio, args, info)
+            if cache_path:
+                save_transcript_cache(cache_path, result)
+    finally:
+        # Cleanup temp audio
+        if os.path.exists(tmp_audio):
+            os.remove(tmp_audio)
+
     print(f"Segments: {len(result['segments'])}")
 
     segments = result["segments"]
@@ -400,22 +1258,25 @@ def cmd_analyze(args):
     print(f"Total words: {total_words}")
     print()
 
-    # Cleanup temp audio
-    if tmp_audio and os.path.exists(tmp_audio):
-        os.remove(tmp_audio)
-
     # Analyze
     print("=" * 60)
     print("Analysis")
     print("=" * 60)
 
     gaps = find_silence_gaps(segments, min_gap=args.min_gap)
-    dupes = find_duplicates(segments)
+    if silences:
+        gaps = merge_vad_gaps(gaps, silences, segments, min_gap=args.min_gap)
+    dupes = find_duplicates(
+        segments,
+        similarity=args.retake_similarity,
+        window=args.retake_window,
+    )
     garbage = find_garbage_segments(segments)
 
     print(f"\n1. Silence Gaps (>{args.min_gap}s): {len(gaps)}개")
     for g in gaps:
-        print(f"   {fmt_time(g['start'])} ~ {fmt_time(g['end'])} ({g['duration']:.1f}s)")
+        print(f"   {fmt_time(g['start'])} ~ {fmt_time(g['end'])} ({g['duration']:.1f}s)"
+              f"{' [VAD]' if g.get('vad') else ''}")
 
     print(f"\n2. Duplicates/Retakes: {len(dupes)}개")
     seen_pairs = set()
@@ -423,7 +1284,7 @@ def cmd_analyze(args):
         pair = (d["first_seg"], d["second_seg"])
         if pair not in seen_pairs:
             seen_pairs.add(pair)
-            print(f"   seg[{d['first_seg']}] {fmt_time(d['first_start'])} vs seg[{d['second_seg']}] {fmt_time(d['second_start'])}")
+            print(f"   seg[{d['first_seg']}] {fmt_time(d['first_start'])} vs seg[{d['second_seg']}] {fmt_time(d['second_start'])} (sim {d.get('similarity', 1.0):.2f})")
             print(f"     \"{d['first_text']}\"")
 
     print(f"\n3. Garbage Segments: {len(garbage)}개")
@@ -474,6 +1335,22 @@ def cmd_analyze(args):
         "duplicates": dupes,
         "garbage": garbage,
     }
+    if silences:
+        analysis["vad_silences"] = [{"start": s, "end": e} for s, e in silences]
+    # Input is an earlier execute output: carry its joins and scene changes over
+    index_path = edit_index_path(input_path)
+    if os.path.exists(index_path):
+        try:
+            index = load_edit_index(index_path)
+            scenes = index["scene_time"][index["scene_score"] >= SCENE_CHANGE]
+            analysis["edit_index"] = {
+                "path": index_path,
+                "cuts": [round(float(t), 3) for t in index["cuts"]],
+                "scene_changes": [round(float(t), 3) for t in scenes],
+            }
+            print(f"Edit index: {len(index['cuts'])} previous cuts, {len(scenes)} scene changes")
+        except (ImportError, OSError, ValueError, KeyError) as e:
+            print(f"Warning: could not read edit index {index_path}: {e}")
     analysis_path = output_base + "_analysis.json"
     with open(analysis_path, "w") as f:
         json.dump(analysis, f, ensure_ascii=False, indent=2)
@@ -490,231 +1367,1233 @@ def cmd_analyze(args):
 
 
 # ──────────────────────────────────────────────
-# Execute Command
+# Loudness (EBU R128)
 # ──────────────────────────────────────────────
 
-def cmd_execute(args):
-    """Execute an edit plan to produce the edited video/audio."""
-    input_path = args.input
-    plan_path = args.plan
+LOUDNORM_FIELDS = ("input_i", "input_tp", "input_lra", "input_thresh", "target_offset")
 
-    if not os.path.exists(input_path):
-        print(f"Error: File not found: {input_path}", file=sys.stderr)
-        sys.exit(1)
-    if not os.path.exists(plan_path):
-        print(f"Error: Plan not found: {plan_path}", file=sys.stderr)
-        sys.exit(1)
 
-    with open(plan_path) as f:
-        plan = json.load(f)
+def loudness_key(*parts):
+    """Cache key for a loudness measurement (source/plan/processing identity)."""
+    import hashlib
 
-    info = get_media_info(input_path)
-    keep_segments = [e for e in plan if e["action"] == "KEEP"]
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
 
-    if not keep_segments:
-        print("Error: No KEEP segments in plan", file=sys.stderr)
-        sys.exit(1)
 
-    print(f"Input: {input_path}")
-    print(f"  Duration: {info['duration']:.1f}s ({info['duration']/60:.1f}min)")
-    print(f"  KEEP segments: {len(keep_segments)}")
+def loudness_targets(args):
+    return f"I={args.loudness}:TP={args.true_peak}:LRA={args.lra}"
 
-    keep_total = sum(e["end"] - e["start"] for e in keep_segments)
-    print(f"  Expected output: ~{keep_total:.0f}s ({keep_total/60:.1f}min)")
-    print()
 
-    # Determine output path
-    ext = os.path.splitext(input_path)[1]
-    if args.output:
-        output_path = args.output
-    else:
-        base = os.path.splitext(input_path)[0]
-        output_path = f"{base}_edited{ext}"
+@profiled("loudness_measure")
+def _load_loudness_cache(cache_path):
+    try:
+        with open(cache_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
 
-    # Create temp directory for segments
-    tmp_dir = tempfile.mkdtemp(prefix="video_edit_")
 
-    try:
-        # Step 1: Extract KEEP segments
-        print("=== Step 1: Extracting KEEP segments ===")
-        t0 = time.time()
-        part_files = []
+def measure_loudness(source, args, key, cache_dir=DEFAULT_CACHE_DIR, pcm=None, sample_rate=44100):
+    """loudnorm pass 1: measure the edited audio once, cached by key.
 
-        for i, seg in enumerate(keep_segments):
-            part_file = os.path.join(tmp_dir, f"part_{i:03d}{ext}")
-            part_files.append(part_file)
-            dur = seg["end"] - seg["start"]
-            print(f"  Part {i}: {fmt_time(seg['start'])} ~ {fmt_time(seg['end'])} ({dur:.1f}s)")
+    source is an audio file, or pcm (float32, mono or (samples, channels))
+    is piped in.
+    Returns the measured values, or None for silent audio.
+    """
+    cache_path = os.path.join(cache_dir, "loudness.json")
+    cache = _load_loudness_cache(cache_path)
+    if key in cache:
+        measured = cache[key]
+        print(f"  Loudness (cached): {measured['input_i']} LUFS, TP {measured['input_tp']} dBTP")
+        return measured
+
+    cmd = ["ffmpeg", "-hide_banner", "-nostats"]
+    if pcm is not None:
+        channels = 1 if pcm.ndim == 1 else pcm.shape[1]
+        cmd += ["-f", "f32le", "-ar", str(sample_rate), "-ac", str(channels), "-i", "pipe:0"]
+    else:
+        cmd += ["-i", source]
+    cmd += ["-vn", "-af", f"loudnorm={loudness_targets(args)}:print_format=json", "-f", "null", "-"]
+    result = subprocess.run(cmd, input=pcm.tobytes() if pcm is not None else None,
+                            capture_output=True)
+    stderr = result.stderr.decode(errors="replace")
+    if result.returncode != 0 or "{" not in stderr:
+        raise RuntimeError(f"Loudness measurement failed: {stderr[-300:]}")
+    data = json.loads(stderr[stderr.rfind("{"):stderr.rfind("}") + 1])
+    measured = {k: data[k] for k in LOUDNORM_FIELDS}
+    if measured["input_i"] in ("-inf", "inf") or float(measured["input_i"]) < -70:
+        print("  Loudness: silent audio, skipping normalization")
+        return None
+    print(f"  Loudness: {measured['input_i']} LUFS, TP {measured['input_tp']} dBTP, "
+          f"LRA {measured['input_lra']} LU")
+
+    # Concurrent jobs share the cache: merge with the current file and
+    # replace it atomically so no reader sees a truncated file
+    os.makedirs(cache_dir, exist_ok=True)
+    cache = _load_loudness_cache(cache_path)
+    cache[key] = measured
+    partial = f"{cache_path}.{os.getpid()}.partial"
+    with open(partial, "w") as f:
+        json.dump(cache, f, indent=1)
+    os.replace(partial, cache_path)
+    return measured
+
+
+def loudnorm_filter(measured, args, sample_rate=44100):
+    """loudnorm pass 2 as an -af chain for the final encode (linear gain
+    from the pass-1 values; loudnorm upsamples, so resample back)."""
+    return (
+        f"loudnorm={loudness_targets(args)}"
+        f":measured_I={measured['input_i']}:measured_TP={measured['input_tp']}"
+        f":measured_LRA={measured['input_lra']}:measured_thresh={measured['input_thresh']}"
+        f":offset={measured['target_offset']}:linear=true,aresample={sample_rate}"
+    )
 
-            cmd = [
-                "ffmpeg", "-y",
-                "-ss", str(seg["start"]),
-                "-to", str(seg["end"]),
-                "-i", input_path,
-                "-c", "copy",
-                "-avoid_negative_ts", "make_zero",
-                part_file,
-            ]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            if result.returncode != 0:
-                print(f"    ERROR: {result.stderr[-200:]}")
-                sys.exit(1)
 
-            size = os.path.getsize(part_file) / 1024 / 1024
-            print(f"    OK ({size:.1f}MB)")
+# ──────────────────────────────────────────────
+# Edit Index (review sidecar)
+# ──────────────────────────────────────────────
 
-        print(f"Extraction done in {time.time()-t0:.1f}s")
+INDEX_VERSION = 1
+INDEX_RMS_RATE = 8000      # RMS tap resample rate; one astats frame per second
+INDEX_FLOOR_DB = -120.0    # digital silence (-inf dBFS) is stored as this
+SCENE_CHANGE = 0.3         # scene score treated as a cut by analyze
 
-        # Step 2: Concatenate
-        print(f"\n=== Step 2: Concatenating {len(part_files)} parts ===")
-        t1 = time.time()
 
-        concat_file = os.path.join(tmp_dir, "concat_list.txt")
-        with open(concat_file, "w") as f:
-            for pf in part_files:
-                f.write(f"file '{pf}'\n")
+def edit_index_path(output_path):
+    return os.path.splitext(output_path)[0] + "_index.npz"
 
-        concat_output = os.path.join(tmp_dir, f"concatenated{ext}")
-        cmd = [
-            "ffmpeg", "-y",
-            "-f", "concat", "-safe", "0",
-            "-i", concat_file,
-            "-c", "copy",
-            concat_output,
-        ]
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode != 0:
-            print(f"  ERROR: {result.stderr[-300:]}")
-            sys.exit(1)
 
-        concat_dur = get_duration(concat_output)
-        print(f"  Concatenated: {concat_dur:.1f}s ({concat_dur/60:.1f}min)")
-        print(f"  Done in {time.time()-t1:.1f}s")
+def _filter_path(path):
+    """Escape a path for use as a filter option value inside a graph script."""
+    return path.replace("\\", "/").replace(":", "\\:")
 
-        # Step 3: Audio denoising (optional)
-        if not args.skip_denoise and info["has_video"]:
-            print(f"\n=== Step 3: Audio denoising (strength={args.denoise_strength}) ===")
-            t2 = time.time()
 
-            # Extract audio
-            raw_audio = os.path.join(tmp_dir, "audio_raw.wav")
-            cmd = [
-                "ffmpeg", "-y",
-                "-i", concat_output,
-                "-vn", "-acodec", "pcm_s16le",
-                "-ar", "44100", "-ac", "1",
-                raw_audio,
-            ]
-            subprocess.run(cmd, capture_output=True, text=True)
+def scene_tap(label, tmp_dir):
+    """Graph chain scoring scene changes of every frame of `label`.
 
-            # Denoise
-            try:
-                import numpy as np
-                import noisereduce as nr
-                import soundfile as sf
-                from scipy.signal import butter, sosfilt
-
-                audio, sr = sf.read(raw_audio)
-                print(f"  Audio loaded: {len(audio)/sr:.1f}s @ {sr}Hz")
-
-                # Spectral gating
-                noise_sample = audio[: int(sr * 2.0)]
-                audio = nr.reduce_noise(
-                    y=audio, sr=sr,
-                    y_noise=noise_sample,
-                    prop_decrease=args.denoise_strength,
-                    stationary=True,
-                )
-                print("  Spectral gating applied")
-
-                # Silence-gap attenuation
-                frame_len = int(sr * 0.02)
-                n_frames = len(audio) // frame_len
-                rms = np.array([
-                    np.sqrt(np.mean(audio[i * frame_len:(i + 1) * frame_len] ** 2))
-                    for i in range(n_frames)
-                ])
-                threshold = np.percentile(rms[rms > 0], 25) if np.any(rms > 0) else 0
-                attenuated = 0
-                for i in range(n_frames):
-                    if rms[i] < threshold:
-                        audio[i * frame_len:(i + 1) * frame_len] *= 0.05
-                        attenuated += 1
-                print(f"  Attenuated {attenuated}/{n_frames} frames")
-
-                # Bandpass filter
-                hp = args.highpass
-                lp = args.lowpass
-                sos_hp = butter(4, hp, btype="high", fs=sr, output="sos")
-                sos_lp = butter(4, lp, btype="low", fs=sr, output="sos")
-                audio = sosfilt(sos_hp, audio)
-                audio = sosfilt(sos_lp, audio)
-                print(f"  Bandpass filter ({hp}Hz ~ {lp}Hz) applied")
+    Scores are computed on a 160px copy and written by metadata=print into
+    tmp_dir; the chain ends in a sink, so the encode is unaffected.
+    """
+    out = _filter_path(os.path.join(tmp_dir, "index_scene.txt"))
+    return f"{label}scale=160:-2,select='gte(scene,0)',metadata=print:key=lavfi.scene_score:file={out},nullsink"
+
+
+def rms_tap(label, tmp_dir):
+    """Graph chain writing the per-second RMS level (dBFS) of `label`."""
+    out = _filter_path(os.path.join(tmp_dir, "index_rms.txt"))
+    return (
+        f"{label}aformat=channel_layouts=mono,aresample={INDEX_RMS_RATE},"
+        f"asetnsamples=n={INDEX_RMS_RATE},"
+        f"astats=metadata=1:reset=1:measure_perchannel=none:measure_overall=RMS_level,"
+        f"ametadata=print:key=lavfi.astats.Overall.RMS_level:file={out},anullsink"
+    )
+
+
+def read_metadata_print(path, key):
+    """(pts_time, value) lists from a metadata=print / ametadata=print file."""
+    times, values = [], []
+    if not os.path.exists(path):
+        return times, values
+    pts = None
+    with open(path) as f:
+        for line in f:
+            if line.startswith("frame:"):
+                field = line.rsplit("pts_time:", 1)[-1].strip()
+                pts = float(field) if field not in ("", "NOPTS") else None
+            elif line.startswith(key + "=") and pts is not None:
+                times.append(pts)
+                values.append(float(line.split("=", 1)[1]))
+    return times, values
+
+
+def rms_per_second(audio, sample_rate):
+    """Per-second RMS level (dBFS) of PCM; channels are averaged and a
+    trailing partial second counts."""
+    import numpy as np
+
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1)
+    n = int(sample_rate)
+    seconds = -(-len(audio) // n)
+    padded = np.zeros(seconds * n, dtype=np.float64)
+    padded[:len(audio)] = audio
+    sq = np.square(padded).reshape(seconds, n).sum(axis=1)
+    counts = np.full(seconds, n, dtype=np.float64)
+    if seconds and len(audio) % n:
+        counts[-1] = len(audio) % n
+    with np.errstate(divide="ignore"):
+        return 10 * np.log10(sq / counts)
+
+
+@profiled("index")
+def write_edit_index(index_path, keep_segments, source, tmp_dir=None, output_path=None, rms_db=None):
+    """Write the review sidecar of an edited output as a compressed .npz.
+
+    Arrays: keyframes (s, from the output's packet flags), rms_db (one
+    value per second), scene_time/scene_score (every frame), cuts (join
+    positions on the edited timeline). Scene scores and RMS come from the
+    taps of the final render in tmp_dir, or rms_db is given directly.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        print("  Warning: numpy not installed. Skipping edit index.")
+        return
+
+    if rms_db is None and tmp_dir:
+        _, rms_db = read_metadata_print(os.path.join(tmp_dir, "index_rms.txt"),
+                                        "lavfi.astats.Overall.RMS_level")
+    scene_time, scene_score = [], []
+    if tmp_dir:
+        scene_time, scene_score = read_metadata_print(os.path.join(tmp_dir, "index_scene.txt"),
+                                                      "lavfi.scene_score")
+    keyframes = []
+    if output_path and scene_time:
+        try:
+            keyframes = [k[0] for k in get_keyframes(output_path)]
+        except (RuntimeError, OSError) as e:
+            print(f"  Warning: keyframe scan failed ({e})")
+
+    durations = np.array([seg["end"] - seg["start"] for seg in keep_segments], dtype=np.float64)
+    rms = np.nan_to_num(np.asarray(rms_db if rms_db is not None else [], dtype=np.float64),
+                        nan=INDEX_FLOOR_DB, neginf=INDEX_FLOOR_DB)
+    np.savez_compressed(
+        index_path,
+        version=np.int32(INDEX_VERSION),
+        source=np.str_(os.path.basename(source)),
+        duration=np.float64(durations.sum()),
+        cuts=np.cumsum(durations)[:-1],
+        keyframes=np.asarray(keyframes, dtype=np.float64),
+        rms_db=np.maximum(rms, INDEX_FLOOR_DB).astype(np.float32),
+        scene_time=np.asarray(scene_time, dtype=np.float64),
+        scene_score=np.asarray(scene_score, dtype=np.float32),
+    )
+    print(f"  Index: {len(keyframes)} keyframes, {len(rms)}s RMS, "
+          f"{len(scene_score)} scene scores -> {index_path}")
+
+
+def load_edit_index(path):
+    """Read an edit index sidecar into a dict of arrays (scalars unwrapped)."""
+    import numpy as np
+
+    with np.load(path, allow_pickle=False) as data:
+        return {k: (data[k].item() if data[k].ndim == 0 else data[k]) for k in data.files}
+
+
+# ──────────────────────────────────────────────
+# Execute Command
+# ──────────────────────────────────────────────
+
+def run_commands(cmds, jobs=None, on_done=None):
+    """Run ffmpeg commands concurrently on a bounded pool.
+
+    on_done(i) is called after command i succeeds. Raises RuntimeError on
+    the first failure; commands that have not started yet are cancelled.
+    """
+    from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+
+    jobs = max(1, jobs or os.cpu_count() or 1)
+
+    def run(i):
+        result = subprocess.run(cmds[i], capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"Part {i} failed: {result.stderr[-200:]}")
+        if on_done:
+            on_done(i)
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(run, i) for i in range(len(cmds))]
+        done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+        failed = [f for f in futures if f in done and f.exception()]
+        if failed:
+            for f in futures:
+                f.cancel()
+            raise failed[0].exception()
+
+
+def run_segment_commands(cmds, keys=None, cache=None, jobs=None, on_done=None):
+    """Run per-segment commands whose last argument is the output file.
+
+    With a SegmentCache, each output is stored under the cache path for its
+    key and commands whose output is already cached are skipped; commands
+    sharing a key are rendered once. Returns the output paths in command
+    order.
+    """
+    if cache is None:
+        run_commands(cmds, jobs=jobs, on_done=on_done)
+        return [cmd[-1] for cmd in cmds]
+
+    outputs = []
+    todo = []
+    sharing = {}  # output path → indices of the commands that produce it
+    for i, (cmd, key) in enumerate(zip(cmds, keys)):
+        path = cache.path(key, os.path.splitext(cmd[-1])[1])
+        outputs.append(path)
+        if os.path.exists(path):
+            cache.touch(path)
+            cache.hits += 1
+        elif path in sharing:
+            sharing[path].append(i)
+            cache.hits += 1
+        else:
+            sharing[path] = [i]
+            todo.append(i)
+    cache.misses += len(todo)
+
+    # Render next to the final path and rename on success, so an
+    # interrupted run never leaves a truncated cache entry behind
+    partials = []
+    for i in todo:
+        root, ext = os.path.splitext(outputs[i])
+        partials.append(f"{root}.{os.getpid()}.partial{ext}")
+
+    def finish(j):
+        path = outputs[todo[j]]
+        os.replace(partials[j], path)
+        cache.used.add(path)
+        if on_done:
+            for i in sharing[path]:
+                on_done(i)
+
+    run_commands([cmds[i][:-1] + [partials[j]] for j, i in enumerate(todo)],
+                 jobs=jobs, on_done=finish)
+    return outputs
+
+
+@profiled("extract_segments")
+def extract_segments(input_path, segments, tmp_dir, jobs=None, input_seek=True, verbose=True,
+                     cache=None):
+    """Extract segments to part files concurrently with stream copy.
+
+    Returns part file paths in segment order, ready for a concat list;
+    with a SegmentCache, parts are reused from and stored in the cache.
+    Raises RuntimeError on the first failed extraction; segments that
+    have not started yet are cancelled.
+    """
+    ext = os.path.splitext(input_path)[1]
+    part_files = [os.path.join(tmp_dir, f"part_{i:03d}{ext}") for i in range(len(segments))]
+
+    cmds = []
+    for seg, part_file in zip(segments, part_files):
+        seek = ["-ss", str(seg["start"]), "-to", str(seg["end"])]
+        cmd = ["ffmpeg", "-y", "-v", "error"]
+        if input_seek:
+            cmd += seek + ["-i", input_path]
+        else:
+            cmd += ["-i", input_path] + seek
+        cmd += ["-c", "copy", "-avoid_negative_ts", "make_zero", part_file]
+        cmds.append(cmd)
+
+    keys = [["copy", seg["start"], seg["end"], input_seek] for seg in segments]
+
+    def report(i):
+        if verbose:
+            seg = segments[i]
+            dur = seg["end"] - seg["start"]
+            path = cache.path(keys[i], ext) if cache is not None else part_files[i]
+            size = os.path.getsize(path) / 1024 / 1024
+            print(f"  Part {i}: {fmt_time(seg['start'])} ~ {fmt_time(seg['end'])} "
+                  f"({dur:.1f}s) OK ({size:.1f}MB)")
+
+    part_files = run_segment_commands(cmds, keys, cache=cache, jobs=jobs, on_done=report)
+    if cache is not None and verbose:
+        print(f"  Segment cache: {cache.hits} reused, {cache.misses} extracted")
+    return part_files
+
+
+def build_concat_filter(keep_segments, video=True, audio=True):
+    """Build a trim/atrim + concat filter graph for KEEP segments.
+
+    The graph reads input 0 and exposes [outv] and/or [outa].
+    """
+    lines = []
+    pads = ""
+    for i, seg in enumerate(keep_segments):
+        start, end = seg["start"], seg["end"]
+        if video:
+            lines.append(f"[0:v]trim=start={start}:end={end},setpts=PTS-STARTPTS[v{i}];")
+            pads += f"[v{i}]"
+        if audio:
+            lines.append(f"[0:a]atrim=start={start}:end={end},asetpts=PTS-STARTPTS[a{i}];")
+            pads += f"[a{i}]"
+    outs = ("[outv]" if video else "") + ("[outa]" if audio else "")
+    lines.append(f"{pads}concat=n={len(keep_segments)}:v={int(video)}:a={int(audio)}{outs}")
+    return "\n".join(lines)
+
+
+@profiled("render_filter")
+def render_filter(input_path, output_path, keep_segments, tmp_dir, args,
+                  video=True, audio=True, audio_source=None, audio_filter=None, index_dir=None):
+    """Render KEEP segments in a single ffmpeg pass via filter_complex.
+
+    With audio_source, the (already edited) audio file replaces the
+    trimmed source audio, so the video is encoded only once; audio_filter
+    (e.g. loudnorm pass 2) is applied to it in the same pass.
+    With index_dir, the final streams are also tapped for the edit index
+    (scene scores, per-second RMS) in the same pass.
+    """
+    graph = build_concat_filter(keep_segments, video=video, audio=audio and not audio_source)
+    taps = []
+    if index_dir:
+        if video:
+            graph = graph.replace("[outv]", "[catv]")
+            taps += ["[catv]split=2[outv][idxv]", scene_tap("[idxv]", index_dir)]
+        if audio_source:
+            # Route the replacement audio through the graph so the tap sees the final signal
+            taps += [f"[1:a]{audio_filter or 'anull'},asplit=2[outa][idxa]", rms_tap("[idxa]", index_dir)]
+            audio_filter = None
+        elif audio:
+            graph = graph.replace("[outa]", "[cata]")
+            taps += ["[cata]asplit=2[outa][idxa]", rms_tap("[idxa]", index_dir)]
+    graph_file = os.path.join(tmp_dir, "filter_graph.txt")
+    with open(graph_file, "w") as f:
+        f.write(";\n".join([graph] + taps))
+
+    cmd = ["ffmpeg", "-y", "-i", input_path]
+    if audio_source:
+        cmd += ["-i", audio_source]
+    cmd += ["-filter_complex_script", graph_file]
+    if video:
+        cmd += ["-map", "[outv]",
+                "-c:v", args.video_codec, "-preset", args.preset, "-crf", str(args.crf)]
+    if audio_source:
+        cmd += ["-map", "[outa]" if index_dir else "1:a:0"]
+        if audio_filter:
+            cmd += ["-af", audio_filter]
+    elif audio:
+        cmd += ["-map", "[outa]"]
+    if audio and video:
+        cmd += ["-c:a", "aac", "-b:a", args.audio_bitrate]
+    cmd.append(output_path)
+
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Filter render failed: {result.stderr[-300:]}")
+
+
+# Source codec → encoder used for smart-cut head/tail slivers
+SMART_CUT_ENCODERS = {"h264": "libx264", "hevc": "libx265"}
+
+
+@profiled("keyframes")
+def get_keyframes(filepath):
+    """Video keyframes as [pts_time, packet_index] pairs from one ffprobe
+    packet scan (cached). packet_index is the decode-order position, so the
+    difference between two keyframes is the packet count of the GOPs between
+    them."""
+    key = _probe_key(filepath, "keyframes")
+    if key in _PROBE_CACHE:
+        return _PROBE_CACHE[key]
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,flags",
+        "-of", "csv=p=0",
+        filepath,
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe failed: {result.stderr[-300:]}")
+    keyframes = []
+    for index, line in enumerate(result.stdout.splitlines()):
+        pts, _, flags = line.partition(",")
+        if "K" in flags and pts not in ("", "N/A"):
+            keyframes.append([float(pts), index])
+    keyframes.sort()
+    _PROBE_CACHE[key] = keyframes
+    return keyframes
+
+
+def plan_smart_cuts(keep_segments, keyframes, min_copy=1.0):
+    """Split KEEP ranges into (start, end, mode, packets) pieces.
+
+    The GOP-aligned interior between the first keyframe at/after start and
+    the last keyframe at/before end is stream-copied ("copy", with its
+    packet count); the head and tail slivers around it are re-encoded
+    ("encode", packets None). Ranges with less than min_copy seconds
+    between those keyframes are fully re-encoded.
+    """
+    import bisect
+
+    times = [k[0] for k in keyframes]
+    pieces = []
+    for seg in keep_segments:
+        start, end = seg["start"], seg["end"]
+        i = bisect.bisect_left(times, start)
+        j = bisect.bisect_right(times, end) - 1
+        if i >= len(times) or j < 0 or times[j] - times[i] < min_copy:
+            pieces.append((start, end, "encode", None))
+            continue
+        k1, k2 = times[i], times[j]
+        if k1 - start > 0.001:
+            pieces.append((start, k1, "encode", None))
+        pieces.append((k1, k2, "copy", keyframes[j][1] - keyframes[i][1]))
+        if end - k2 > 0.001:
+            pieces.append((k2, end, "encode", None))
+    return pieces
+
+
+@profiled("render_audio")
+def render_audio(input_path, keep_segments, output_wav, tmp_dir, cache=None, jobs=None):
+    """Render the edited audio track (KEEP segments) to a 44.1kHz mono WAV.
+
+    With a SegmentCache, each KEEP range is decoded to its own cached WAV
+    and the pieces are joined, so a plan edit only decodes the changed ranges.
+    """
+    if cache is not None:
+        render_audio_pieces(input_path, keep_segments, output_wav, tmp_dir, cache, jobs)
+        return
+    graph_file = os.path.join(tmp_dir, "audio_graph.txt")
+    with open(graph_file, "w") as f:
+        f.write(build_concat_filter(keep_segments, video=False, audio=True))
+    cmd = [
+        "ffmpeg", "-y",
+        "-i", input_path,
+        "-filter_complex_script", graph_file,
+        "-map", "[outa]",
+        "-acodec", "pcm_s16le", "-ar", "44100", "-ac", "1",
+        output_wav,
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Audio render failed: {result.stderr[-300:]}")
+
+
+def render_audio_pieces(input_path, keep_segments, output_wav, tmp_dir, cache, jobs=None):
+    """Decode KEEP ranges to cached 44.1kHz mono WAV pieces and join them."""
+    cmds = []
+    keys = []
+    for i, seg in enumerate(keep_segments):
+        start, end = seg["start"], seg["end"]
+        cmds.append([
+            "ffmpeg", "-y", "-v", "error",
+            "-ss", f"{start:.6f}", "-i", input_path, "-t", f"{end - start:.6f}",
+            "-map", "0:a:0", "-vn",
+            "-acodec", "pcm_s16le", "-ar", "44100", "-ac", "1",
+            os.path.join(tmp_dir, f"audio_{i:04d}.wav"),
+        ])
+        keys.append(["audio", start, end, 44100])
+    hits, misses = cache.hits, cache.misses
+    pieces = run_segment_commands(cmds, keys, cache=cache, jobs=jobs)
+    print(f"  Audio cache: {cache.hits - hits} reused, {cache.misses - misses} decoded")
+
+    with wave.open(output_wav, "wb") as out:
+        for i, piece in enumerate(pieces):
+            with wave.open(piece, "rb") as wf:
+                if i == 0:
+                    out.setparams(wf.getparams())
+                while True:
+                    data = wf.readframes(1 << 20)
+                    if not data:
+                        break
+                    out.writeframes(data)
+
+
+@profiled("smart_cut")
+def render_smart(input_path, output_path, keep_segments, info, tmp_dir, args, audio_source=None,
+                 cache=None, audio_filter=None, index_dir=None):
+    """Frame-accurate cut at near stream-copy speed.
+
+    Video: GOP interiors are stream-copied and only head/tail slivers up to
+    the nearest keyframe are re-encoded with the source codec. Pieces are
+    MPEG-TS so each carries its own parameter sets before concatenation.
+    Audio: audio_source, or the source audio cut sample-accurately.
+    With a SegmentCache, video pieces are reused across runs, so changing
+    one KEEP range only re-renders the pieces of that range.
+    With index_dir, the concat pass taps the streams for the edit index;
+    the copied video is decoded (not encoded) for its scene scores.
+    Sources without a supported codec fall back to a full filter render.
+    """
+    encoder = SMART_CUT_ENCODERS.get(info.get("video_codec"))
+    if not encoder:
+        print(f"  Smart cut not supported for {info.get('video_codec')}; using filter render")
+        render_filter(input_path, output_path, keep_segments, tmp_dir, args,
+                      video=True, audio=info.get("has_audio", True) or bool(audio_source),
+                      audio_source=audio_source, audio_filter=audio_filter, index_dir=index_dir)
+        return
+
+    pieces = plan_smart_cuts(keep_segments, get_keyframes(input_path))
+    copied = sum(e - s for s, e, mode, _ in pieces if mode == "copy")
+    total = sum(e - s for s, e, _, _ in pieces)
+    encoded_count = sum(1 for p in pieces if p[2] == "encode")
+    print(f"  Smart cut: {len(pieces)} pieces, {copied:.0f}/{total:.0f}s stream-copied, "
+          f"{encoded_count} slivers re-encoded ({encoder})")
+
+    cmds = []
+    keys = []
+    for i, (start, end, mode, packets) in enumerate(pieces):
+        piece = os.path.join(tmp_dir, f"piece_{i:04d}.ts")
+        cmd = ["ffmpeg", "-y", "-v", "error",
+               "-ss", f"{start:.6f}", "-i", input_path,
+               "-map", "0:v:0", "-an", "-sn", "-dn"]
+        if mode == "copy":
+            # -t on a stream copy overshoots by the reorder delay; cut by packet count
+            cmd += ["-frames:v", str(packets), "-c:v", "copy"]
+        else:
+            cmd += ["-t", f"{end - start:.6f}", "-c:v", encoder, "-preset", args.preset, "-crf", str(args.crf)]
+            if info.get("pix_fmt"):
+                cmd += ["-pix_fmt", info["pix_fmt"]]
+        cmd.append(piece)
+        cmds.append(cmd)
+        key = ["smart", start, end, mode, packets]
+        if mode == "encode":
+            key += [encoder, args.preset, args.crf, info.get("pix_fmt")]
+        keys.append(key)
+    if cache is not None:
+        hits, misses = cache.hits, cache.misses
+    with stage("render_pieces"):
+        piece_files = run_segment_commands(cmds, keys, cache=cache, jobs=args.jobs)
+    if cache is not None:
+        print(f"  Segment cache: {cache.hits - hits} reused, {cache.misses - misses} rendered")
+
+    if audio_source is None and info.get("has_audio", True):
+        audio_source = os.path.join(tmp_dir, "audio_edited.wav")
+        render_audio(input_path, keep_segments, audio_source, tmp_dir, cache=cache, jobs=args.jobs)
+
+    concat_file = os.path.join(tmp_dir, "pieces.txt")
+    with open(concat_file, "w") as f:
+        for p in piece_files:
+            f.write(f"file '{p}'\n")
+    cmd = ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", concat_file]
+    if audio_source:
+        cmd += ["-i", audio_source]
+    if index_dir:
+        taps = [scene_tap("[0:v]", index_dir)]
+        if audio_source:
+            taps += [f"[1:a]{audio_filter or 'anull'},asplit=2[outa][idxa]", rms_tap("[idxa]", index_dir)]
+            audio_filter = None
+        graph_file = os.path.join(tmp_dir, "index_graph.txt")
+        with open(graph_file, "w") as f:
+            f.write(";\n".join(taps))
+        cmd += ["-filter_complex_script", graph_file]
+    cmd += ["-map", "0:v:0", "-c:v", "copy"]
+    if audio_source:
+        cmd += ["-map", "[outa]" if index_dir else "1:a:0", "-c:a", "aac", "-b:a", args.audio_bitrate]
+        if audio_filter:
+            cmd += ["-af", audio_filter]
+    cmd.append(output_path)
+    with stage("concat"):
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Smart cut concat failed: {result.stderr[-300:]}")
+
+
+def frame_rms(audio, frame_len):
+    """Per-frame RMS of a mono signal; a trailing partial frame is ignored."""
+    import numpy as np
+
+    n_frames = len(audio) // frame_len
+    frames = audio[:n_frames * frame_len].reshape(n_frames, frame_len)
+    return np.sqrt(np.einsum("ij,ij->i", frames, frames) / frame_len)
 
-                # Save denoised audio
+
+def apply_frame_gains(audio, gains, frame_len, first_frame=0, ramp_len=0):
+    """Scale audio by per-frame gains, ramping linearly at gain changes.
+
+    `gains` covers the whole file and `first_frame` is the index of the
+    frame at audio[0], so a block-streamed file gets exactly the same
+    ramps as a single call. Samples past the last full frame keep unit
+    gain. Ramps are centred on frame boundaries; ramp_len <= frame_len.
+    """
+    import numpy as np
+
+    out = np.array(audio, dtype=np.float64)
+    n_frames = min(len(out) // frame_len, max(0, len(gains) - first_frame))
+    if n_frames:
+        frames = out[:n_frames * frame_len].reshape((n_frames, frame_len) + out.shape[1:])
+        frames *= gains[first_frame:first_frame + n_frames].reshape((-1, 1) + (1,) * (out.ndim - 1))
+
+    if ramp_len > 1 and len(gains):
+        ext = np.append(gains, 1.0)
+        bounds = np.nonzero(ext[1:] != ext[:-1])[0] + 1
+        half = ramp_len // 2
+        local = bounds * frame_len - first_frame * frame_len
+        hit = (local + ramp_len - half > 0) & (local - half < len(out))
+        bounds, local = bounds[hit], local[hit]
+        if len(bounds):
+            steps = np.arange(ramp_len)
+            pos = local[:, None] + (steps - half)[None, :]
+            g0 = ext[bounds - 1][:, None]
+            g1 = ext[bounds][:, None]
+            ramp = g0 + (g1 - g0) * ((steps + 0.5) / ramp_len)[None, :]
+            valid = (pos >= 0) & (pos < len(out))
+            pos, ramp = pos[valid], ramp[valid]
+            if out.ndim > 1:
+                ramp = ramp[:, None]
+            out[pos] = np.asarray(audio)[pos] * ramp
+    return out
+
+
+GATE_FRAME_MS = 20         # silence gate analysis frame
+GATE_RAMP_MS = 5           # gain ramp at each gate open/close
+
+
+def silence_gains(rms, percentile=25, floor=0.05):
+    """Per-frame gains: floor below the given percentile of non-zero RMS, 1.0 elsewhere."""
+    import numpy as np
+
+    threshold = np.percentile(rms[rms > 0], percentile) if np.any(rms > 0) else 0
+    return np.where(rms < threshold, floor, 1.0)
+
+
+def silence_gate(audio, sr, frame_ms=GATE_FRAME_MS, ramp_ms=GATE_RAMP_MS):
+    """Attenuate 20ms frames quieter than the 25th RMS percentile.
+
+    Returns (gated_audio, attenuated_frames, total_frames).
+    """
+    import numpy as np
+
+    frame_len = int(sr * frame_ms / 1000)
+    mono = audio if audio.ndim == 1 else audio.mean(axis=1)
+    rms = frame_rms(mono, frame_len)
+    gains = silence_gains(rms)
+    gated = apply_frame_gains(audio, gains, frame_len, ramp_len=int(sr * ramp_ms / 1000))
+    return gated, int(np.count_nonzero(gains < 1.0)), len(rms)
+
+
+@profiled("denoise")
+def denoise_audio_file(src_path, dst_path, args, tmp_dir, attenuate=True):
+    """Spectral gating, silence-gap attenuation and bandpass filtering.
+
+    Streams the file in fixed-size blocks so memory stays bounded
+    regardless of duration:
+      pass 1 - spectral gating per padded block against a noise profile
+               read once from the first 2s; per-frame RMS is recorded
+      pass 2 - silence-gap attenuation (5ms gain ramps) and Butterworth
+               filters with sosfilt state carried across blocks
+
+    The pass 1 output is a float32 WAV under tmp_dir, removed even when
+    a pass fails.
+
+    Raises ImportError when noisereduce/soundfile/scipy are not installed.
+    """
+    import numpy as np
+    import noisereduce as nr
+    import soundfile as sf
+    from scipy.signal import butter, sosfilt
+
+    block_seconds = getattr(args, "denoise_block", 30.0)
+
+    fd, gated_path = tempfile.mkstemp(suffix=".wav", prefix="denoise_", dir=tmp_dir)
+    os.close(fd)
+    try:
+        with sf.SoundFile(src_path) as src:
+            sr = src.samplerate
+            channels = src.channels
+            total = src.frames
+            frame_len = int(sr * GATE_FRAME_MS / 1000)
+            block = max(1, int(sr * block_seconds) // frame_len) * frame_len
+            pad = int(sr * 0.5)
+            print(f"  Audio: {total/sr:.1f}s @ {sr}Hz, {block/sr:.0f}s blocks")
+
+            noise_sample = src.read(min(total, int(sr * 2.0)), dtype="float64")
+
+            def gate(chunk):
+                # noisereduce expects (channels, samples) for multichannel input
+                if chunk.ndim == 1:
+                    return nr.reduce_noise(y=chunk, sr=sr, y_noise=noise_sample,
+                                           prop_decrease=args.denoise_strength, stationary=True)
+                return nr.reduce_noise(y=chunk.T, sr=sr, y_noise=noise_sample.T,
+                                       prop_decrease=args.denoise_strength, stationary=True).T
+
+            # Pass 1: spectral gating → float32 temp file
+            rms_blocks = []
+            with sf.SoundFile(gated_path, "w", samplerate=sr, channels=channels, subtype="FLOAT") as gated:
+                for start in range(0, total, block):
+                    lo = max(0, start - pad)
+                    hi = min(total, start + block + pad)
+                    src.seek(lo)
+                    chunk = gate(src.read(hi - lo, dtype="float64"))
+                    chunk = chunk[start - lo:start - lo + min(block, total - start)]
+                    gated.write(chunk)
+
+                    mono = chunk if chunk.ndim == 1 else chunk.mean(axis=1)
+                    rms_blocks.append(frame_rms(mono, frame_len))
+            print("  Spectral gating applied")
+
+        rms = np.concatenate(rms_blocks) if rms_blocks else np.zeros(0)
+        gains = silence_gains(rms)
+        ramp_len = int(sr * GATE_RAMP_MS / 1000)
+
+        # Pass 2: attenuation + bandpass → destination
+        hp = args.highpass
+        lp = args.lowpass
+        sos_hp = butter(4, hp, btype="high", fs=sr, output="sos")
+        sos_lp = butter(4, lp, btype="low", fs=sr, output="sos")
+        state_shape = (2,) if channels == 1 else (2, channels)
+        zi_hp = np.zeros((sos_hp.shape[0],) + state_shape)
+        zi_lp = np.zeros((sos_lp.shape[0],) + state_shape)
+
+        frame_idx = 0
+        with sf.SoundFile(gated_path) as gated, \
+                sf.SoundFile(dst_path, "w", samplerate=sr, channels=channels) as dst:
+            for chunk in gated.blocks(blocksize=block, dtype="float64"):
+                if attenuate:
+                    chunk = apply_frame_gains(chunk, gains, frame_len,
+                                              first_frame=frame_idx, ramp_len=ramp_len)
+                    frame_idx += len(chunk) // frame_len
+                chunk, zi_hp = sosfilt(sos_hp, chunk, axis=0, zi=zi_hp)
+                chunk, zi_lp = sosfilt(sos_lp, chunk, axis=0, zi=zi_lp)
+                dst.write(chunk)
+    finally:
+        os.remove(gated_path)
+
+    if attenuate:
+        attenuated = int(np.count_nonzero(gains < 1.0))
+        print(f"  Attenuated {attenuated}/{len(rms)} frames")
+    print(f"  Bandpass filter ({hp}Hz ~ {lp}Hz) applied")
+
+
+def execute_filter(input_path, output_path, keep_segments, info, tmp_dir, args, cache=None,
+                   index_path=None):
+    """Single-pass render: one filter graph instead of part files + concat.
+
+    In smart mode the video is smart-cut (see render_smart) instead of
+    being fully re-encoded by the filter graph. With index_path, the
+    final render also writes the edit index sidecar.
+    """
+    has_video = info["has_video"]
+    has_audio = info.get("has_audio", True)
+    denoise = not args.skip_denoise and has_audio
+    smart = args.render_mode == "smart" and has_video
+    loudness = args.loudness is not None and has_audio and has_video
+    index_dir = tmp_dir if index_path and has_video else None
+
+    if not denoise and not loudness:
+        t0 = time.time()
+        if smart:
+            print(f"=== Rendering {len(keep_segments)} segments (smart cut) ===")
+            render_smart(input_path, output_path, keep_segments, info, tmp_dir, args, cache=cache,
+                         index_dir=index_dir)
+        else:
+            print(f"=== Rendering {len(keep_segments)} segments (single pass) ===")
+            render_filter(input_path, output_path, keep_segments, tmp_dir, args,
+                          video=has_video, audio=has_audio, index_dir=index_dir)
+        print(f"  Done in {time.time()-t0:.1f}s")
+        if index_dir:
+            write_edit_index(index_path, keep_segments, input_path, tmp_dir, output_path)
+        return
+
+    # Edited audio only (cheap), so the denoiser never sees the video stream
+    print(f"=== Step 1: Rendering edited audio ({len(keep_segments)} segments) ===")
+    t0 = time.time()
+    raw_audio = os.path.join(tmp_dir, "audio_raw.wav")
+    render_audio(input_path, keep_segments, raw_audio, tmp_dir, cache=cache, jobs=args.jobs)
+    print(f"  Done in {time.time()-t0:.1f}s")
+
+    denoised_audio = raw_audio
+    if denoise:
+        print(f"\n=== Step 2: Audio denoising (strength={args.denoise_strength}) ===")
+        t1 = time.time()
+        try:
+            if has_video and cache is not None:
+                # Gating uses a noise profile and threshold over the whole edit,
+                # so the denoised track is cached per plan rather than per range
+                denoised_audio = cache.path(
+                    ["denoise", [[seg["start"], seg["end"]] for seg in keep_segments],
+                     args.denoise_strength, args.highpass, args.lowpass,
+                     getattr(args, "denoise_block", 30.0)],
+                    ".wav",
+                )
+                if os.path.exists(denoised_audio):
+                    cache.touch(denoised_audio)
+                    print("  Denoised audio reused from cache")
+                else:
+                    partial = f"{os.path.splitext(denoised_audio)[0]}.{os.getpid()}.partial.wav"
+                    denoise_audio_file(raw_audio, partial, args, tmp_dir)
+                    os.replace(partial, denoised_audio)
+                    cache.used.add(denoised_audio)
+            elif has_video:
                 denoised_audio = os.path.join(tmp_dir, "audio_denoised.wav")
-                sf.write(denoised_audio, audio, sr)
-
-                # Remux: video from concat + denoised audio
-                cmd = [
-                    "ffmpeg", "-y",
-                    "-i", concat_output,
-                    "-i", denoised_audio,
-                    "-c:v", "copy",
-                    "-c:a", "aac", "-b:a", args.audio_bitrate,
-                    "-map", "0:v:0", "-map", "1:a:0",
-                    output_path,
-                ]
+                denoise_audio_file(raw_audio, denoised_audio, args, tmp_dir)
+            else:
+                denoise_audio_file(raw_audio, output_path, args, tmp_dir, attenuate=False)
+                print(f"  Denoising done in {time.time()-t1:.1f}s")
+                return
+            print(f"  Denoising done in {time.time()-t1:.1f}s")
+        except ImportError:
+            print("  Warning: noisereduce/soundfile not installed. Skipping denoise.")
+            print("  Install: pip install noisereduce soundfile scipy")
+            if not has_video:
+                render_filter(input_path, output_path, keep_segments, tmp_dir, args,
+                              video=False, audio=True)
+                return
+
+    audio_filter = None
+    if loudness:
+        print(f"\n=== Loudness: measuring edited audio (target {args.loudness} LUFS) ===")
+        key = loudness_key(
+            "execute", file_fingerprint(input_path),
+            [[seg["start"], seg["end"]] for seg in keep_segments],
+            denoised_audio != raw_audio and [args.denoise_strength, args.highpass, args.lowpass],
+            loudness_targets(args),
+        )
+        measured = measure_loudness(denoised_audio, args, key, args.cache_dir)
+        if measured:
+            audio_filter = loudnorm_filter(measured, args)
+
+    t2 = time.time()
+    if smart:
+        print(f"\n=== Step 3: Rendering video ({len(keep_segments)} segments, smart cut) ===")
+        render_smart(input_path, output_path, keep_segments, info, tmp_dir, args,
+                     audio_source=denoised_audio, cache=cache, audio_filter=audio_filter,
+                     index_dir=index_dir)
+    else:
+        print(f"\n=== Step 3: Rendering video ({len(keep_segments)} segments, single pass) ===")
+        render_filter(input_path, output_path, keep_segments, tmp_dir, args,
+                      video=True, audio=True, audio_source=denoised_audio,
+                      audio_filter=audio_filter, index_dir=index_dir)
+    print(f"  Done in {time.time()-t2:.1f}s")
+    if index_dir:
+        write_edit_index(index_path, keep_segments, input_path, tmp_dir, output_path)
+
+
+def execute_parts(input_path, output_path, keep_segments, info, tmp_dir, args, cache=None):
+    """Legacy render: per-segment part files, concat demuxer, then denoise."""
+    ext = os.path.splitext(input_path)[1]
+    if args.loudness is not None:
+        print("Warning: --loudness is not applied in parts mode (use filter or smart)")
+    if args.index:
+        print("Note: no edit index is written in parts mode (use filter or smart)")
+
+    # Step 1: Extract KEEP segments
+    jobs = args.jobs or os.cpu_count() or 1
+    print(f"=== Step 1: Extracting KEEP segments ({jobs} jobs) ===")
+    t0 = time.time()
+    try:
+        part_files = extract_segments(input_path, keep_segments, tmp_dir, jobs=jobs, cache=cache)
+    except RuntimeError as e:
+        print(f"    ERROR: {e}")
+        sys.exit(1)
+
+    print(f"Extraction done in {time.time()-t0:.1f}s")
+
+    # Step 2: Concatenate
+    print(f"\n=== Step 2: Concatenating {len(part_files)} parts ===")
+    t1 = time.time()
+
+    concat_file = os.path.join(tmp_dir, "concat_list.txt")
+    with open(concat_file, "w") as f:
+        for pf in part_files:
+            f.write(f"file '{pf}'\n")
+
+    concat_output = os.path.join(tmp_dir, f"concatenated{ext}")
+    cmd = [
+        "ffmpeg", "-y",
+        "-f", "concat", "-safe", "0",
+        "-i", concat_file,
+        "-c", "copy",
+        concat_output,
+    ]
+    with stage("concat"):
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"  ERROR: {result.stderr[-300:]}")
+        sys.exit(1)
+
+    concat_dur = get_duration(concat_output)
+    print(f"  Concatenated: {concat_dur:.1f}s ({concat_dur/60:.1f}min)")
+    print(f"  Done in {time.time()-t1:.1f}s")
+
+    # Step 3: Audio denoising (optional)
+    import shutil
+    if not args.skip_denoise and info["has_video"]:
+        print(f"\n=== Step 3: Audio denoising (strength={args.denoise_strength}) ===")
+        t2 = time.time()
+
+        # Extract audio
+        raw_audio = os.path.join(tmp_dir, "audio_raw.wav")
+        cmd = [
+            "ffmpeg", "-y",
+            "-i", concat_output,
+            "-vn", "-acodec", "pcm_s16le",
+            "-ar", "44100", "-ac", "1",
+            raw_audio,
+        ]
+        with stage("extract_audio"):
+            subprocess.run(cmd, capture_output=True, text=True)
+
+        try:
+            denoised_audio = os.path.join(tmp_dir, "audio_denoised.wav")
+            denoise_audio_file(raw_audio, denoised_audio, args, tmp_dir)
+
+            # Remux: video from concat + denoised audio
+            cmd = [
+                "ffmpeg", "-y",
+                "-i", concat_output,
+                "-i", denoised_audio,
+                "-c:v", "copy",
+                "-c:a", "aac", "-b:a", args.audio_bitrate,
+                "-map", "0:v:0", "-map", "1:a:0",
+                output_path,
+            ]
+            with stage("remux"):
                 subprocess.run(cmd, capture_output=True, text=True)
-                print(f"  Denoising done in {time.time()-t2:.1f}s")
+            print(f"  Denoising done in {time.time()-t2:.1f}s")
 
-            except ImportError:
-                print("  Warning: noisereduce/soundfile not installed. Skipping denoise.")
-                print("  Install: pip install noisereduce soundfile scipy")
-                import shutil
-                shutil.copy2(concat_output, output_path)
+        except ImportError:
+            print("  Warning: noisereduce/soundfile not installed. Skipping denoise.")
+            print("  Install: pip install noisereduce soundfile scipy")
+            shutil.copy2(concat_output, output_path)
 
-        elif not args.skip_denoise and not info["has_video"]:
-            # Audio-only: denoise directly
-            print(f"\n=== Step 3: Audio denoising ===")
-            try:
-                import numpy as np
-                import noisereduce as nr
-                import soundfile as sf
-                from scipy.signal import butter, sosfilt
-
-                audio, sr = sf.read(concat_output)
-                noise_sample = audio[: int(sr * 2.0)]
-                audio = nr.reduce_noise(
-                    y=audio, sr=sr,
-                    y_noise=noise_sample,
-                    prop_decrease=args.denoise_strength,
-                    stationary=True,
-                )
+    elif not args.skip_denoise and not info["has_video"]:
+        # Audio-only: denoise directly
+        print(f"\n=== Step 3: Audio denoising ===")
+        try:
+            denoise_audio_file(concat_output, output_path, args, tmp_dir, attenuate=False)
+            print("  Denoised audio saved")
 
-                hp = args.highpass
-                lp = args.lowpass
-                sos_hp = butter(4, hp, btype="high", fs=sr, output="sos")
-                sos_lp = butter(4, lp, btype="low", fs=sr, output="sos")
-                audio = sosfilt(sos_hp, audio)
-                audio = sosfilt(sos_lp, audio)
+        except ImportError:
+            print("  Warning: noisereduce not installed. Skipping denoise.")
+            shutil.copy2(concat_output, output_path)
+    else:
+        shutil.copy2(concat_output, output_path)
+
+
+def splice_pcm(pcm, sample_rate, keep_segments, crossfade_ms=10.0):
+    """Concatenate KEEP ranges of a PCM array with short linear crossfades.
 
-                sf.write(output_path, audio, sr)
-                print("  Denoised audio saved")
+    Each join crossfades over crossfade_ms centred on the cut, using source
+    audio from both sides of it, so the output length is exactly the sum of
+    the KEEP durations and no click is left at the splice. pcm is mono or
+    (samples, channels); the output has the same layout.
+    """
+    import numpy as np
+
+    bounds = []
+    for seg in keep_segments:
+        a = max(0, int(round(seg["start"] * sample_rate)))
+        b = min(len(pcm), int(round(seg["end"] * sample_rate)))
+        if b > a:
+            bounds.append((a, b))
+
+    # Half-width of each join's crossfade, limited by the source and segment lengths
+    half = int(sample_rate * crossfade_ms / 2000)
+    joins = [
+        min(half, a2, len(pcm) - b1, (b1 - a1) // 2, (b2 - a2) // 2)
+        for (a1, b1), (a2, b2) in zip(bounds, bounds[1:])
+    ]
 
-            except ImportError:
-                print("  Warning: noisereduce not installed. Skipping denoise.")
-                import shutil
-                shutil.copy2(concat_output, output_path)
+    out = np.zeros((sum(b - a for a, b in bounds),) + pcm.shape[1:], dtype=np.float32)
+    channel_axes = (slice(None),) + (None,) * (pcm.ndim - 1)
+    pos = 0
+    for i, (a, b) in enumerate(bounds):
+        hl = joins[i - 1] if i > 0 else 0
+        hr = joins[i] if i < len(joins) else 0
+        piece = pcm[a - hl:b + hr].astype(np.float32)
+        if hl:
+            piece[:2 * hl] *= ((np.arange(2 * hl) + 0.5) / (2 * hl))[channel_axes]
+        if hr:
+            piece[-2 * hr:] *= (1 - (np.arange(2 * hr) + 0.5) / (2 * hr))[channel_axes]
+        out[pos - hl:pos + (b - a) + hr] += piece
+        pos += b - a
+    return out
+
+
+@profiled("denoise")
+def denoise_pcm(audio, sr, args, attenuate=True):
+    """In-memory counterpart of denoise_audio_file for float32 PCM
+    (mono or (samples, channels)).
+
+    Same stages and parameters (spectral gating per padded block against
+    the first 2s, optional silence gate, Butterworth bandpass), without
+    the temp files. Raises ImportError when noisereduce/scipy are missing.
+    """
+    import numpy as np
+    import noisereduce as nr
+    from scipy.signal import butter, sosfilt
+
+    block = int(sr * getattr(args, "denoise_block", 30.0))
+    pad = int(sr * 0.5)
+    noise_sample = audio[:int(sr * 2.0)].astype(np.float64)
+    gated = np.empty_like(audio, dtype=np.float32)
+    for start in range(0, len(audio), block):
+        lo = max(0, start - pad)
+        hi = min(len(audio), start + block + pad)
+        chunk = audio[lo:hi].astype(np.float64)
+        # noisereduce expects (channels, samples) for multichannel input
+        if chunk.ndim == 1:
+            chunk = nr.reduce_noise(y=chunk, sr=sr, y_noise=noise_sample,
+                                    prop_decrease=args.denoise_strength, stationary=True)
         else:
-            import shutil
-            shutil.copy2(concat_output, output_path)
+            chunk = nr.reduce_noise(y=chunk.T, sr=sr, y_noise=noise_sample.T,
+                                    prop_decrease=args.denoise_strength, stationary=True).T
+        n = min(block, len(audio) - start)
+        gated[start:start + n] = chunk[start - lo:start - lo + n]
+    print("  Spectral gating applied")
+
+    if attenuate:
+        gated, attenuated, frames = silence_gate(gated, sr)
+        print(f"  Attenuated {attenuated}/{frames} frames")
+
+    sos_hp = butter(4, args.highpass, btype="high", fs=sr, output="sos")
+    sos_lp = butter(4, args.lowpass, btype="low", fs=sr, output="sos")
+    out = sosfilt(sos_lp, sosfilt(sos_hp, gated, axis=0), axis=0).astype(np.float32)
+    print(f"  Bandpass filter ({args.highpass}Hz ~ {args.lowpass}Hz) applied")
+    return out
+
+
+@profiled("encode")
+def encode_pcm(audio, sample_rate, output_path, bitrate, audio_filter=None):
+    """Encode float32 PCM (mono or (samples, channels)) once: WAV directly,
+    other formats (or any audio_filter) via ffmpeg stdin."""
+    if output_path.lower().endswith(".wav") and not audio_filter:
+        write_wav_int16(output_path, audio, sample_rate)
+        return
+    channels = 1 if audio.ndim == 1 else audio.shape[1]
+    cmd = [
+        "ffmpeg", "-y", "-v", "error",
+        "-f", "f32le", "-ar", str(sample_rate), "-ac", str(channels), "-i", "pipe:0",
+    ]
+    if audio_filter:
+        cmd += ["-af", audio_filter]
+    if output_path.lower().endswith(".wav"):
+        cmd += ["-c:a", "pcm_s16le"]
+    elif not output_path.lower().endswith(".flac"):
+        cmd += ["-b:a", bitrate]
+    cmd.append(output_path)
+    result = subprocess.run(cmd, input=audio.tobytes(), capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Audio encode failed: {result.stderr.decode(errors='replace')[-300:]}")
+
+
+def execute_audio(input_path, output_path, keep_segments, args, index_path=None):
+    """Audio-only fast path: decode once, splice and denoise in memory, encode once.
+
+    No part files, concat list or intermediate WAVs; a single decode (in
+    process when soundfile can read the format) and a single encode, at
+    the source sample rate and channel layout.
+    With index_path, the per-second RMS of the spliced audio (before
+    loudness normalization) is written as the edit index.
+    Raises RuntimeError when the input cannot be decoded.
+    """
+    info = get_media_info(input_path)
+    sample_rate = info["sample_rate"] or 44100
+    channels = info["channels"] or 1
+    print(f"=== Audio-only render ({len(keep_segments)} segments, in memory, "
+          f"{sample_rate}Hz x{channels}) ===")
+    t0 = time.time()
+    with stage("decode"):
+        pcm = decode_audio(input_path, sample_rate, channels=channels)
+    if pcm is None:
+        raise RuntimeError(f"Could not decode audio: {input_path}")
+    with stage("splice"):
+        audio = splice_pcm(pcm, sample_rate, keep_segments, crossfade_ms=args.crossfade_ms)
+    del pcm
+    print(f"  Spliced {len(audio)/sample_rate:.1f}s ({args.crossfade_ms:g}ms crossfades) "
+          f"in {time.time()-t0:.1f}s")
+
+    denoised = False
+    if not args.skip_denoise:
+        print(f"\n=== Audio denoising (strength={args.denoise_strength}) ===")
+        t1 = time.time()
+        try:
+            audio = denoise_pcm(audio, sample_rate, args, attenuate=False)
+            denoised = True
+            print(f"  Denoising done in {time.time()-t1:.1f}s")
+        except ImportError:
+            print("  Warning: noisereduce/scipy not installed. Skipping denoise.")
+            print("  Install: pip install noisereduce scipy")
+
+    audio_filter = None
+    if args.loudness is not None:
+        print(f"\n=== Loudness: measuring edited audio (target {args.loudness} LUFS) ===")
+        key = loudness_key(
+            "execute-audio", file_fingerprint(input_path),
+            [[seg["start"], seg["end"]] for seg in keep_segments], args.crossfade_ms,
+            sample_rate, channels, denoised and [args.denoise_strength, args.highpass, args.lowpass],
+            loudness_targets(args),
+        )
+        measured = measure_loudness(None, args, key, args.cache_dir, pcm=audio, sample_rate=sample_rate)
+        if measured:
+            audio_filter = loudnorm_filter(measured, args, sample_rate)
+
+    encode_pcm(audio, sample_rate, output_path, args.audio_bitrate, audio_filter=audio_filter)
+    if index_path:
+        write_edit_index(index_path, keep_segments, input_path, rms_db=rms_per_second(audio, sample_rate))
+
+
+def cmd_execute(args):
+    """Execute an edit plan to produce the edited video/audio."""
+    input_path = args.input
+    plan_path = args.plan
+
+    if not os.path.exists(input_path):
+        print(f"Error: File not found: {input_path}", file=sys.stderr)
+        sys.exit(1)
+    if not os.path.exists(plan_path):
+        print(f"Error: Plan not found: {plan_path}", file=sys.stderr)
+        sys.exit(1)
+
+    with open(plan_path) as f:
+        plan = json.load(f)
+
+    info = get_media_info(input_path)
+    keep_segments = [e for e in plan if e["action"] == "KEEP"]
+
+    if not keep_segments:
+        print("Error: No KEEP segments in plan", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Input: {input_path}")
+    print(f"  Duration: {info['duration']:.1f}s ({info['duration']/60:.1f}min)")
+    print(f"  KEEP segments: {len(keep_segments)}")
+    print(f"  Render mode: {args.render_mode}")
+
+    keep_total = sum(e["end"] - e["start"] for e in keep_segments)
+    print(f"  Expected output: ~{keep_total:.0f}s ({keep_total/60:.1f}min)")
+    print()
+
+    # Determine output path
+    ext = os.path.splitext(input_path)[1]
+    if args.output:
+        output_path = args.output
+    else:
+        base = os.path.splitext(input_path)[0]
+        output_path = f"{base}_edited{ext}"
+
+    # Rendered segments are reused across runs (filter mode encodes in one pass, nothing to reuse)
+    cache = None
+    if not args.no_cache and args.render_mode in ("smart", "parts"):
+        max_bytes = int(args.cache_max_gb * 1024 ** 3) if args.cache_max_gb > 0 else None
+        cache = SegmentCache(args.cache_dir, input_path, max_bytes=max_bytes)
+
+    # Review sidecar written by the final render (not in parts mode)
+    index_path = edit_index_path(output_path) if args.index else None
+
+    # Create temp directory for intermediate files
+    tmp_dir = tempfile.mkdtemp(prefix="video_edit_")
+
+    try:
+        if not info["has_video"] and args.render_mode != "parts":
+            try:
+                execute_audio(input_path, output_path, keep_segments, args, index_path=index_path)
+            except (RuntimeError, ImportError) as e:
+                print(f"  ERROR: {e}")
+                print("  Falling back to --render-mode parts")
+                execute_parts(input_path, output_path, keep_segments, info, tmp_dir, args)
+        elif args.render_mode in ("filter", "smart"):
+            try:
+                execute_filter(input_path, output_path, keep_segments, info, tmp_dir, args, cache=cache,
+                               index_path=index_path)
+            except RuntimeError as e:
+                print(f"  ERROR: {e}")
+                print("  Falling back to --render-mode parts")
+                execute_parts(input_path, output_path, keep_segments, info, tmp_dir, args, cache=cache)
+        else:
+            execute_parts(input_path, output_path, keep_segments, info, tmp_dir, args, cache=cache)
 
     finally:
         # Cleanup temp directory
         import shutil
         shutil.rmtree(tmp_dir, ignore_errors=True)
 
+    if cache is not None:
+        removed, freed = cache.prune()
+        if removed:
+            print(f"  Segment cache: pruned {removed} old entries ({freed/1024/1024:.0f}MB)")
+
     # Report results
     out_info = get_media_info(output_path)
     print(f"\n{'=' * 60}")
@@ -753,10 +2632,11 @@ def cmd_tts_prepare(args):
     print(f"Edit plan entries: {len(edit_plan)}")
 
     # Map timestamps to edited timeline
+    plan = EditPlan(edit_plan)
     mapped = []
     for seg in segments:
-        edited_start = original_to_edited(seg["start"], edit_plan)
-        edited_end = original_to_edited(seg["end"], edit_plan)
+        edited_start = plan.to_edited(seg["start"])
+        edited_end = plan.to_edited(seg["end"])
         if edited_start is not None and edited_end is not None and edited_end > edited_start:
             mapped.append({
                 "start": edited_start,
@@ -818,10 +2698,406 @@ def cmd_tts_prepare(args):
     print(f"  python video_editor.py tts-generate \"{args.input}\" \"{segments_path}\" --voice-id YOUR_VOICE_ID")
 
 
+# ──────────────────────────────────────────────
+# Subtitles Command
+# ──────────────────────────────────────────────
+
+def whisper_words(segments):
+    """Flatten Whisper segments into word dicts (segments without word
+    timestamps become a single word)."""
+    words = []
+    for seg in segments:
+        seg_words = seg.get("words") or [
+            {"word": seg.get("text", ""), "start": seg["start"], "end": seg["end"]}
+        ]
+        for w in seg_words:
+            if w.get("start") is None or w.get("end") is None:
+                continue
+            words.append({"word": w.get("word", ""), "start": w["start"], "end": w["end"]})
+    return words
+
+
+def map_words(words, plan):
+    """Map word timestamps onto the edited timeline in one vectorized pass.
+
+    Words starting or ending inside a REMOVE range are dropped. Words that
+    follow a cut (a dropped word or removed time since the previous kept
+    word) get cut_before=True so cues never span an edit. Zero-length
+    words, which Whisper emits at segment boundaries, have no span of
+    their own: their text is joined to the neighbouring kept word on the
+    same side of any cut, so they never create a cut.
+    """
+    import numpy as np
+
+    orig_starts = np.array([w["start"] for w in words], dtype=np.float64)
+    orig_ends = np.array([w["end"] for w in words], dtype=np.float64)
+    starts = plan.to_edited_array(orig_starts, ndigits=None)
+    ends = plan.to_edited_array(orig_ends, ndigits=None)
+    spans = np.flatnonzero(orig_ends > orig_starts)
+    keep = ~(np.isnan(starts[spans]) | np.isnan(ends[spans])) & (ends[spans] > starts[spans])
+    pos = np.flatnonzero(keep)
+    idx = spans[pos]
+    # Removed time before each word start vs. before the previous kept word's end
+    shift = orig_starts[idx] - starts[idx]
+    end_shift = (orig_ends - ends)[idx]
+    prev_shift = np.concatenate(([0.0], end_shift[:-1]))
+    cut_before = (np.diff(pos, prepend=-1) > 1) | (shift - prev_shift > 1e-6)
+    cut_before[:1] = False
+    mapped = []
+    for n, i in enumerate(idx):
+        mapped.append({
+            "word": words[i]["word"],
+            "start": round(float(starts[i]), 3),
+            "end": round(float(ends[i]), 3),
+            "cut_before": bool(cut_before[n]),
+        })
+
+    if mapped:
+        prefix = {}
+        for i in np.flatnonzero(~(orig_ends > orig_starts) & ~np.isnan(starts)):
+            n = int(np.searchsorted(idx, i))
+            point_shift = orig_starts[i] - starts[i]
+            if n and (n == len(idx) or abs(point_shift - end_shift[n - 1]) <= 1e-6):
+                mapped[n - 1]["word"] += words[i]["word"]
+            else:
+                prefix[n] = prefix.get(n, "") + words[i]["word"]
+        for n, text in prefix.items():
+            mapped[n]["word"] = text + mapped[n]["word"]
+    return mapped
+
+
+def chunk_cues(words, max_chars=32, max_duration=6.0, max_gap=1.0, min_comma_chars=12, trie=None):
+    """Group mapped words into subtitle cues.
+
+    A cue closes at a sentence ending (classify_ending), at a comma
+    connector once it has min_comma_chars, before it would exceed max_chars
+    or max_duration, at pauses longer than max_gap, and at every cut.
+    """
+    cues = []
+    current = []
+
+    def flush():
+        if current:
+            text = "".join(w["word"] for w in current).strip()
+            if text:
+                cues.append({"start": current[0]["start"], "end": current[-1]["end"], "text": text})
+            current.clear()
+
+    for w in words:
+        if current:
+            text = "".join(x["word"] for x in current) + w["word"]
+            if (w.get("cut_before")
+                    or w["start"] - current[-1]["end"] > max_gap
+                    or len(text.strip()) > max_chars
+                    or w["end"] - current[0]["start"] > max_duration):
+                flush()
+        current.append(w)
+        text = "".join(x["word"] for x in current).strip()
+        _, reason = classify_ending(text, trie=trie)
+        if reason in ("punctuation", "ending") or (reason == "comma" and len(text) >= min_comma_chars):
+            flush()
+    flush()
+    return cues
+
+
+def fmt_timestamp(seconds, sep=","):
+    """Format seconds as HH:MM:SS,mmm (SRT) or HH:MM:SS.mmm (sep=".", VTT)."""
+    ms = int(round(max(0.0, seconds) * 1000))
+    h, ms = divmod(ms, 3600000)
+    m, ms = divmod(ms, 60000)
+    s, ms = divmod(ms, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d}{sep}{ms:03d}"
+
+
+def write_subtitles(cues, path, fmt="srt"):
+    """Write cues as SRT or WebVTT."""
+    sep = "," if fmt == "srt" else "."
+    lines = ["WEBVTT", ""] if fmt == "vtt" else []
+    for i, cue in enumerate(cues, 1):
+        if fmt == "srt":
+            lines.append(str(i))
+        lines.append(f"{fmt_timestamp(cue['start'], sep)} --> {fmt_timestamp(cue['end'], sep)}")
+        lines.append(cue["text"])
+        lines.append("")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+
+
+def cmd_subtitles(args):
+    """Write SRT/VTT subtitles for the edited video from word timestamps."""
+    if not os.path.exists(args.whisper):
+        print(f"Error: Whisper file not found: {args.whisper}", file=sys.stderr)
+        sys.exit(1)
+    if not os.path.exists(args.plan):
+        print(f"Error: Edit plan not found: {args.plan}", file=sys.stderr)
+        sys.exit(1)
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        print("Error: numpy not installed. Run: pip install numpy", file=sys.stderr)
+        sys.exit(1)
+
+    with open(args.whisper) as f:
+        whisper_data = json.load(f)
+    segments = whisper_data.get("segments", whisper_data) if isinstance(whisper_data, dict) else whisper_data
+    if isinstance(segments, dict):
+        segments = segments.get("segments", [])
+
+    words = whisper_words(segments)
+    mapped = map_words(words, EditPlan.load(args.plan))
+    print(f"Words: {len(words)} ({len(words) - len(mapped)} in removed ranges)")
+
+    if args.corrections and os.path.exists(args.corrections):
+        with open(args.corrections) as f:
+            corrections = json.load(f)
+    else:
+        corrections = {}
+
+    trie = load_ending_trie(args.endings) if args.endings else None
+    cues = chunk_cues(mapped, max_chars=args.max_chars, max_duration=args.max_duration,
+                      max_gap=args.max_gap, trie=trie)
+    for cue in cues:
+        for wrong, correct in corrections.items():
+            cue["text"] = cue["text"].replace(wrong, correct)
+    print(f"Cues: {len(cues)}")
+
+    output_base = args.output
+    if not output_base:
+        output_base = os.path.splitext(args.whisper)[0]
+        if output_base.endswith("_whisper"):
+            output_base = output_base[:-len("_whisper")]
+        output_base += "_edited"
+    formats = ["srt", "vtt"] if args.format == "both" else [args.format]
+    for fmt in formats:
+        path = f"{output_base}.{fmt}"
+        write_subtitles(cues, path, fmt)
+        print(f"Subtitles saved: {path}")
+
+
 # ──────────────────────────────────────────────
 # TTS Generate Command
 # ──────────────────────────────────────────────
 
+class TokenBucket:
+    """Thread-safe token bucket: `rate` requests/second, bursts up to `capacity`.
+
+    A rate of 0 means unlimited. pause() holds every caller of acquire()
+    until the given time has passed, e.g. for a server's Retry-After.
+    """
+
+    def __init__(self, rate, capacity=None):
+        import threading
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def pause(self, seconds):
+        """Stop handing out tokens for `seconds` and drain the burst allowance."""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+            self.updated = self.paused_until
+
+    def acquire(self):
+        """Block until a token is available, then take it."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                elif self.rate <= 0:
+                    return
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def retry_after_seconds(resp, attempt):
+    """Seconds to wait after a 429: Retry-After header or exponential backoff."""
+    value = resp.headers.get("Retry-After")
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+    return 2 ** attempt * 5
+
+
+@profiled("tts_requests")
+def generate_tts_files(segments, tts_dir, url, headers, voice_settings, model_id,
+                       concurrency=4, rate=2.0, retries=3, force=False):
+    """Generate tts_NNN.mp3 for every segment with bounded concurrency.
+
+    Existing non-empty files are reused unless force is set. Requests share
+    one HTTP session and a token bucket (rate 0 = unlimited). A 429 pauses
+    the shared bucket for Retry-After, so all workers back off; other
+    failures retry after 2**attempt seconds. Returns (success, errors).
+    """
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    bucket = TokenBucket(rate)
+    lock = threading.Lock()
+    counts = {"success": 0, "errors": 0, "done": 0}
+    t0 = time.time()
+
+    def finish(i, ok, cached=False):
+        with lock:
+            counts["success" if ok else "errors"] += 1
+            counts["done"] += 1
+            done = counts["done"]
+        if done % 20 == 0 or done == len(segments):
+            note = " (cached)" if cached else ""
+            print(f"  {done:03d}/{len(segments)} ({time.time()-t0:.0f}s){note}")
+
+    def generate(i):
+        seg = segments[i]
+        tts_file = os.path.join(tts_dir, f"tts_{i:03d}.mp3")
+
+        # Skip if already generated (cache)
+        if os.path.exists(tts_file) and os.path.getsize(tts_file) > 0 and not force:
+            finish(i, True, cached=True)
+            return
+
+        body = {
+            "text": seg["text"],
+            "model_id": model_id,
+            "voice_settings": voice_settings,
+        }
+        for attempt in range(retries):
+            bucket.acquire()
+            try:
+                resp = session.post(url, headers=headers, json=body, timeout=60)
+                if resp.status_code == 200:
+                    tmp_file = tts_file + ".part"
+                    with open(tmp_file, "wb") as f:
+                        f.write(resp.content)
+                    os.replace(tmp_file, tts_file)
+                    finish(i, True)
+                    return
+                elif resp.status_code == 429:
+                    wait = retry_after_seconds(resp, attempt)
+                    print(f"  {i:03d} rate limited, pausing requests for {wait:.0f}s...")
+                    bucket.pause(wait)
+                    continue
+                else:
+                    print(f"  {i:03d} ERROR: HTTP {resp.status_code} - {resp.text[:100]}")
+            except Exception as e:
+                print(f"  {i:03d} ERROR: {e}")
+            if attempt + 1 < retries:
+                time.sleep(2 ** attempt)
+        finish(i, False)
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(generate, range(len(segments))))
+    finally:
+        session.close()
+    return counts["success"], counts["errors"]
+
+
+_DECODE_FALLBACK_WARNED = False
+
+
+def _warn_decode_fallback(reason):
+    """Report the first in-process decode fallback to ffmpeg (once per run)."""
+    global _DECODE_FALLBACK_WARNED
+    if not _DECODE_FALLBACK_WARNED:
+        _DECODE_FALLBACK_WARNED = True
+        print(f"  Warning: {reason}; decoding with ffmpeg instead")
+
+
+def decode_audio(path, sample_rate, channels=1):
+    """Decode an audio file to float32 PCM at sample_rate.
+
+    channels=1 downmixes to a 1-D mono array; otherwise the result is
+    (samples, channels), so pass the source channel count to keep its
+    layout. Decodes in-process with soundfile (libsndfile >= 1.1 reads MP3) and
+    resamples when needed; falls back to an ffmpeg subprocess when
+    soundfile/scipy are missing or libsndfile cannot read the file (the
+    first fallback is reported). Returns None if the file cannot be decoded.
+    """
+    import numpy as np
+
+    try:
+        import soundfile as sf
+        # LibsndfileError (soundfile >= 0.11) subclasses RuntimeError
+        decode_errors = (RuntimeError, getattr(sf, "LibsndfileError", RuntimeError))
+    except ImportError as e:
+        sf = None
+        _warn_decode_fallback(f"soundfile not installed ({e})")
+
+    if sf is not None:
+        try:
+            pcm, sr = sf.read(path, dtype="float32", always_2d=True)
+            if channels == 1:
+                pcm = pcm.mean(axis=1) if pcm.shape[1] > 1 else pcm[:, 0]
+            if sr != sample_rate:
+                from math import gcd
+                from scipy.signal import resample_poly
+                g = gcd(sr, sample_rate)
+                pcm = resample_poly(pcm, sample_rate // g, sr // g, axis=0).astype(np.float32)
+            return pcm
+        except ImportError as e:
+            _warn_decode_fallback(f"scipy not installed for resampling ({e})")
+        except decode_errors as e:
+            _warn_decode_fallback(f"soundfile could not decode {os.path.basename(path)}: {e}")
+
+    cmd = [
+        "ffmpeg", "-y", "-v", "quiet",
+        "-i", path,
+        "-f", "f32le", "-acodec", "pcm_f32le",
+        "-ar", str(sample_rate), "-ac", str(channels),
+        "pipe:1"
+    ]
+    result = subprocess.run(cmd, capture_output=True)
+    if result.returncode != 0:
+        return None
+    pcm = np.frombuffer(result.stdout, dtype=np.float32)
+    return pcm if channels == 1 else pcm.reshape(-1, channels)
+
+
+def decode_audio_files(paths, sample_rate, jobs=None):
+    """Decode many files in parallel; yields (index, pcm) in input order."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    jobs = max(1, jobs or os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        for i, pcm in enumerate(pool.map(lambda p: decode_audio(p, sample_rate), paths)):
+            yield i, pcm
+
+
+@profiled("write_wav")
+def write_wav_int16(path, samples, sample_rate, scale=1.0, block=1 << 20):
+    """Write float samples (mono or (samples, channels)) as 16-bit WAV in
+    blocks (no full-length copies)."""
+    import numpy as np
+
+    with wave.open(path, "w") as wf:
+        wf.setnchannels(1 if samples.ndim == 1 else samples.shape[1])
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        for start in range(0, len(samples), block):
+            chunk = np.asarray(samples[start:start + block], dtype=np.float32) * (scale * 32767)
+            np.clip(chunk, -32768, 32767, out=chunk)
+            wf.writeframes(chunk.astype(np.int16).tobytes())
+
+
 def cmd_tts_generate(args):
     """Generate TTS audio and create video with new narration."""
     try:
@@ -868,64 +3144,27 @@ def cmd_tts_generate(args):
     output_base = args.output or os.path.splitext(args.input)[0]
     tts_dir = output_base + "_tts"
     os.makedirs(tts_dir, exist_ok=True)
+    enable_probe_cache(os.path.join(tts_dir, ".probe_cache.json"))
 
     # Generate TTS for each segment
-    print(f"=== Generating TTS ({len(segments)} segments) ===")
+    rate_note = f"{args.rate:g} req/s" if args.rate else "no rate limit"
+    print(f"=== Generating TTS ({len(segments)} segments, "
+          f"{args.concurrency} concurrent, {rate_note}) ===")
     t0 = time.time()
-    url = f"https://api.elevenlabs.io/v1/text-to-speech/{args.voice_id}"
+    url = f"{args.api_base.rstrip('/')}/v1/text-to-speech/{args.voice_id}"
     headers = {
         "xi-api-key": api_key,
         "Content-Type": "application/json",
     }
-
-    success = 0
-    errors = 0
-    for i, seg in enumerate(segments):
-        tts_file = os.path.join(tts_dir, f"tts_{i:03d}.mp3")
-
-        # Skip if already generated (cache)
-        if os.path.exists(tts_file) and os.path.getsize(tts_file) > 0 and not args.force:
-            success += 1
-            if i % 20 == 0:
-                print(f"  {i:03d}/{len(segments)} (cached)")
-            continue
-
-        body = {
-            "text": seg["text"],
-            "model_id": args.tts_model,
-            "voice_settings": {
-                "stability": args.stability,
-                "similarity_boost": args.similarity_boost,
-                "style": args.style,
-            }
-        }
-
-        retries = 3
-        for attempt in range(retries):
-            try:
-                resp = requests.post(url, headers=headers, json=body, timeout=60)
-                if resp.status_code == 200:
-                    with open(tts_file, 'wb') as f:
-                        f.write(resp.content)
-                    success += 1
-                    break
-                elif resp.status_code == 429:
-                    wait = 2 ** attempt * 5
-                    print(f"  {i:03d} rate limited, waiting {wait}s...")
-                    time.sleep(wait)
-                else:
-                    print(f"  {i:03d} ERROR: HTTP {resp.status_code} - {resp.text[:100]}")
-                    if attempt == retries - 1:
-                        errors += 1
-            except Exception as e:
-                print(f"  {i:03d} ERROR: {e}")
-                if attempt == retries - 1:
-                    errors += 1
-                time.sleep(2)
-
-        if i % 20 == 0:
-            elapsed = time.time() - t0
-            print(f"  {i:03d}/{len(segments)} ({elapsed:.0f}s)")
+    voice_settings = {
+        "stability": args.stability,
+        "similarity_boost": args.similarity_boost,
+        "style": args.style,
+    }
+    success, errors = generate_tts_files(
+        segments, tts_dir, url, headers, voice_settings, args.tts_model,
+        concurrency=args.concurrency, rate=args.rate, retries=args.retries, force=args.force,
+    )
 
     elapsed = time.time() - t0
     print(f"\nTTS done in {elapsed:.0f}s | Success: {success} | Errors: {errors}")
@@ -937,58 +3176,55 @@ def cmd_tts_generate(args):
     print(f"\n=== Assembling TTS timeline ===")
     sample_rate = 44100
     total_samples = int(video_dur * sample_rate)
-    canvas = np.zeros(total_samples, dtype=np.float32)
+    # Disk-backed canvas: untouched pages stay sparse, so memory stays flat
+    canvas_path = tempfile.mktemp(suffix=".f32")
+    canvas = np.memmap(canvas_path, dtype=np.float32, mode="w+", shape=(max(1, total_samples),))
+    peak = 0.0
+
+    # Decode all clips in-process, in parallel
+    indices = [
+        i for i in range(len(segments))
+        if os.path.exists(os.path.join(tts_dir, f"tts_{i:03d}.mp3"))
+    ]
+    tts_files = [os.path.join(tts_dir, f"tts_{i:03d}.mp3") for i in indices]
 
     placed = 0
-    for i, seg in enumerate(segments):
-        tts_file = os.path.join(tts_dir, f"tts_{i:03d}.mp3")
-        if not os.path.exists(tts_file):
-            continue
-
-        # Decode MP3 to raw PCM
-        cmd = [
-            "ffmpeg", "-y", "-v", "quiet",
-            "-i", tts_file,
-            "-f", "f32le", "-acodec", "pcm_f32le",
-            "-ar", str(sample_rate), "-ac", "1",
-            "pipe:1"
-        ]
-        result = subprocess.run(cmd, capture_output=True)
-        if result.returncode != 0:
-            continue
-
-        pcm = np.frombuffer(result.stdout, dtype=np.float32)
-        start_sample = int(seg["start"] * sample_rate)
-
-        # Limit to available space before next segment
-        if i + 1 < len(segments):
-            max_end = int(segments[i + 1]["start"] * sample_rate)
-        else:
-            max_end = total_samples
-        available = max_end - start_sample
-        if len(pcm) > available:
-            pcm = pcm[:available]
-
-        end_sample = min(start_sample + len(pcm), total_samples)
-        actual_len = end_sample - start_sample
-        canvas[start_sample:end_sample] = pcm[:actual_len]
-        placed += 1
-
-    print(f"  Placed {placed}/{len(segments)} segments")
-
-    # Normalize
-    peak = np.max(np.abs(canvas))
-    if peak > 0:
-        canvas = canvas / peak * 0.95
-
-    # Save as WAV
+    t1 = time.time()
+    with stage("assemble"):
+        for k, pcm in decode_audio_files(tts_files, sample_rate):
+            if pcm is None:
+                continue
+            i = indices[k]
+            seg = segments[i]
+            start_sample = int(seg["start"] * sample_rate)
+
+            # Limit to available space before next segment
+            if i + 1 < len(segments):
+                max_end = int(segments[i + 1]["start"] * sample_rate)
+            else:
+                max_end = total_samples
+            available = max_end - start_sample
+            if len(pcm) > available:
+                pcm = pcm[:available]
+
+            end_sample = min(start_sample + len(pcm), total_samples)
+            actual_len = end_sample - start_sample
+            if actual_len <= 0:
+                continue
+            canvas[start_sample:end_sample] = pcm[:actual_len]
+            peak = max(peak, float(np.max(np.abs(pcm[:actual_len]))))
+            placed += 1
+
+    print(f"  Placed {placed}/{len(segments)} segments in {time.time()-t1:.1f}s")
+
+    # Normalize (from the tracked peak) and save as WAV in blocks
     tmp_wav = tempfile.mktemp(suffix=".wav")
-    canvas_int16 = (canvas * 32767).astype(np.int16)
-    with wave.open(tmp_wav, 'w') as wf:
-        wf.setnchannels(1)
-        wf.setsampwidth(2)
-        wf.setframerate(sample_rate)
-        wf.writeframes(canvas_int16.tobytes())
+    scale = 0.95 / peak if peak > 0 else 1.0
+    try:
+        write_wav_int16(tmp_wav, canvas[:total_samples], sample_rate, scale=scale)
+    finally:
+        del canvas
+        os.remove(canvas_path)
 
     # Optional denoise
     if not args.skip_denoise:
@@ -998,25 +3234,39 @@ def cmd_tts_generate(args):
             import soundfile as sf
             from scipy.signal import butter, sosfilt
 
-            audio, sr = sf.read(tmp_wav, dtype='float32')
-            audio = nr.reduce_noise(y=audio, sr=sr, prop_decrease=args.denoise_strength, stationary=True)
+            with stage("denoise"):
+                audio, sr = sf.read(tmp_wav, dtype='float32')
+                audio = nr.reduce_noise(y=audio, sr=sr, prop_decrease=args.denoise_strength, stationary=True)
 
-            nyq = sr / 2
-            sos_hp = butter(4, args.highpass / nyq, btype='highpass', output='sos')
-            sos_lp = butter(4, args.lowpass / nyq, btype='lowpass', output='sos')
-            audio = sosfilt(sos_hp, audio)
-            audio = sosfilt(sos_lp, audio)
+                nyq = sr / 2
+                sos_hp = butter(4, args.highpass / nyq, btype='highpass', output='sos')
+                sos_lp = butter(4, args.lowpass / nyq, btype='lowpass', output='sos')
+                audio = sosfilt(sos_hp, audio)
+                audio = sosfilt(sos_lp, audio)
 
-            peak = np.max(np.abs(audio))
-            if peak > 0:
-                audio = audio / peak * 0.95
+                peak = np.max(np.abs(audio))
+                if peak > 0:
+                    audio = audio / peak * 0.95
 
-            sf.write(tmp_wav, audio, sr, subtype='PCM_16')
+                sf.write(tmp_wav, audio, sr, subtype='PCM_16')
             print("  Denoising applied")
 
         except ImportError:
             print("  Warning: noisereduce/soundfile not installed. Skipping denoise.")
 
+    # Loudness: measure the narration once, normalize during the remux encode
+    audio_filter = None
+    if args.loudness is not None:
+        print(f"\n=== Loudness: measuring narration (target {args.loudness} LUFS) ===")
+        key = loudness_key("tts", pcm_digest(tmp_wav), loudness_targets(args))
+        try:
+            measured = measure_loudness(tmp_wav, args, key)
+        except RuntimeError as e:
+            print(f"  Warning: {e}")
+            measured = None
+        if measured:
+            audio_filter = loudnorm_filter(measured, args, sample_rate)
+
     # Remux with video
     ext = os.path.splitext(args.input)[1]
     output_path = output_base + "_tts" + ext
@@ -1029,9 +3279,12 @@ def cmd_tts_generate(args):
         "-c:a", "aac", "-b:a", args.audio_bitrate,
         "-map", "0:v:0", "-map", "1:a:0",
         "-shortest",
-        output_path,
     ]
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    if audio_filter:
+        cmd += ["-af", audio_filter]
+    cmd.append(output_path)
+    with stage("remux"):
+        result = subprocess.run(cmd, capture_output=True, text=True)
     os.remove(tmp_wav)
 
     if result.returncode != 0:
@@ -1067,23 +3320,28 @@ def cmd_trim_silence(args):
     with open(args.segments) as f:
         segments = json.load(f)
 
+    enable_probe_cache(os.path.join(args.tts_dir, ".probe_cache.json"))
     video_dur = get_duration(args.input)
 
-    # Get actual TTS durations
+    # Get actual TTS durations (cached per file, cache misses probed in batches)
     print("Getting TTS audio durations...")
-    tts_durs = []
-    for i in range(len(segments)):
-        tts_file = os.path.join(args.tts_dir, f"tts_{i:03d}.mp3")
-        if os.path.exists(tts_file):
-            tts_durs.append(get_duration(tts_file))
-        else:
-            tts_durs.append(segments[i]["duration"])
+    tts_files = [os.path.join(args.tts_dir, f"tts_{i:03d}.mp3") for i in range(len(segments))]
+    existing = [p for p in tts_files if os.path.exists(p)]
+    probed = dict(zip(existing, probe_durations(existing)))
+    tts_durs = [
+        probed[p] if p in probed else segments[i]["duration"]
+        for i, p in enumerate(tts_files)
+    ]
 
     # Build KEEP segments
     mode = args.mode
     print(f"Mode: {mode}")
+    trie = None
     if mode == "dynamic":
         print(f"  Caps: sentence={args.cap_sentence}s, comma={args.cap_comma}s, continue={args.cap_continue}s")
+        if args.endings:
+            trie = load_ending_trie(args.endings)
+            print(f"  Endings dictionary: {args.endings}")
     else:
         print(f"  Fixed cap: {args.cap}s")
 
@@ -1106,6 +3364,7 @@ def cmd_trim_silence(args):
                     cap_sentence=args.cap_sentence,
                     cap_comma=args.cap_comma,
                     cap_continue=args.cap_continue,
+                    trie=trie,
                 )
                 stats[reason] += 1
             else:
@@ -1129,49 +3388,51 @@ def cmd_trim_silence(args):
     if mode == "dynamic":
         print(f"Classification: {stats}")
 
+    ext = os.path.splitext(args.input)[1]
+    if args.output:
+        output_path = args.output
+    else:
+        base = os.path.splitext(args.input)[0]
+        if mode == "dynamic":
+            output_path = f"{base}_trimmed{ext}"
+        else:
+            output_path = f"{base}_trimmed_{args.cap}s{ext}"
+
     # Extract and concatenate
     tmp_dir = tempfile.mkdtemp(prefix="trim_silence_")
     try:
-        print(f"\nExtracting {len(keep_segments)} segments...")
-        parts = []
-        for i, seg in enumerate(keep_segments):
-            part_file = os.path.join(tmp_dir, f"part_{i:03d}.mp4")
-            parts.append(part_file)
+        rendered = False
+        if args.render_mode == "smart":
+            print(f"\nSmart-cutting {len(keep_segments)} segments...")
+            try:
+                render_smart(args.input, output_path, keep_segments,
+                             get_media_info(args.input), tmp_dir, args)
+                rendered = True
+            except RuntimeError as e:
+                print(f"  ERROR: {e}")
+                print("  Falling back to --render-mode copy")
+
+        if not rendered:
+            jobs = args.jobs or os.cpu_count() or 1
+            print(f"\nExtracting {len(keep_segments)} segments ({jobs} jobs)...")
+            parts = extract_segments(args.input, keep_segments, tmp_dir, jobs=jobs,
+                                     input_seek=False, verbose=False)
+
+            concat_file = os.path.join(tmp_dir, "concat.txt")
+            with open(concat_file, "w") as f:
+                for p in parts:
+                    f.write(f"file '{p}'\n")
+
+            print("Concatenating...")
             cmd = [
                 "ffmpeg", "-y", "-v", "quiet",
-                "-i", args.input,
-                "-ss", str(seg["start"]),
-                "-to", str(seg["end"]),
+                "-f", "concat", "-safe", "0",
+                "-i", concat_file,
                 "-c", "copy",
-                "-avoid_negative_ts", "make_zero",
-                part_file,
+                output_path,
             ]
-            subprocess.run(cmd, check=True)
-
-        concat_file = os.path.join(tmp_dir, "concat.txt")
-        with open(concat_file, "w") as f:
-            for p in parts:
-                f.write(f"file '{p}'\n")
-
-        ext = os.path.splitext(args.input)[1]
-        if args.output:
-            output_path = args.output
-        else:
-            base = os.path.splitext(args.input)[0]
-            if mode == "dynamic":
-                output_path = f"{base}_trimmed{ext}"
-            else:
-                output_path = f"{base}_trimmed_{args.cap}s{ext}"
-
-        print("Concatenating...")
-        cmd = [
-            "ffmpeg", "-y", "-v", "quiet",
-            "-f", "concat", "-safe", "0",
-            "-i", concat_file,
-            "-c", "copy",
-            output_path,
-        ]
-        subprocess.run(cmd, check=True)
+            with stage("concat"):
+                subprocess.run(cmd, check=True)
 
     finally:
         import shutil
@@ -1187,10 +3448,397 @@ def cmd_trim_silence(args):
     print(f"  Saved to: {output_path}")
 
 
+# ──────────────────────────────────────────────
+# Batch Command
+# ──────────────────────────────────────────────
+
+MEDIA_EXTS = (".mp4", ".mov", ".mkv", ".webm", ".m4a", ".mp3", ".wav")
+OUTPUT_SUFFIXES = ("_edited", "_tts", "_trimmed")
+
+
+def collect_batch_inputs(source):
+    """List input files from a directory or a manifest (JSON list or text)."""
+    if os.path.isdir(source):
+        files = []
+        for name in sorted(os.listdir(source)):
+            stem, ext = os.path.splitext(name)
+            if ext.lower() not in MEDIA_EXTS:
+                continue
+            if any(stem.endswith(suffix) for suffix in OUTPUT_SUFFIXES):
+                continue
+            files.append(os.path.join(source, name))
+        return files
+
+    with open(source) as f:
+        if source.endswith(".json"):
+            return list(json.load(f))
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def is_up_to_date(outputs, inputs):
+    """True when every output exists and is newer than every input."""
+    if not all(os.path.exists(p) for p in outputs):
+        return False
+    newest_input = max(os.path.getmtime(p) for p in inputs)
+    return min(os.path.getmtime(p) for p in outputs) >= newest_input
+
+
+def load_batch_state(state_path):
+    """Settings each stage last ran with, from <base>_batch_state.json."""
+    try:
+        with open(state_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def record_batch_state(state_path, stage, settings):
+    """Remember the settings a stage ran with (written atomically)."""
+    state = load_batch_state(state_path)
+    state[stage] = settings
+    partial = f"{state_path}.{os.getpid()}.partial"
+    with open(partial, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(partial, state_path)
+
+
+def run_batch_job(input_path, args, whisper_slots, render_slots):
+    """Run analyze then execute for one file; returns its summary entry."""
+    base, ext = os.path.splitext(input_path)
+    plan_path = base + "_edit_plan.json"
+    output_path = f"{base}_edited{ext}"
+    log_path = base + "_batch.log"
+    state_path = base + "_batch_state.json"
+    script = os.path.abspath(__file__)
+    entry = {"input": input_path, "status": "ok", "skipped": []}
+
+    # Split the cores between concurrent execute jobs; Whisper workers are opt-in
+    # since each one loads its own model
+    cpus = os.cpu_count() or 1
+    render_threads = max(1, cpus // args.render_jobs)
+    # Stages re-run when a setting that changes their output changes
+    analyze_settings = {
+        "whisper_model": args.whisper_model,
+        "language": args.language,
+        "silence_threshold": args.silence_threshold,
+        "chunked": args.workers > 1,
+    }
+    execute_settings = {
+        "render_mode": args.render_mode,
+        "skip_denoise": args.skip_denoise,
+        "loudness": args.loudness,
+    }
+    state = load_batch_state(state_path)
+
+    def run(cmd):
+        with open(log_path, "a") as log:
+            log.write(f"$ {' '.join(cmd)}\n")
+            log.flush()
+            result = subprocess.run(cmd, stdout=log, stderr=subprocess.STDOUT)
+        if result.returncode != 0:
+            raise RuntimeError(f"{cmd[2]} failed (see {log_path})")
+
+    try:
+        analyze_outputs = [base + "_whisper.json", base + "_analysis.json", plan_path]
+        if (not args.force and state.get("analyze") == analyze_settings
+                and is_up_to_date(analyze_outputs, [input_path])):
+            entry["skipped"].append("analyze")
+        else:
+            cmd = [sys.executable, script, "analyze", input_path,
+                   "-m", args.whisper_model, "-l", args.language,
+                   "--silence-threshold", str(args.silence_threshold),
+                   "--workers", str(args.workers)]
+            if args.profile:
+                cmd += ["--trace", base + "_analyze_trace.json"]
+            with whisper_slots:
+                t0 = time.time()
+                run(cmd)
+                entry["analyze_sec"] = round(time.time() - t0, 1)
+            record_batch_state(state_path, "analyze", analyze_settings)
+
+        if args.analyze_only:
+            return entry
+
+        if (not args.force and state.get("execute") == execute_settings
+                and is_up_to_date([output_path], [input_path, plan_path])):
+            entry["skipped"].append("execute")
+        else:
+            cmd = [sys.executable, script, "execute", input_path, plan_path,
+                   "--render-mode", args.render_mode, "--jobs", str(render_threads)]
+            if args.skip_denoise:
+                cmd.append("--skip-denoise")
+            if args.loudness is not None:
+                cmd += ["--loudness", str(args.loudness)]
+            if args.profile:
+                cmd += ["--trace", base + "_execute_trace.json"]
+            with render_slots:
+                t0 = time.time()
+                run(cmd)
+                entry["execute_sec"] = round(time.time() - t0, 1)
+            record_batch_state(state_path, "execute", execute_settings)
+
+        in_mb = os.path.getsize(input_path) / 1024 / 1024
+        out_mb = os.path.getsize(output_path) / 1024 / 1024
+        entry["output"] = output_path
+        entry["input_mb"] = round(in_mb, 1)
+        entry["output_mb"] = round(out_mb, 1)
+        entry["size_reduction_pct"] = round((1 - out_mb / in_mb) * 100, 1) if in_mb else 0.0
+
+    except Exception as e:
+        entry["status"] = "error"
+        entry["error"] = str(e)
+    return entry
+
+
+def cmd_batch(args):
+    """Analyze and execute many recordings with bounded concurrency."""
+    import threading
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    if not os.path.exists(args.source):
+        print(f"Error: Not found: {args.source}", file=sys.stderr)
+        sys.exit(1)
+
+    inputs = collect_batch_inputs(args.source)
+    missing = [p for p in inputs if not os.path.exists(p)]
+    for p in missing:
+        print(f"Warning: File not found, skipping: {p}")
+    inputs = [p for p in inputs if p not in missing]
+    if not inputs:
+        print("Error: No input files", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Batch: {len(inputs)} files")
+    print(f"  Whisper jobs: {args.whisper_jobs}, render jobs: {args.render_jobs}")
+    print()
+
+    whisper_slots = threading.Semaphore(args.whisper_jobs)
+    render_slots = threading.Semaphore(args.render_jobs)
+    t0 = time.time()
+    entries = []
+    with ThreadPoolExecutor(max_workers=args.whisper_jobs + args.render_jobs) as pool:
+        futures = [
+            pool.submit(run_batch_job, p, args, whisper_slots, render_slots)
+            for p in inputs
+        ]
+        for fut in as_completed(futures):
+            e = fut.result()
+            entries.append(e)
+            detail = e.get("error") or ", ".join(
+                f"{k} {e[k]:.0f}s" for k in ("analyze_sec", "execute_sec") if k in e
+            ) or "up to date"
+            print(f"  [{len(entries)}/{len(inputs)}] {e['status'].upper():5s} "
+                  f"{os.path.basename(e['input'])}: {detail}")
+
+    entries.sort(key=lambda e: inputs.index(e["input"]))
+    failed = sum(1 for e in entries if e["status"] != "ok")
+    summary = {
+        "source": args.source,
+        "files": len(entries),
+        "failed": failed,
+        "wall_sec": round(time.time() - t0, 1),
+        "results": entries,
+    }
+
+    summary_path = args.summary or os.path.join(
+        args.source if os.path.isdir(args.source) else os.path.dirname(args.source) or ".",
+        "batch_summary.json",
+    )
+    with open(summary_path, "w") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+
+    print(f"\nDone in {summary['wall_sec']:.0f}s | OK: {len(entries) - failed} | Failed: {failed}")
+    print(f"Summary saved: {summary_path}")
+
+    if args.profile:
+        traces = [
+            os.path.splitext(p)[0] + f"_{kind}_trace.json"
+            for p in inputs for kind in ("analyze", "execute")
+        ]
+        traces = [t for t in traces if os.path.exists(t)]
+        if traces:
+            out_dir = os.path.dirname(summary_path) or "."
+            stages, total = summarize_traces(traces)
+            print(f"\nStage profile ({len(traces)} traces):")
+            print_trace_summary(stages, total)
+            profile_path = os.path.join(out_dir, "batch_profile.json")
+            with open(profile_path, "w") as f:
+                json.dump({"traces": traces, "total_wall_s": round(total, 3), "stages": stages}, f, indent=2)
+            merge_traces(traces, os.path.join(out_dir, "batch_trace.json"))
+            print(f"Profile saved: {profile_path}")
+
+    if failed:
+        sys.exit(1)
+
+
+# ──────────────────────────────────────────────
+# Trace Summary Command
+# ──────────────────────────────────────────────
+
+def merge_traces(paths, output_path):
+    """Concatenate trace files into one Chrome trace (one track per process)."""
+    events = []
+    for path in paths:
+        with open(path) as f:
+            events.extend(json.load(f).get("traceEvents", []))
+    with open(output_path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+def cmd_trace_summary(args):
+    """Print per-stage totals across trace files written with --trace."""
+    missing = [p for p in args.traces if not os.path.exists(p)]
+    if missing:
+        print(f"Error: Trace not found: {missing[0]}", file=sys.stderr)
+        sys.exit(1)
+
+    stages, total = summarize_traces(args.traces)
+    print(f"Traces: {len(args.traces)} | Command wall time: {total:.1f}s")
+    print_trace_summary(stages, total)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"traces": args.traces, "total_wall_s": round(total, 3), "stages": stages}, f, indent=2)
+        print(f"\nSaved: {args.output}")
+    if args.merge:
+        merge_traces(args.traces, args.merge)
+        print(f"Merged trace: {args.merge}")
+
+
+# ──────────────────────────────────────────────
+# Benchmark Command
+# ──────────────────────────────────────────────
+
+def bench_silence_gate(seconds, sr=44100):
+    """Compare the per-frame Python loop with the vectorized silence gate."""
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    n = int(seconds * sr)
+    envelope = np.repeat(rng.random(n // sr + 1), sr)[:n]
+    audio = rng.standard_normal(n) * envelope * 0.1
+    frame_len = int(sr * 0.02)
+
+    def loop_gate(audio):
+        # Previous implementation, kept as the reference
+        audio = audio.copy()
+        n_frames = len(audio) // frame_len
+        rms = np.array([
+            np.sqrt(np.mean(audio[i * frame_len:(i + 1) * frame_len] ** 2))
+            for i in range(n_frames)
+        ])
+        threshold = np.percentile(rms[rms > 0], 25) if np.any(rms > 0) else 0
+        for i in range(n_frames):
+            if rms[i] < threshold:
+                audio[i * frame_len:(i + 1) * frame_len] *= 0.05
+        return audio
+
+    print(f"Silence gate: {seconds:.0f}s @ {sr}Hz ({n // frame_len} frames)")
+    t0 = time.perf_counter()
+    reference = loop_gate(audio)
+    t_loop = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    hard, _, _ = silence_gate(audio, sr, ramp_ms=0)
+    t_vec = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    silence_gate(audio, sr)
+    t_ramp = time.perf_counter() - t0
+
+    print(f"  Python loop:          {t_loop*1000:8.1f}ms")
+    print(f"  Vectorized:           {t_vec*1000:8.1f}ms ({t_loop/t_vec:.0f}x)")
+    print(f"  Vectorized + ramps:   {t_ramp*1000:8.1f}ms ({t_loop/t_ramp:.0f}x)")
+    print(f"  Max diff vs loop:     {np.max(np.abs(hard - reference)):.2e}")
+
+
+def bench_classify(seconds, transcript=None):
+    """Compare per-suffix endswith checks with the reversed-suffix trie."""
+    import random
+
+    if transcript:
+        with open(transcript) as f:
+            data = json.load(f)
+        segments = data.get("segments", data) if isinstance(data, dict) else data
+        texts = [seg["text"] for seg in segments]
+        for seg in segments:
+            texts.extend(w["word"] for w in seg.get("words", []))
+    else:
+        # ~3 words/second of speech; every word is a classification in subtitles
+        rng = random.Random(0)
+        stems = ["영상", "설명", "코드", "데이터", "모델", "화면", "부분", "이거", "저희"]
+        tails = list(SENTENCE_ENDINGS + COMMA_CONNECTORS + CONTINUE_PARTICLES) + ["요", "음", "네", "!", "."]
+        texts = [rng.choice(stems) + rng.choice(tails) for _ in range(int(seconds * 3))]
+
+    def linear(text):
+        # Previous implementation, kept as the reference
+        text = text.strip()
+        if not text:
+            return "empty"
+        if text[-1] in '.!?':
+            return "punctuation"
+        for conn in COMMA_CONNECTORS:
+            if text.endswith(conn):
+                return "comma"
+        for suffix in SENTENCE_ENDINGS:
+            if text.endswith(suffix):
+                return "ending"
+        for particle in CONTINUE_PARTICLES:
+            if text.endswith(particle):
+                return "continuing"
+        return "other"
+
+    print(f"Ending classification: {len(texts)} texts")
+    t0 = time.perf_counter()
+    reference = [linear(t) for t in texts]
+    t_linear = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    result = [classify_ending(t)[1] for t in texts]
+    t_trie = time.perf_counter() - t0
+
+    mismatches = sum(1 for a, b in zip(reference, result) if a != b)
+    print(f"  endswith loop:        {t_linear*1000:8.1f}ms")
+    print(f"  Suffix trie:          {t_trie*1000:8.1f}ms ({t_linear/t_trie:.1f}x)")
+    print(f"  Mismatches vs loop:   {mismatches}")
+
+
+def cmd_benchmark(args):
+    """Run micro-benchmarks for hot paths on synthetic data."""
+    if args.target == "classify":
+        bench_classify(args.seconds, args.transcript)
+        return
+
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        print("Error: numpy not installed. Run: pip install numpy", file=sys.stderr)
+        sys.exit(1)
+
+    if args.target == "silence-gate":
+        bench_silence_gate(args.seconds)
+
+
 # ──────────────────────────────────────────────
 # Main
 # ──────────────────────────────────────────────
 
+def positive_int(value):
+    """argparse type: integer >= 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be >= 1, got {value}")
+    return number
+
+
+def non_negative_float(value):
+    """argparse type: float >= 0."""
+    number = float(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be >= 0, got {value}")
+    return number
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Video Auto-Editor: Whisper-based automated video editing with TTS support",
@@ -1210,6 +3858,20 @@ def main():
                            help="Minimum silence gap to report in seconds (default: 2.0)")
     p_analyze.add_argument("--silence-threshold", type=float, default=10.0,
                            help="Silence gaps longer than this are auto-removed (default: 10.0)")
+    p_analyze.add_argument("--retake-similarity", type=float, default=0.8,
+                           help="Opening-text similarity 0.0~1.0 to flag a retake (default: 0.8)")
+    p_analyze.add_argument("--retake-window", type=float, default=600.0,
+                           help="Only match retakes within this many seconds, 0 = unlimited (default: 600)")
+    p_analyze.add_argument("-w", "--workers", type=int, default=1,
+                           help="Parallel Whisper processes; >1 splits audio at silences (default: 1)")
+    p_analyze.add_argument("--chunk-minutes", type=float, default=10.0,
+                           help="Target chunk length for --workers > 1 (default: 10)")
+    p_analyze.add_argument("--split-silence", type=float, default=1.0,
+                           help="Minimum silence in seconds to split chunks at (default: 1.0)")
+    p_analyze.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                           help=f"Transcription cache directory (default: {DEFAULT_CACHE_DIR})")
+    p_analyze.add_argument("--no-cache", action="store_true",
+                           help="Always re-transcribe (do not read or write the cache)")
 
     # execute
     p_execute = subparsers.add_parser("execute", help="Execute edit plan")
@@ -1225,6 +3887,39 @@ def main():
                            help="Low-pass filter frequency in Hz (default: 13000)")
     p_execute.add_argument("-b", "--audio-bitrate", default="192k",
                            help="Output audio bitrate (default: 192k)")
+    p_execute.add_argument("--render-mode", choices=["filter", "smart", "parts"], default="parts",
+                           help="parts: per-segment stream copy + concat; "
+                                "filter: single-pass filter graph render (re-encodes everything on every run); "
+                                "smart: stream-copy GOP interiors, re-encode cut boundaries, "
+                                "cached per range for incremental re-runs (default: parts)")
+    p_execute.add_argument("--video-codec", default="libx264",
+                           help="Video encoder for filter render (default: libx264)")
+    p_execute.add_argument("--crf", type=int, default=18,
+                           help="Video quality (CRF) for re-encoded video (default: 18)")
+    p_execute.add_argument("--preset", default="medium",
+                           help="Encoder preset for re-encoded video (default: medium)")
+    p_execute.add_argument("-j", "--jobs", type=int, default=None,
+                           help="Parallel segment extractions in parts/smart mode (default: CPU count)")
+    p_execute.add_argument("--denoise-block", type=float, default=30.0,
+                           help="Denoise streaming block length in seconds (default: 30)")
+    p_execute.add_argument("--crossfade-ms", type=float, default=10.0,
+                           help="Crossfade at each cut for audio-only input (default: 10)")
+    p_execute.add_argument("--loudness", type=float, default=None, metavar="LUFS",
+                           help="Normalize to this integrated loudness, e.g. -16 or -23 (default: off)")
+    p_execute.add_argument("--true-peak", type=float, default=-1.5,
+                           help="Loudness: maximum true peak in dBTP (default: -1.5)")
+    p_execute.add_argument("--lra", type=float, default=11.0,
+                           help="Loudness: target loudness range in LU (default: 11)")
+    p_execute.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                           help=f"Rendered segment cache for smart/parts mode (default: {DEFAULT_CACHE_DIR})")
+    p_execute.add_argument("--no-cache", action="store_true",
+                           help="Render every segment (do not read or write the segment cache)")
+    p_execute.add_argument("--cache-max-gb", type=float, default=DEFAULT_SEGMENT_CACHE_GB,
+                           help="Evict least recently used segments beyond this size, 0 = no limit "
+                                f"(default: {DEFAULT_SEGMENT_CACHE_GB:g})")
+    p_execute.add_argument("--index", action="store_true",
+                           help="Write the <output>_index.npz review sidecar (decodes the output video "
+                                "for scene scores, so smart mode is no longer copy-only)")
 
     # tts-prepare
     p_tts_prep = subparsers.add_parser("tts-prepare", help="Prepare TTS segments from whisper data")
@@ -1234,6 +3929,23 @@ def main():
     p_tts_prep.add_argument("-o", "--output", help="Output base path (default: input basename)")
     p_tts_prep.add_argument("--corrections", help="Text corrections JSON file (optional)")
 
+    # subtitles
+    p_subs = subparsers.add_parser("subtitles", help="Write SRT/VTT subtitles for the edited video")
+    p_subs.add_argument("whisper", help="Whisper transcription JSON (*_whisper.json)")
+    p_subs.add_argument("plan", help="Edit plan JSON (*_edit_plan.json)")
+    p_subs.add_argument("-o", "--output", help="Output base path (default: *_edited next to the whisper file)")
+    p_subs.add_argument("-f", "--format", choices=["srt", "vtt", "both"], default="srt",
+                        help="Subtitle format (default: srt)")
+    p_subs.add_argument("--max-chars", type=int, default=32,
+                        help="Maximum characters per cue (default: 32)")
+    p_subs.add_argument("--max-duration", type=float, default=6.0,
+                        help="Maximum cue duration in seconds (default: 6.0)")
+    p_subs.add_argument("--max-gap", type=float, default=1.0,
+                        help="Start a new cue after a pause longer than this (default: 1.0)")
+    p_subs.add_argument("--corrections", help="Text corrections JSON file (optional)")
+    p_subs.add_argument("--endings",
+                        help="JSON with extra \"sentence\"/\"comma\"/\"continue\" suffixes")
+
     # tts-generate
     p_tts_gen = subparsers.add_parser("tts-generate", help="Generate TTS audio and create video")
     p_tts_gen.add_argument("input", help="Edited video file")
@@ -1249,6 +3961,15 @@ def main():
                            help="Style 0.0~1.0 (default: 0.3)")
     p_tts_gen.add_argument("--force", action="store_true",
                            help="Re-generate all TTS files (ignore cache)")
+    p_tts_gen.add_argument("-c", "--concurrency", type=positive_int, default=4,
+                           help="Concurrent TTS requests (default: 4)")
+    p_tts_gen.add_argument("--rate", type=non_negative_float, default=2.0,
+                           help="Maximum TTS requests per second, 0 = unlimited (default: 2.0)")
+    p_tts_gen.add_argument("--retries", type=positive_int, default=3,
+                           help="Attempts per segment (default: 3)")
+    p_tts_gen.add_argument("--api-base",
+                           default=os.environ.get("ELEVENLABS_API_BASE", "https://api.elevenlabs.io"),
+                           help="ElevenLabs API base URL (default: $ELEVENLABS_API_BASE or https://api.elevenlabs.io)")
     p_tts_gen.add_argument("-o", "--output", help="Output base path (default: input basename)")
     p_tts_gen.add_argument("--skip-denoise", action="store_true", help="Skip audio denoising")
     p_tts_gen.add_argument("-s", "--denoise-strength", type=float, default=0.4,
@@ -1257,6 +3978,12 @@ def main():
     p_tts_gen.add_argument("--lowpass", type=int, default=13000, help="Low-pass Hz (default: 13000)")
     p_tts_gen.add_argument("-b", "--audio-bitrate", default="192k",
                            help="Output audio bitrate (default: 192k)")
+    p_tts_gen.add_argument("--loudness", type=float, default=None, metavar="LUFS",
+                           help="Normalize to this integrated loudness, e.g. -16 or -23 (default: off)")
+    p_tts_gen.add_argument("--true-peak", type=float, default=-1.5,
+                           help="Loudness: maximum true peak in dBTP (default: -1.5)")
+    p_tts_gen.add_argument("--lra", type=float, default=11.0,
+                           help="Loudness: target loudness range in LU (default: 11)")
 
     # trim-silence
     p_trim = subparsers.add_parser("trim-silence", help="Trim silence with dynamic or fixed caps")
@@ -1273,20 +4000,94 @@ def main():
                         help="Dynamic: comma-connector cap (default: 0.3)")
     p_trim.add_argument("--cap-continue", type=float, default=0.15,
                         help="Dynamic: continuing-phrase cap (default: 0.15)")
+    p_trim.add_argument("--endings",
+                        help="Dynamic: JSON with extra \"sentence\"/\"comma\"/\"continue\" suffixes")
+    p_trim.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Parallel segment extractions (default: CPU count)")
+    p_trim.add_argument("--render-mode", choices=["copy", "smart"], default="copy",
+                        help="copy: stream copy (keyframe-snapped cuts); "
+                             "smart: frame-accurate smart cut (default: copy)")
+    p_trim.add_argument("--video-codec", default="libx264",
+                        help="Fallback video encoder for smart mode (default: libx264)")
+    p_trim.add_argument("--crf", type=int, default=18,
+                        help="Smart mode: CRF for re-encoded slivers (default: 18)")
+    p_trim.add_argument("--preset", default="medium",
+                        help="Smart mode: encoder preset (default: medium)")
+    p_trim.add_argument("-b", "--audio-bitrate", default="192k",
+                        help="Smart mode: output audio bitrate (default: 192k)")
     p_trim.add_argument("-o", "--output", help="Output file path")
 
+    # batch
+    p_batch = subparsers.add_parser("batch", help="Analyze and execute many recordings")
+    p_batch.add_argument("source", help="Directory of recordings, or manifest (.json list or text, one path per line)")
+    p_batch.add_argument("--whisper-jobs", type=positive_int, default=1,
+                         help="Concurrent analyze (Whisper) jobs (default: 1)")
+    p_batch.add_argument("-w", "--workers", type=positive_int, default=1,
+                         help="Whisper processes per analyze job; >1 transcribes silence-split chunks "
+                              "in parallel, each worker loading its own model (default: 1)")
+    p_batch.add_argument("--render-jobs", type=positive_int, default=2,
+                         help="Concurrent execute (ffmpeg) jobs (default: 2)")
+    p_batch.add_argument("-m", "--whisper-model", default="medium",
+                         choices=["tiny", "base", "small", "medium", "large"],
+                         help="Whisper model size (default: medium)")
+    p_batch.add_argument("-l", "--language", default="ko", help="Language code (default: ko)")
+    p_batch.add_argument("--silence-threshold", type=float, default=10.0,
+                         help="Silence gaps longer than this are auto-removed (default: 10.0)")
+    p_batch.add_argument("--render-mode", choices=["filter", "smart", "parts"], default="parts",
+                         help="execute render mode (default: parts)")
+    p_batch.add_argument("--skip-denoise", action="store_true", help="Skip audio denoising")
+    p_batch.add_argument("--loudness", type=float, default=None, metavar="LUFS",
+                         help="Passed to execute: target integrated loudness (default: off)")
+    p_batch.add_argument("--analyze-only", action="store_true",
+                         help="Only analyze (review plans before executing)")
+    p_batch.add_argument("--force", action="store_true",
+                         help="Re-run stages even when outputs are up to date")
+    p_batch.add_argument("--summary", help="Summary JSON path (default: SOURCE/batch_summary.json)")
+    p_batch.add_argument("--profile", action="store_true",
+                         help="Trace every stage and aggregate into batch_profile.json / batch_trace.json")
+
+    # benchmark
+    p_bench = subparsers.add_parser("benchmark", help="Micro-benchmark hot paths on synthetic data")
+    p_bench.add_argument("target", choices=["silence-gate", "classify"], help="What to benchmark")
+    p_bench.add_argument("--seconds", type=float, default=600.0,
+                         help="Synthetic input length in seconds (default: 600)")
+    p_bench.add_argument("--transcript",
+                         help="classify: Whisper JSON to use instead of synthetic text")
+
+    # trace-summary
+    p_trace = subparsers.add_parser("trace-summary", help="Aggregate stage timings from --trace files")
+    p_trace.add_argument("traces", nargs="+", help="Trace JSON files written with --trace")
+    p_trace.add_argument("-o", "--output", help="Save per-stage totals as JSON")
+    p_trace.add_argument("--merge", help="Write all events as one Chrome trace")
+
+    for p in (p_analyze, p_execute, p_subs, p_tts_gen, p_trim):
+        p.add_argument("--trace", metavar="TRACE_JSON",
+                       help="Record per-stage timings as a Chrome trace (chrome://tracing, Perfetto)")
+
     args = parser.parse_args()
 
-    if args.command == "analyze":
-        cmd_analyze(args)
-    elif args.command == "execute":
-        cmd_execute(args)
-    elif args.command == "tts-prepare":
-        cmd_tts_prepare(args)
-    elif args.command == "tts-generate":
-        cmd_tts_generate(args)
-    elif args.command == "trim-silence":
-        cmd_trim_silence(args)
+    if getattr(args, "trace", None):
+        enable_profiler(args.trace)
+
+    with stage(args.command, cat="command"):
+        if args.command == "analyze":
+            cmd_analyze(args)
+        elif args.command == "execute":
+            cmd_execute(args)
+        elif args.command == "tts-prepare":
+            cmd_tts_prepare(args)
+        elif args.command == "subtitles":
+            cmd_subtitles(args)
+        elif args.command == "tts-generate":
+            cmd_tts_generate(args)
+        elif args.command == "trim-silence":
+            cmd_trim_silence(args)
+        elif args.command == "batch":
+            cmd_batch(args)
+        elif args.command == "trace-summary":
+            cmd_trace_summary(args)
+        elif args.command == "benchmark":
+            cmd_benchmark(args)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,138 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from video_editor import EditPlan, generate_tts_files, map_words
+
+
+class StubTTSHandler(BaseHTTPRequestHandler):
+    """Replays the server's scripted (status, headers) responses in order, then 200s.
+
+    200s are delayed slightly so an error response always arrives first.
+    """
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        server = self.server
+        with server.lock:
+            server.requests.append(time.monotonic())
+            status, headers = server.script.pop(0) if server.script else (200, {})
+        if status == 200:
+            time.sleep(0.2)
+        body = b"ID3-stub-audio" if status == 200 else b'{"detail": "stub error"}'
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# Currently this is not run automatically in CI; it's just for documentation and manual checking.
+class TestGenerateTTSFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubTTSHandler)
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.script = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1/text-to-speech/stub"
+        self.tts_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.tts_dir)
+
+    def generate(self, count, **kwargs):
+        segments = [{"text": f"segment {i}"} for i in range(count)]
+        return generate_tts_files(segments, self.tts_dir, self.url, {}, {}, "stub-model", **kwargs)
+
+    def read(self, i):
+        with open(os.path.join(self.tts_dir, f"tts_{i:03d}.mp3"), "rb") as f:
+            return f.read()
+
+    def test_rate_limited_then_ok(self):
+        """429 with Retry-After pauses every worker, then the retry succeeds"""
+        self.server.script = [(429, {"Retry-After": "1"})]
+        success, errors = self.generate(6, concurrency=2, rate=0)
+        self.assertEqual((success, errors), (6, 0))
+        self.assertEqual(len(self.server.requests), 7)
+        for i in range(6):
+            self.assertEqual(self.read(i), b"ID3-stub-audio")
+        # Only the request already in flight may start before Retry-After has passed
+        first = self.server.requests[0]
+        waited = [t - first >= 0.9 for t in self.server.requests[1:]]
+        self.assertEqual(waited.count(False), 1)
+
+    def test_server_error_then_ok(self):
+        """500 is retried after a backoff"""
+        self.server.script = [(500, {})]
+        t0 = time.monotonic()
+        success, errors = self.generate(1, rate=0)
+        self.assertEqual((success, errors), (1, 0))
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertGreaterEqual(time.monotonic() - t0, 0.9)
+
+    def test_gives_up_after_retries(self):
+        self.server.script = [(500, {})] * 2
+        success, errors = self.generate(1, rate=0, retries=2)
+        self.assertEqual((success, errors), (0, 1))
+        self.assertFalse(os.path.exists(os.path.join(self.tts_dir, "tts_000.mp3")))
+
+    def test_cached_files_skipped(self):
+        """Existing non-empty files are reused without a request"""
+        with open(os.path.join(self.tts_dir, "tts_000.mp3"), "wb") as f:
+            f.write(b"cached")
+        success, errors = self.generate(2)
+        self.assertEqual((success, errors), (2, 0))
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(self.read(0), b"cached")
+        self.assertEqual(self.read(1), b"ID3-stub-audio")
+
+    def test_force_regenerates_cached(self):
+        with open(os.path.join(self.tts_dir, "tts_000.mp3"), "wb") as f:
+            f.write(b"cached")
+        self.generate(1, force=True)
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(self.read(0), b"ID3-stub-audio")
+
+
+def word(text, start, end):
+    return {"word": text, "start": start, "end": end}
+
+
+class TestMapWords(unittest.TestCase):
+
+    def test_zero_length_word_joins_previous(self):
+        """A zero-length word is merged into its neighbour instead of creating a cut"""
+        plan = EditPlan([{"action": "KEEP", "start": 0.0, "end": 2.0}])
+        words = [word(" 안녕", 0.0, 0.5), word(" 하세요", 0.5, 1.0), word(".", 1.0, 1.0),
+                 word(" 오늘", 1.2, 1.6)]
+        mapped = map_words(words, plan)
+        self.assertEqual([w["word"] for w in mapped], [" 안녕", " 하세요.", " 오늘"])
+        self.assertEqual([w["cut_before"] for w in mapped], [False, False, False])
+
+    def test_zero_length_word_after_cut_joins_next(self):
+        """Zero-length words stay on their side of a cut; removed ones are dropped"""
+        plan = EditPlan([{"action": "KEEP", "start": 0.0, "end": 1.0},
+                         {"action": "REMOVE", "start": 1.0, "end": 3.0},
+                         {"action": "KEEP", "start": 3.0, "end": 5.0}])
+        words = [word(" a", 0.2, 0.8), word(" x", 2.0, 2.0), word(" b", 3.0, 3.0),
+                 word(" c", 3.0, 3.5)]
+        mapped = map_words(words, plan)
+        self.assertEqual([w["word"] for w in mapped], [" a", " b c"])
+        self.assertEqual([w["cut_before"] for w in mapped], [False, True])
+        self.assertEqual((mapped[1]["start"], mapped[1]["end"]), (1.0, 1.5))
+
+
+if __name__ == '__main__':
+    unittest.main()